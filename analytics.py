@@ -0,0 +1,154 @@
+"""Vectorized trend analytics over a user's progress and workout history.
+
+Inputs are plain columnar sequences (dates, values) as loaded by app.py; all
+computation happens on NumPy arrays / pandas Series rather than per row.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+MOVING_AVERAGE_WINDOWS = (7, 30)  # days
+PROJECTION_WINDOW_DAYS = 28  # recent history used to fit the weight trend
+VOLUME_ROLLING_WEEKS = 4
+
+
+def daily_series(dates, values):
+    """Series indexed by day; several entries on one day are averaged"""
+    series = pd.Series(np.asarray(values, dtype=float), index=pd.DatetimeIndex(dates), dtype=float)
+    series = series[~np.isnan(series.to_numpy())]
+    return series.groupby(level=0).mean().sort_index()
+
+
+def to_json_list(values, decimals=2):
+    """NaN-safe list of rounded floats for JSON output"""
+    array = np.round(np.asarray(values, dtype=float), decimals)
+    return pd.Series(array).astype(object).where(~np.isnan(array), None).tolist()
+
+
+def date_labels(index):
+    return index.strftime('%Y-%m-%d').tolist()
+
+
+def moving_averages(weights, windows=MOVING_AVERAGE_WINDOWS):
+    """Time-based rolling means (calendar days, not entry counts) of a daily weight series"""
+    return {f'moving_average_{w}d': weights.rolling(f'{w}D').mean() for w in windows}
+
+
+def weekly_weight_change(weights):
+    """Mean weight per Monday-started week and its change per week since the previous logged week"""
+    weekly = weights.resample('W-MON', label='left', closed='left').mean().dropna()
+    gap_weeks = np.diff(weekly.index.to_numpy()).astype('timedelta64[D]').astype(float) / 7
+    change = np.concatenate([[np.nan], np.diff(weekly.to_numpy()) / gap_weeks])
+    return weekly, change
+
+
+def trend_fit(weights, window_days=PROJECTION_WINDOW_DAYS):
+    """Least-squares line through the last window_days of weights: (slope per day, trend weight today)"""
+    if weights.empty:
+        return None
+    recent = weights[weights.index >= weights.index[-1] - pd.Timedelta(days=window_days)]
+    if len(recent) < 2:
+        return None
+    days = (recent.index - recent.index[0]).days.to_numpy(dtype=float)
+    slope, intercept = np.polyfit(days, recent.to_numpy(), 1)
+    return slope, intercept + slope * days[-1]
+
+
+def goal_projection(weights, target_weight, target_date=None, window_days=PROJECTION_WINDOW_DAYS):
+    """Project when the recent weight trend reaches target_weight and compare with target_date"""
+    if target_weight is None:
+        return None
+    fit = trend_fit(weights, window_days)
+    if fit is None:
+        return {'status': 'insufficient_data', 'target_weight': target_weight}
+
+    slope, trend_weight = fit
+    last_day = weights.index[-1].date()
+    remaining = target_weight - trend_weight
+    projection = {
+        'target_weight': target_weight,
+        'target_date': target_date.isoformat() if target_date else None,
+        'trend_weight': round(float(trend_weight), 2),
+        'rate_per_week': round(float(slope * 7), 2),
+        'projected_date': None,
+        'required_rate_per_week': None,
+        'on_track': None
+    }
+
+    if target_date and target_date > last_day:
+        projection['required_rate_per_week'] = round(float(remaining / ((target_date - last_day).days / 7)), 2)
+
+    if abs(remaining) < 0.5:
+        projection['status'] = 'reached'
+        projection['on_track'] = True
+    elif slope == 0 or np.sign(slope) != np.sign(remaining):
+        projection['status'] = 'not_progressing'
+        projection['on_track'] = False if target_date else None
+    else:
+        projected = last_day + timedelta(days=int(np.ceil(remaining / slope)))
+        projection['status'] = 'progressing'
+        projection['projected_date'] = projected.isoformat()
+        projection['on_track'] = projected <= target_date if target_date else None
+    return projection
+
+
+def training_volume(session_dates, durations, rolling_weeks=VOLUME_ROLLING_WEEKS):
+    """Completed sessions and minutes per Monday-started week, with rolling means and a recent trend"""
+    if len(session_dates) == 0:
+        return {'weeks': [], 'sessions': [], 'minutes': [], f'rolling_{rolling_weeks}w_minutes': [],
+                'minutes_trend_per_week': None}
+
+    frame = pd.DataFrame(
+        {'sessions': 1.0, 'minutes': np.asarray(durations, dtype=float)},
+        index=pd.DatetimeIndex(session_dates)
+    ).fillna({'minutes': 0.0})
+    weekly = frame.resample('W-MON', label='left', closed='left').sum()  # empty weeks count as zero
+    rolling = weekly['minutes'].rolling(rolling_weeks, min_periods=1).mean()
+
+    recent = weekly['minutes'].to_numpy()[-2 * rolling_weeks:]
+    trend = np.polyfit(np.arange(len(recent), dtype=float), recent, 1)[0] if len(recent) >= 2 else None
+
+    return {
+        'weeks': date_labels(weekly.index),
+        'sessions': weekly['sessions'].astype(int).tolist(),
+        'minutes': to_json_list(weekly['minutes'], 0),
+        f'rolling_{rolling_weeks}w_minutes': to_json_list(rolling, 1),
+        'minutes_trend_per_week': round(float(trend), 2) if trend is not None else None
+    }
+
+
+def build_analytics(progress_dates, weights, session_dates, durations, target_weight=None, target_date=None,
+                    since=None):
+    """Analytics payload for one user's history; since only trims the returned series, not the fits"""
+    weight_series = daily_series(progress_dates, weights)
+    averages = moving_averages(weight_series)
+    weekly, change = weekly_weight_change(weight_series)
+
+    # Weeks are labelled by their Monday, so the week containing since starts on or before it
+    since_week = since - timedelta(days=since.weekday()) if since else None
+
+    def trimmed(index, start):
+        return index >= pd.Timestamp(start) if start else np.ones(len(index), dtype=bool)
+
+    keep = trimmed(weight_series.index, since)
+    keep_weeks = trimmed(weekly.index, since_week)
+    volume = training_volume(session_dates, durations)
+    if since:
+        first = next((i for i, week in enumerate(volume['weeks']) if week >= since_week.isoformat()),
+                     len(volume['weeks']))
+        volume = {key: value[first:] if isinstance(value, list) else value for key, value in volume.items()}
+
+    return {
+        'weight': dict(
+            {'dates': date_labels(weight_series.index[keep]), 'weights': to_json_list(weight_series[keep])},
+            **{name: to_json_list(series[keep]) for name, series in averages.items()}
+        ),
+        'weekly_change': {
+            'weeks': date_labels(weekly.index[keep_weeks]),
+            'average_weight': to_json_list(weekly[keep_weeks]),
+            'change_per_week': to_json_list(change[keep_weeks])
+        },
+        'goal_projection': goal_projection(weight_series, target_weight, target_date),
+        'training_volume': volume
+    }
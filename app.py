@@ -1,28 +1,373 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, render_template, request, jsonify, send_file, session, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, case, event, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from flask_cors import CORS
 from datetime import datetime, timedelta
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import base64
+import csv
+import functools
+import hashlib
+import io
+import itertools
 import json
-from openai import OpenAI
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import click
+import glob
 import os
-import sqlite3
 from werkzeug.security import generate_password_hash, check_password_hash
-import plotly.graph_objects as go
-import plotly.utils
+from llm_gateway import LLMGateway, LLMUnavailable
+import plan_generator
+import chat_context
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///workoutbot.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Storage: SQLite by default, or a server database (e.g. postgresql://...) via DATABASE_URL
+def database_uri(url):
+    # Some hosts still hand out the pre-1.4 postgres:// scheme
+    return 'postgresql://' + url[len('postgres://'):] if url.startswith('postgres://') else url
 
-db = SQLAlchemy(app)
-CORS(app)
+def database_engine_options(uri):
+    """Connection pool settings; in-memory SQLite keeps SQLAlchemy's single-connection pool"""
+    if uri.startswith('sqlite') and (uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri):
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),  # seconds waiting for a free connection
+    }
+    if not uri.startswith('sqlite'):
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds
+    return options
 
-# Load API keys and initialize OpenAI client
-with open('api_keys.json', 'r') as f:
-    api_keys = json.load(f)
+def configure_app(app, config=None):
+    """Settings from the environment, then any explicit overrides from config"""
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(os.environ.get('DATABASE_URL', 'sqlite:///workoutbot.db'))
+    
+    # Applied to every new SQLite connection; WAL lets readers run alongside the single writer
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),  # wait for the write lock instead of failing
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),  # durable at checkpoints; safe with WAL
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # negative means KiB, not pages
+    }
+    
+    # OpenAI credentials: OPENAI_API_KEY, else the key in API_KEYS_FILE (read on the first API call).
+    # OPENAI_BASE_URL points the client at a compatible server (e.g. benchmarks/fake_openai.py)
+    app.config['OPENAI_API_KEY'] = os.environ.get('OPENAI_API_KEY')
+    app.config['API_KEYS_FILE'] = os.environ.get('API_KEYS_FILE', 'api_keys.json')
+    app.config['OPENAI_BASE_URL'] = os.environ.get('OPENAI_BASE_URL')
+    
+    # LLM gateway (llm_gateway.py), per process: deadline per call kind in seconds (covering queueing
+    # and retries), cap on calls in flight, request rate limit, retries and circuit breaker
+    app.config['LLM_DEADLINES'] = {
+        'workout_plan': float(os.environ.get('LLM_PLAN_DEADLINE', 90)),
+        'chatbot': float(os.environ.get('LLM_CHAT_DEADLINE', 30)),
+        'chat_summary': float(os.environ.get('LLM_CHAT_DEADLINE', 30)),
+    }
+    app.config['LLM_MAX_IN_FLIGHT'] = int(os.environ.get('LLM_MAX_IN_FLIGHT', 8))
+    app.config['LLM_QUEUE_TIMEOUT'] = float(os.environ.get('LLM_QUEUE_TIMEOUT', 5))  # seconds to wait for a slot
+    app.config['LLM_RATE_PER_SECOND'] = float(os.environ.get('LLM_RATE_PER_SECOND', 10))
+    app.config['LLM_RATE_BURST'] = int(os.environ.get('LLM_RATE_BURST', 20))
+    app.config['LLM_MAX_RETRIES'] = int(os.environ.get('LLM_MAX_RETRIES', 2))
+    app.config['LLM_RETRY_BASE_DELAY'] = float(os.environ.get('LLM_RETRY_BASE_DELAY', 0.5))  # seconds, doubled per retry
+    app.config['LLM_BREAKER_FAILURES'] = int(os.environ.get('LLM_BREAKER_FAILURES', 5))  # consecutive, to open
+    app.config['LLM_BREAKER_RESET'] = float(os.environ.get('LLM_BREAKER_RESET', 30))  # seconds open before a probe
+    
+    # Rule-based plans (plan_generator.py) stand in when the LLM gateway is unavailable;
+    # clients can also ask for one directly with "generator": "local"
+    app.config['LOCAL_PLAN_FALLBACK'] = os.environ.get('LOCAL_PLAN_FALLBACK', '1') != '0'
+    
+    # Chat memory (chat_context.py): estimated prompt tokens per chatbot turn, turns kept verbatim
+    # when older ones are folded into the conversation's rolling summary, and the summary's size
+    app.config['CHAT_CONTEXT_TOKENS'] = int(os.environ.get('CHAT_CONTEXT_TOKENS', 2000))
+    app.config['CHAT_KEEP_RECENT_MESSAGES'] = int(os.environ.get('CHAT_KEEP_RECENT_MESSAGES', 4))
+    app.config['CHAT_SUMMARY_MAX_WORDS'] = int(os.environ.get('CHAT_SUMMARY_MAX_WORDS', 150))
+    app.config['CHAT_SUMMARY_MODEL'] = os.environ.get('CHAT_SUMMARY_MODEL', 'gpt-4.1-mini')
+    
+    # Background plan generation: LLM concurrency is sized independently of web workers
+    app.config['PLAN_GENERATION_WORKERS'] = int(os.environ.get('PLAN_GENERATION_WORKERS', 2))
+    app.config['PLAN_GENERATION_MAX_ATTEMPTS'] = int(os.environ.get('PLAN_GENERATION_MAX_ATTEMPTS', 3))
+    app.config['PLAN_GENERATION_RETRY_DELAY'] = float(os.environ.get('PLAN_GENERATION_RETRY_DELAY', 2.0))  # seconds, doubled per attempt
+    
+    # LLM response cache (content-addressed on the normalized prompt context)
+    app.config['LLM_CACHE_ENABLED'] = os.environ.get('LLM_CACHE_ENABLED', '1') != '0'
+    app.config['LLM_CACHE_TTL'] = int(os.environ.get('LLM_CACHE_TTL', 7 * 24 * 3600))  # seconds
+    app.config['LLM_CACHE_MAX_ENTRIES'] = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 5000))
+    
+    # In-process cache of parsed workout plans, bounded by approximate memory use
+    app.config['PLAN_CACHE_MAX_BYTES'] = int(os.environ.get('PLAN_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    app.config['BMI_GAUGE_CACHE_MAX_BYTES'] = int(os.environ.get('BMI_GAUGE_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+    
+    # Bulk history import: records validated and inserted per transaction
+    app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 2000))
+    
+    # Largest page a list endpoint will return for ?limit=, and the page size without one
+    app.config['API_PAGE_MAX_LIMIT'] = int(os.environ.get('API_PAGE_MAX_LIMIT', 500))
+    app.config['API_PAGE_DEFAULT_LIMIT'] = int(os.environ.get('API_PAGE_DEFAULT_LIMIT', 100))
+    
+    # Mixed into data-version ETags; defaults to a hash of this file so a deploy that changes
+    # response formats invalidates what clients have cached
+    app.config['ETAG_SALT'] = os.environ.get('ETAG_SALT') or source_fingerprint()
+    
+    # Rendered workout plan PDFs, keyed by plan id and content hash
+    app.config['PDF_CACHE_DIR'] = os.environ.get('PDF_CACHE_DIR', os.path.join(app.instance_path, 'pdf_cache'))
+    
+    # Per-request cProfile dumps, written for requests sent with an X-Profile header when enabled
+    app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', database_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+def source_fingerprint():
+    with open(__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+db = SQLAlchemy()
+cors = CORS()
+bp = Blueprint('main', __name__, cli_group=None)
+
+def create_app(config=None):
+    """Application factory: nothing here touches the database, API keys or heavy libraries"""
+    app = Flask(__name__)
+    configure_app(app, config)
+    db.init_app(app)
+    cors.init_app(app)
+    app.register_blueprint(bp)
+    
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', sqlite_pragma_listener(app.config['SQLITE_PRAGMAS']))
+        event.listen(db.engine, 'before_cursor_execute', start_query_timer)
+        event.listen(db.engine, 'after_cursor_execute', record_query_time)
+    
+    # The caches are process-wide; the most recently created app sets their bounds
+    plan_cache.max_bytes = app.config['PLAN_CACHE_MAX_BYTES']
+    bmi_gauge_cache.max_bytes = app.config['BMI_GAUGE_CACHE_MAX_BYTES']
+    return app
 
-openai_client = OpenAI(api_key=api_keys['OPENAI_API_KEY'])
+def sqlite_pragma_listener(pragmas):
+    """Connect-event listener applying PRAGMAs to each new SQLite connection"""
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+        cursor.close()
+    return set_sqlite_pragmas
+
+# LLM gateway around the OpenAI client, created on first use: importing openai is the largest
+# part of startup. Its connection pool, limits and circuit breaker are shared by all threads
+_llm_gateway_lock = threading.Lock()
+
+def get_llm_gateway():
+    gateway = current_app.extensions.get('llm_gateway')
+    if gateway is None:
+        with _llm_gateway_lock:
+            gateway = current_app.extensions.get('llm_gateway')
+            if gateway is None:
+                config = current_app.config
+                gateway = LLMGateway(
+                    api_key=openai_api_key(),
+                    base_url=config['OPENAI_BASE_URL'],
+                    max_in_flight=config['LLM_MAX_IN_FLIGHT'],
+                    queue_timeout=config['LLM_QUEUE_TIMEOUT'],
+                    rate_per_second=config['LLM_RATE_PER_SECOND'],
+                    burst=config['LLM_RATE_BURST'],
+                    max_retries=config['LLM_MAX_RETRIES'],
+                    retry_base_delay=config['LLM_RETRY_BASE_DELAY'],
+                    breaker_failures=config['LLM_BREAKER_FAILURES'],
+                    breaker_reset=config['LLM_BREAKER_RESET']
+                )
+                current_app.extensions['llm_gateway'] = gateway
+    return gateway
+
+def openai_api_key():
+    if current_app.config['OPENAI_API_KEY']:
+        return current_app.config['OPENAI_API_KEY']
+    with open(current_app.config['API_KEYS_FILE'], 'r') as f:
+        return json.load(f)['OPENAI_API_KEY']
+
+# Request instrumentation, exported in Prometheus text format at /metrics. Values are
+# per process: under a multi-worker server each worker reports its own.
+class Counter:
+    """Thread-safe monotonically increasing value per combination of label values"""
+    kind = 'counter'
+    
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+    
+    def inc(self, amount, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield self.name, prometheus_labels(self.labels, label_values), value
+
+class Histogram:
+    """Thread-safe histogram with fixed bucket bounds per combination of label values"""
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [count per bucket..., count above the last bound, sum]
+    
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+    
+    def samples(self):
+        with self._lock:
+            snapshot = {label_values: list(series) for label_values, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = list(itertools.accumulate(series[:-1]))
+            bounds = [format_metric_value(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, cumulative):
+                yield f'{self.name}_bucket', prometheus_labels(self.labels + ('le',), label_values + (bound,)), count
+            yield f'{self.name}_sum', prometheus_labels(self.labels, label_values), series[-1]
+            yield f'{self.name}_count', prometheus_labels(self.labels, label_values), cumulative[-1]
+
+def prometheus_labels(names, values):
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_metric_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_prometheus(metrics):
+    """Text exposition format: HELP/TYPE headers followed by each metric's samples"""
+    lines = []
+    for metric in metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(f'{name}{labels} {format_metric_value(value)}' for name, labels, value in metric.samples())
+    return '\n'.join(lines) + '\n'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0, 120.0)  # seconds
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+
+http_request_duration = Histogram(
+    'workoutbuddy_http_request_duration_seconds', 'Time to build the response, by endpoint, method and status',
+    ('endpoint', 'method', 'status'), LATENCY_BUCKETS)
+db_queries_per_request = Histogram(
+    'workoutbuddy_db_queries_per_request', 'SQL statements executed while handling a request',
+    ('endpoint',), QUERY_COUNT_BUCKETS)
+db_time_per_request = Histogram(
+    'workoutbuddy_db_seconds_per_request', 'Cumulative SQL execution time while handling a request',
+    ('endpoint',), LATENCY_BUCKETS)
+llm_request_duration = Histogram(
+    'workoutbuddy_llm_request_duration_seconds', 'Chat completion time until the last token, by call site and model',
+    ('kind', 'model', 'stream'), LLM_LATENCY_BUCKETS)
+llm_first_token_duration = Histogram(
+    'workoutbuddy_llm_first_token_seconds', 'Streamed chat completion time until the first content token',
+    ('kind', 'model'), LLM_LATENCY_BUCKETS)
+llm_requests = Counter(
+    'workoutbuddy_llm_requests_total', 'Chat completions by outcome (ok, error, unavailable or cancelled)',
+    ('kind', 'model', 'outcome'))
+llm_tokens = Counter(
+    'workoutbuddy_llm_tokens_total', 'Tokens reported by the API, by direction (prompt or completion)',
+    ('kind', 'model', 'direction'))
+chat_prompt_tokens = Histogram(
+    'workoutbuddy_chat_prompt_tokens', 'Estimated prompt tokens per chatbot turn, after budgeting the history',
+    (), TOKEN_BUCKETS)
+local_plans = Counter(
+    'workoutbuddy_local_plans_total', 'Plans built by the local generator, by reason (requested or fallback)',
+    ('reason',))
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    """Engine event: add the statement to the current request's query count and DB time"""
+    started = conn.info.pop('query_started', None)
+    query_metrics = g.get('query_metrics') if has_request_context() else None
+    if started is not None and query_metrics is not None:
+        query_metrics['queries'] += 1
+        query_metrics['seconds'] += time.perf_counter() - started
+
+@bp.before_app_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.query_metrics = {'queries': 0, 'seconds': 0.0}
+    if current_app.config['PROFILE_REQUESTS'] and request.headers.get('X-Profile'):
+        import cProfile
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    """Observe latency and query counts; streamed bodies are timed until the response starts"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        response.headers['X-Profile-File'] = dump_request_profile(profiler)
+    
+    started = g.get('request_started')
+    query_metrics = g.get('query_metrics')
+    if started is None or query_metrics is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'  # never the raw path, which would be unbounded
+    elapsed = time.perf_counter() - started
+    http_request_duration.observe(elapsed, endpoint, request.method, str(response.status_code))
+    db_queries_per_request.observe(query_metrics['queries'], endpoint)
+    db_time_per_request.observe(query_metrics['seconds'], endpoint)
+    response.headers['Server-Timing'] = (
+        f'db;dur={query_metrics["seconds"] * 1000:.1f};desc="{query_metrics["queries"]} queries", '
+        f'app;dur={elapsed * 1000:.1f}'
+    )
+    return response
+
+def dump_request_profile(profiler):
+    """Write a request's profile for pstats/snakeviz; returns the file name inside PROFILE_DIR"""
+    os.makedirs(current_app.config['PROFILE_DIR'], exist_ok=True)
+    filename = f'{datetime.utcnow():%Y%m%dT%H%M%S}-{request.endpoint or "unmatched"}-{uuid.uuid4().hex[:8]}.prof'
+    profiler.dump_stats(os.path.join(current_app.config['PROFILE_DIR'], filename))
+    return filename
+
+def record_llm_usage(kind, model, usage, totals=None):
+    """Count the API-reported tokens of a call, also adding them to the totals dict if given"""
+    if usage is not None:
+        llm_tokens.inc(usage.prompt_tokens or 0, kind, model, 'prompt')
+        llm_tokens.inc(usage.completion_tokens or 0, kind, model, 'completion')
+        if totals is not None:
+            totals['prompt_tokens'] = totals.get('prompt_tokens', 0) + (usage.prompt_tokens or 0)
+            totals['completion_tokens'] = totals.get('completion_tokens', 0) + (usage.completion_tokens or 0)
 
 # Database Models
 class User(db.Model):
@@ -52,6 +397,10 @@ class Progress(db.Model):
     arms = db.Column(db.Float)
     thighs = db.Column(db.Float)
     notes = db.Column(db.Text)
+    
+    __table_args__ = (
+        db.Index('ix_progress_user_date', 'user_id', 'date'),
+    )
 
 class Goal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -62,20 +411,77 @@ class Goal(db.Model):
     target_date = db.Column(db.Date)
     workout_frequency = db.Column(db.Integer)  # days per week
     workout_duration = db.Column(db.Integer)  # minutes per session
-    preferred_exercises = db.Column(db.Text)  # JSON string of preferred exercises
-    equipment_available = db.Column(db.Text)  # JSON string of available equipment
+    preferred_exercises = db.Column(db.Text)  # legacy JSON list, migrated to goal_preferred_exercise
+    equipment_available = db.Column(db.Text)  # legacy JSON list, migrated to goal_equipment
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    preferred_exercise_items = db.relationship('GoalPreferredExercise', lazy=True, cascade='all, delete-orphan',
+                                               order_by='GoalPreferredExercise.position')
+    equipment_items = db.relationship('GoalEquipment', lazy=True, cascade='all, delete-orphan',
+                                      order_by='GoalEquipment.position')
+    
+    __table_args__ = (
+        db.Index('ix_goal_user_active', 'user_id', 'is_active'),
+    )
+    
+    @property
+    def preferred_exercise_names(self):
+        return [item.name for item in self.preferred_exercise_items]
+    
+    @property
+    def equipment_names(self):
+        return [item.equipment for item in self.equipment_items]
+
+class GoalPreferredExercise(db.Model):
+    goal_id = db.Column(db.Integer, db.ForeignKey('goal.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+
+class GoalEquipment(db.Model):
+    goal_id = db.Column(db.Integer, db.ForeignKey('goal.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    equipment = db.Column(db.String(50), nullable=False)  # normalized key, see equipment_key()
+    
+    __table_args__ = (
+        db.Index('ix_goal_equipment_equipment', 'equipment', 'goal_id'),
+    )
 
 class Exercise(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     category = db.Column(db.String(50))  # chest, back, legs, shoulders, arms, core, cardio
-    muscle_groups = db.Column(db.Text)  # JSON string of muscle groups
-    equipment_needed = db.Column(db.String(100))
+    muscle_groups = db.Column(db.Text)  # legacy JSON list, migrated to exercise_muscle_group
+    equipment_needed = db.Column(db.String(100))  # normalized key, see equipment_key()
     difficulty_level = db.Column(db.String(20))
     instructions = db.Column(db.Text)
     tips = db.Column(db.Text)
+    
+    # Relationships
+    muscle_group_items = db.relationship('ExerciseMuscleGroup', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Covers the category filter and the facet counts (see exercise_facet_counts)
+        db.Index('ix_exercise_facets', 'category', 'equipment_needed', 'difficulty_level'),
+        db.Index('ix_exercise_equipment', 'equipment_needed'),
+        db.Index('ix_exercise_difficulty', 'difficulty_level'),
+    )
+    
+    @property
+    def muscle_group_names(self):
+        return sorted(item.muscle_group for item in self.muscle_group_items)
+
+# Case-insensitive name lookups (find_or_create_exercise, catalog loading, autocomplete)
+db.Index('ix_exercise_name_lower', db.func.lower(Exercise.name))
+
+class ExerciseMuscleGroup(db.Model):
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), primary_key=True)
+    muscle_group = db.Column(db.String(50), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_exercise_muscle_group_muscle', 'muscle_group', 'exercise_id'),
+    )
 
 class WorkoutPlan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -87,9 +493,51 @@ class WorkoutPlan(db.Model):
     days_per_week = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    structured_at = db.Column(db.DateTime)  # when description was parsed into WorkoutPlanDay rows
+    preview = db.column_property(db.func.substr(description, 1, 200), deferred=True)  # list view snippet, cut in SQL
     
     # Relationships
     workout_sessions = db.relationship('WorkoutSession', backref='workout_plan', lazy=True)
+    days = db.relationship('WorkoutPlanDay', backref='workout_plan', lazy=True, cascade='all, delete-orphan',
+                           order_by='WorkoutPlanDay.position')
+    
+    __table_args__ = (
+        db.Index('ix_workout_plan_user_created', 'user_id', 'created_at'),
+        db.Index('ix_workout_plan_user_active_created', 'user_id', 'is_active', 'created_at'),
+    )
+
+class WorkoutPlanDay(db.Model):
+    # A "Day N:" section of a workout plan, parsed once when the plan is saved
+    id = db.Column(db.Integer, primary_key=True)
+    workout_plan_id = db.Column(db.Integer, db.ForeignKey('workout_plan.id'), nullable=False)
+    day_label = db.Column(db.String(20), nullable=False)  # e.g. "Day 1"
+    name = db.Column(db.String(200))
+    focus = db.Column(db.String(30))
+    position = db.Column(db.Integer, nullable=False)
+    
+    # Relationships
+    exercises = db.relationship('WorkoutPlanExercise', backref='plan_day', lazy=True, cascade='all, delete-orphan',
+                                order_by='WorkoutPlanExercise.position')
+    
+    __table_args__ = (
+        db.Index('ix_workout_plan_day_plan_position', 'workout_plan_id', 'position'),
+    )
+
+class WorkoutPlanExercise(db.Model):
+    # One "• Exercise: Name - Sets x Reps @ Intensity | Rest" line of a plan day
+    id = db.Column(db.Integer, primary_key=True)
+    plan_day_id = db.Column(db.Integer, db.ForeignKey('workout_plan_day.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text, nullable=False)  # the line as written in the plan
+    name = db.Column(db.String(200))
+    sets = db.Column(db.Integer)
+    reps = db.Column(db.String(50))
+    intensity = db.Column(db.String(100))
+    rest = db.Column(db.String(50))
+    
+    __table_args__ = (
+        db.Index('ix_workout_plan_exercise_day', 'plan_day_id', 'position'),
+    )
 
 class WorkoutSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -104,43 +552,720 @@ class WorkoutSession(db.Model):
     
     # Relationships
     exercises = db.relationship('WorkoutExercise', backref='workout_session', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_workout_session_user_date', 'user_id', 'date'),
+        db.Index('ix_workout_session_plan', 'workout_plan_id'),
+    )
 
 class WorkoutExercise(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     workout_session_id = db.Column(db.Integer, db.ForeignKey('workout_session.id'), nullable=False)
     exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), nullable=False)
     sets = db.Column(db.Integer)
-    reps = db.Column(db.Text)  # JSON string for reps per set
-    weight = db.Column(db.Text)  # JSON string for weight per set
+    reps = db.Column(db.Text)  # legacy JSON list, migrated to workout_exercise_set
+    weight = db.Column(db.Text)  # legacy JSON list, migrated to workout_exercise_set
     rest_time = db.Column(db.Integer)  # seconds
     completed = db.Column(db.Boolean, default=False)
     
     # Relationships
     exercise = db.relationship('Exercise', backref='workout_exercises')
+    set_rows = db.relationship('WorkoutExerciseSet', lazy=True, cascade='all, delete-orphan',
+                               order_by='WorkoutExerciseSet.set_number')
+    
+    __table_args__ = (
+        db.Index('ix_workout_exercise_session', 'workout_session_id'),
+    )
+
+class WorkoutExerciseSet(db.Model):
+    workout_exercise_id = db.Column(db.Integer, db.ForeignKey('workout_exercise.id'), primary_key=True)
+    set_number = db.Column(db.Integer, primary_key=True)  # 1-based
+    reps = db.Column(db.Integer, nullable=False)
+    weight = db.Column(db.Float)  # lbs; NULL for bodyweight sets
+
+class UserDataVersion(db.Model):
+    # Bumped in the same transaction as every write to a user's data; read endpoints derive
+    # their ETags from it, so If-None-Match is answered without reading the data tables
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class UserStatistics(db.Model):
+    # Incrementally maintained rollup behind /api/statistics (the weight series is read from
+    # progress through ix_progress_user_date, so weigh-ins never rewrite the rollup)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_workouts = db.Column(db.Integer, nullable=False, default=0)  # completed sessions
+    total_minutes = db.Column(db.Integer, nullable=False, default=0)
+    monthly_workouts = db.Column(db.Text, nullable=False, default='{}')  # JSON string of YYYY-MM -> count
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ExerciseDailyStats(db.Model):
+    # Per-exercise training totals for each day, derived from WorkoutExercise set data
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    sets = db.Column(db.Integer, nullable=False, default=0)
+    reps = db.Column(db.Integer, nullable=False, default=0)
+    tonnage = db.Column(db.Float, nullable=False, default=0.0)  # sum of weight x reps
+    best_weight = db.Column(db.Float)
+    best_e1rm = db.Column(db.Float)  # best estimated one-rep max of the day
+
+class LLMCacheEntry(db.Model):
+    # Cached LLM responses keyed by a hash of the normalized prompt context
+    key = db.Column(db.String(64), primary_key=True)  # sha256 hex digest
+    kind = db.Column(db.String(20), nullable=False)  # workout_plan, chatbot
+    response = db.Column(db.Text, nullable=False)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_llm_cache_entry_last_used', 'last_used_at'),
+    )
+
+class GenerationJob(db.Model):
+    # Queued workout plan generation requests, processed by the background worker pool
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    payload = db.Column(db.Text)  # JSON string of the original request body
+    plan_id = db.Column(db.Integer)  # WorkoutPlan created on success
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_generation_job_status_created', 'status', 'created_at'),
+    )
+
+class ChatConversation(db.Model):
+    # A user's conversation with the chatbot; turns that no longer fit the prompt budget are
+    # folded into summary, which covers every message up to summarized_through
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(100))  # the opening question, shortened
+    summary = db.Column(db.Text)
+    summarized_through = db.Column(db.Integer, nullable=False, default=0)  # ChatMessage id
+    prompt_tokens = db.Column(db.Integer, nullable=False, default=0)  # API-reported, summaries included
+    completion_tokens = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_chat_conversation_user_created', 'user_id', 'created_at'),
+    )
+
+class ChatMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('chat_conversation.id'), nullable=False)
+    role = db.Column(db.String(10), nullable=False)  # user, assistant
+    content = db.Column(db.Text, nullable=False)
+    # Assistant replies only: API-reported tokens of the request (NULL when served from the cache)
+    # and the estimated prompt size it was budgeted to
+    prompt_tokens = db.Column(db.Integer)
+    completion_tokens = db.Column(db.Integer)
+    context_tokens = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_chat_message_conversation', 'conversation_id', 'id'),
+    )
+
+# LLM response cache
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters for a cache"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def record(self, field, count=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + count)
+    
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+llm_cache_stats = CacheStats()
+
+def approximate_size(value):
+    """Rough deep size in bytes of nested dict/list/tuple/str values"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(v) for v in value)
+    return size
+
+class LRUCache:
+    """Thread-safe in-process LRU cache bounded by the approximate size of its values"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.record('misses')
+                return None
+            self._entries.move_to_end(key)
+        self.stats.record('hits')
+        return entry[0]
+    
+    def put(self, key, value):
+        size = approximate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats.record('evictions')
+    
+    def invalidate(self, predicate):
+        """Drop every entry whose key matches predicate; returns how many were removed"""
+        with self._lock:
+            stale_keys = [key for key in self._entries if predicate(key)]
+            for key in stale_keys:
+                self._bytes -= self._entries.pop(key)[1]
+        return len(stale_keys)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def as_dict(self):
+        return {
+            **self.stats.as_dict(),
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes
+        }
+
+def normalize_prompt_value(value):
+    """Canonical form of a prompt input: case/whitespace-folded strings, sorted lists, integral floats as ints"""
+    if isinstance(value, str):
+        return ' '.join(value.lower().split())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: normalize_prompt_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [normalize_prompt_value(v) for v in value]
+        # Sets of options (e.g. equipment) are order-insensitive; message lists are not
+        return items if any(isinstance(v, dict) for v in items) else sorted(items, key=str)
+    return value
+
+def llm_cache_key(kind, context, completion_params):
+    """Content address for an LLM request: its normalized context plus the sampling parameters"""
+    material = json.dumps({
+        'kind': kind,
+        'model': completion_params['model'],
+        'max_tokens': completion_params.get('max_tokens'),
+        'temperature': completion_params.get('temperature'),
+        'context': normalize_prompt_value(context)
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+# Hits are counted in memory and written with the next store, so a lookup never writes
+_llm_cache_touches = {}  # key -> [hits, last used]
+_llm_cache_touches_lock = threading.Lock()
+
+def llm_cache_lookup(key):
+    """Cached response text for a key, or None on a miss or expired entry (read-only; expired
+    entries are removed by the next store)"""
+    now = datetime.utcnow()
+    response, created_at = db.session.query(LLMCacheEntry.response, LLMCacheEntry.created_at).filter_by(
+        key=key
+    ).first() or (None, None)
+    if response is None or created_at < now - timedelta(seconds=current_app.config['LLM_CACHE_TTL']):
+        llm_cache_stats.record('misses')
+        return None
+    
+    with _llm_cache_touches_lock:
+        touch = _llm_cache_touches.setdefault(key, [0, now])
+        touch[0] += 1
+        touch[1] = max(touch[1], now)
+    llm_cache_stats.record('hits')
+    return response
+
+def flush_llm_cache_touches():
+    """Add the buffered hit counts and last-used times to their entries, in the caller's transaction"""
+    global _llm_cache_touches
+    with _llm_cache_touches_lock:
+        touches, _llm_cache_touches = _llm_cache_touches, {}
+    if touches:
+        table = LLMCacheEntry.__table__
+        db.session.execute(
+            table.update().where(table.c.key == db.bindparam('touched_key')).values(
+                hits=table.c.hits + db.bindparam('touched_hits'), last_used_at=db.bindparam('touched_at')
+            ),
+            [{'touched_key': key, 'touched_hits': hits, 'touched_at': last_used}
+             for key, (hits, last_used) in touches.items()]
+        )
+
+def llm_cache_store(kind, key, response_text):
+    """Save a response and trim the cache to its TTL and size bound (least recently used first)"""
+    now = datetime.utcnow()
+    # An upsert, since two requests that missed on the same key can both get here
+    entry = dict(kind=kind, response=response_text, hits=0, created_at=now, last_used_at=now)
+    db.session.execute(sqlite_insert(LLMCacheEntry).values(key=key, **entry).on_conflict_do_update(
+        index_elements=[LLMCacheEntry.key], set_=entry
+    ))
+    flush_llm_cache_touches()  # so the least recently used entries are trimmed below
+    db.session.flush()
+    
+    expired = LLMCacheEntry.query.filter(
+        LLMCacheEntry.created_at < now - timedelta(seconds=current_app.config['LLM_CACHE_TTL'])
+    ).delete(synchronize_session=False)
+    
+    overflow = LLMCacheEntry.query.count() - current_app.config['LLM_CACHE_MAX_ENTRIES']
+    if overflow > 0:
+        oldest = db.session.query(LLMCacheEntry.key).order_by(LLMCacheEntry.last_used_at).limit(overflow)
+        LLMCacheEntry.query.filter(LLMCacheEntry.key.in_(oldest.scalar_subquery())).delete(synchronize_session=False)
+    
+    db.session.commit()
+    llm_cache_stats.record('evictions', expired + max(overflow, 0))
+
+def cached_chat_completion(kind, context, completion_params, use_cache=True, usage=None):
+    """Run a chat completion, serving repeats of an equivalent context from the cache; returns (text, cached).
+    Token usage of an uncached call is added to the usage dict, if given"""
+    use_cache = use_cache and current_app.config['LLM_CACHE_ENABLED']
+    key = llm_cache_key(kind, context, completion_params)
+    if use_cache:
+        cached = llm_cache_lookup(key)
+        if cached is not None:
+            return cached, True
+    
+    response = create_chat_completion(kind, completion_params, usage)
+    response_text = response.choices[0].message.content
+    
+    if use_cache:
+        llm_cache_store(kind, key, response_text)
+    return response_text, False
+
+def stream_cached_chat_completion(kind, context, completion_params, use_cache=True, usage=None):
+    """Streaming counterpart of cached_chat_completion; a hit is yielded as a single delta"""
+    use_cache = use_cache and current_app.config['LLM_CACHE_ENABLED']
+    key = llm_cache_key(kind, context, completion_params)
+    if use_cache:
+        cached = llm_cache_lookup(key)
+        if cached is not None:
+            yield cached
+            return
+    
+    chunks = []
+    for delta in stream_chat_completion(kind, completion_params, usage):
+        chunks.append(delta)
+        yield delta
+    
+    if use_cache:
+        llm_cache_store(kind, key, ''.join(chunks))
+
+def create_chat_completion(kind, completion_params, usage=None):
+    """Chat completion call, recording its latency, outcome and token usage"""
+    model = completion_params['model']
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = get_llm_gateway().chat_completion(completion_params, current_app.config['LLM_DEADLINES'].get(kind))
+        outcome = 'ok'
+    except LLMUnavailable:
+        outcome = 'unavailable'
+        raise
+    finally:
+        llm_request_duration.observe(time.perf_counter() - started, kind, model, 'false')
+        llm_requests.inc(1, kind, model, outcome)
+    record_llm_usage(kind, model, response.usage, usage)
+    return response
+
+# Streaming helpers for OpenAI responses
+def stream_chat_completion(kind, completion_params, usage=None):
+    """Yield content deltas from a streamed chat completion as they arrive"""
+    model = completion_params['model']
+    started = time.perf_counter()
+    first_token = True
+    outcome = 'error'
+    try:
+        # include_usage adds a final chunk, without choices, carrying the token counts
+        stream = get_llm_gateway().stream_chat_completion(
+            dict(completion_params, stream_options={'include_usage': True}),
+            current_app.config['LLM_DEADLINES'].get(kind)
+        )
+        for chunk in stream:
+            record_llm_usage(kind, model, getattr(chunk, 'usage', None), usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token:
+                    llm_first_token_duration.observe(time.perf_counter() - started, kind, model)
+                    first_token = False
+                yield chunk.choices[0].delta.content
+        outcome = 'ok'
+    except GeneratorExit:
+        outcome = 'cancelled'  # the client went away mid-stream
+        raise
+    except LLMUnavailable:
+        outcome = 'unavailable'
+        raise
+    finally:
+        llm_request_duration.observe(time.perf_counter() - started, kind, model, 'true')
+        llm_requests.inc(1, kind, model, outcome)
+
+def sse_event(data, event=None):
+    """Format a JSON payload as a server-sent event"""
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+def event_stream_response(events):
+    """Wrap an event generator in an unbuffered text/event-stream response"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def llm_unavailable_response(message, error):
+    """503 for a call the LLM gateway refused or gave up on, with its Retry-After hint"""
+    response = jsonify({'error': message})
+    if error.retry_after is not None:
+        response.headers['Retry-After'] = str(max(1, round(error.retry_after)))
+    return response, 503
 
 # Helper function to calculate BMI (Imperial units)
 def calculate_bmi(weight_lbs, height_inches):
     # BMI = (weight in lbs / height in inches²) × 703
     return round((weight_lbs / (height_inches ** 2)) * 703, 2)
 
+def get_latest_progress(user_id):
+    """Most recent progress entry for a user, or None"""
+    return Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc()).first()
+
+# Statistics rollup helpers
+def compute_user_statistics(user_id):
+    """Build a fresh statistics rollup for a user from their full history"""
+    with db.session.no_autoflush:
+        sessions = db.session.query(WorkoutSession.date, WorkoutSession.duration_minutes).filter_by(
+            user_id=user_id, completed=True
+        ).all()
+    
+    monthly_workouts = defaultdict(int)
+    for session_date, _ in sessions:
+        monthly_workouts[session_date.strftime('%Y-%m')] += 1
+    
+    return UserStatistics(
+        user_id=user_id,
+        total_workouts=len(sessions),
+        total_minutes=sum(minutes for _, minutes in sessions if minutes),
+        monthly_workouts=json.dumps(dict(monthly_workouts), sort_keys=True)
+    )
+
+def load_user_statistics(user_id):
+    """Fetch the user's statistics rollup for updating, backfilling it from history if missing"""
+    # Take the write lock before reading, so concurrent writers update the rollup one after another
+    # rather than each saving a copy of the same stale row
+    db.session.execute(
+        update(UserStatistics).where(UserStatistics.user_id == user_id).values(user_id=UserStatistics.user_id),
+        execution_options={'synchronize_session': False}
+    )
+    stats = db.session.get(UserStatistics, user_id, populate_existing=True)
+    if stats is None:
+        stats = compute_user_statistics(user_id)
+        db.session.add(stats)
+    return stats
+
+def rebuild_user_statistics(user_id):
+    """Replace the user's statistics rollup with one computed from their history"""
+    fresh = compute_user_statistics(user_id)
+    return db.session.merge(fresh)
+
+def apply_session_to_statistics(stats, workout_session, delta=1):
+    """Add (delta=1) or remove (delta=-1) a workout session from a statistics rollup"""
+    if not workout_session.completed:
+        return
+    
+    stats.total_workouts += delta
+    stats.total_minutes += delta * (workout_session.duration_minutes or 0)
+    
+    monthly_workouts = json.loads(stats.monthly_workouts)
+    month_key = workout_session.date.strftime('%Y-%m')
+    monthly_workouts[month_key] = monthly_workouts.get(month_key, 0) + delta
+    if monthly_workouts[month_key] <= 0:
+        del monthly_workouts[month_key]
+    stats.monthly_workouts = json.dumps(monthly_workouts, sort_keys=True)
+
+def weight_series(user_id):
+    """The user's weigh-ins as (date, weight) in date order, an index range scan on ix_progress_user_date"""
+    rows = db.session.query(Progress.date, Progress.weight).filter(
+        Progress.user_id == user_id, Progress.weight.isnot(None)
+    ).order_by(Progress.date, Progress.id)
+    return [(d, w) for d, w in rows if w]
+
+def statistics_mismatches(user_id):
+    """Compare a user's stored rollup with their history, returning the fields that differ"""
+    stored = db.session.get(UserStatistics, user_id)
+    if stored is None:
+        return ['missing']
+    
+    fresh = compute_user_statistics(user_id)
+    mismatches = []
+    for field in ('total_workouts', 'total_minutes'):
+        if getattr(stored, field) != getattr(fresh, field):
+            mismatches.append(field)
+    if json.loads(stored.monthly_workouts) != json.loads(fresh.monthly_workouts):
+        mismatches.append('monthly_workouts')
+    return mismatches
+
+# Per-user data versions for conditional GET
+def bump_data_version(user_id):
+    """Mark the user's data as changed; call inside the transaction making the change"""
+    bumped = db.session.execute(
+        update(UserDataVersion).where(UserDataVersion.user_id == user_id).values(version=UserDataVersion.version + 1),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if not bumped:
+        db.session.add(UserDataVersion(user_id=user_id, version=1))
+
+def data_version_etag(user_id):
+    """Strong ETag for the current request's URL at the user's current data version"""
+    version = db.session.query(UserDataVersion.version).filter_by(user_id=user_id).scalar() or 0
+    material = f'{current_app.config["ETAG_SALT"]}:{user_id}:{version}:{request.full_path}'
+    return hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+
+def conditional_on_data_version(view):
+    """Tag GET responses with the user's data-version ETag and answer a matching If-None-Match
+    with 304 before the view runs (the version is read first, so a tag never runs ahead of its data)"""
+    @functools.wraps(view)
+    def conditional_view(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        
+        etag = data_version_etag(session.get('user_id', 1))
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'  # always revalidate
+        return response
+    return conditional_view
+
+# Exercise volume and strength helpers
+E1RM_MAX_REPS = 12  # rep estimates get unreliable beyond this
+
+def estimated_one_rep_max(weight, reps):
+    """Epley estimate of a one-rep max, or None when the set can't support one"""
+    if not weight or weight <= 0 or not reps or reps < 1 or reps > E1RM_MAX_REPS:
+        return None
+    return weight if reps == 1 else weight * (1 + reps / 30)
+
+def set_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def load_json_list(value):
+    if not value:
+        return []
+    try:
+        values = json.loads(value)
+    except ValueError:
+        return []
+    return values if isinstance(values, list) else [values]
+
+MAX_SETS = 50  # per exercise in a logged session
+
+def check_sets(sets, reps, weights):
+    """Raise ValueError unless sets and the per-set reps/weight lists describe at most MAX_SETS sets"""
+    if sets is not None and (isinstance(sets, bool) or not isinstance(sets, int) or not 1 <= sets <= MAX_SETS):
+        raise ValueError(f'sets must be an integer between 1 and {MAX_SETS}')
+    for field, values in (('reps', reps), ('weight', weights)):
+        if values and len(values) > MAX_SETS:
+            raise ValueError(f'{field} can list at most {MAX_SETS} sets')
+
+def expand_sets(sets, reps, weights):
+    """(reps, weight) per set from per-set lists; a single value applies to every set"""
+    reps, weights = list(reps or []), list(weights or [])
+    # New rows pass check_sets first; the cap also bounds legacy rows migrated from the JSON columns
+    count = min(max(len(reps), len(weights), sets or 0), MAX_SETS)
+    if len(reps) == 1:
+        reps = reps * count
+    if len(weights) == 1:
+        weights = weights * count
+    
+    pairs = []
+    for i in range(count):
+        set_reps = set_number(reps[i]) if i < len(reps) else None
+        if set_reps and set_reps >= 1:
+            pairs.append((int(set_reps), set_number(weights[i]) if i < len(weights) else None))
+    return pairs
+
+def workout_exercise_set_rows(sets, reps, weights):
+    return [WorkoutExerciseSet(set_number=number, reps=set_reps, weight=weight)
+            for number, (set_reps, weight) in enumerate(expand_sets(sets, reps, weights), 1)]
+
+def exercise_stats_select():
+    """Per (user, exercise, date) totals of logged sets in completed sessions, aggregated in SQL"""
+    reps, weight = WorkoutExerciseSet.reps, WorkoutExerciseSet.weight
+    lifted = weight > 0
+    # Epley estimate, only for sets with a weight and at most E1RM_MAX_REPS reps
+    e1rm = case(
+        (and_(lifted, reps == 1), weight),
+        (and_(lifted, reps <= E1RM_MAX_REPS), weight * (1 + reps / 30.0))
+    )
+    return select(
+        WorkoutSession.user_id,
+        WorkoutExercise.exercise_id,
+        WorkoutSession.date,
+        db.func.count(),
+        db.func.sum(reps),
+        db.func.coalesce(db.func.sum(case((lifted, weight * reps), else_=0.0)), 0.0),
+        db.func.max(case((lifted, weight))),
+        db.func.round(db.func.max(e1rm), 2)
+    ).select_from(WorkoutExerciseSet).join(
+        WorkoutExercise, WorkoutExerciseSet.workout_exercise_id == WorkoutExercise.id
+    ).join(
+        WorkoutSession, WorkoutExercise.workout_session_id == WorkoutSession.id
+    ).where(WorkoutSession.completed.is_(True)).group_by(
+        WorkoutSession.user_id, WorkoutExercise.exercise_id, WorkoutSession.date
+    )
+
+EXERCISE_STATS_COLUMNS = ['user_id', 'exercise_id', 'date', 'sets', 'reps', 'tonnage', 'best_weight', 'best_e1rm']
+
+def session_exercise_keys(session_ids):
+    """(exercise_id, date) pairs touched by the given sessions"""
+    if not session_ids:
+        return set()
+    return set(db.session.query(WorkoutExercise.exercise_id, WorkoutSession.date).join(
+        WorkoutSession, WorkoutExercise.workout_session_id == WorkoutSession.id
+    ).filter(WorkoutSession.id.in_(session_ids)).distinct())
+
+def refresh_exercise_stats(user_id, keys):
+    """Recompute the stored per-day rows for (exercise_id, date) keys after sessions change"""
+    if not keys:
+        return
+    exercise_ids = {exercise_id for exercise_id, _ in keys}
+    dates = {day for _, day in keys}
+    db.session.flush()
+    
+    # Rebuild every (exercise, date) combination of the keys; the extra pairs are recomputed unchanged
+    ExerciseDailyStats.query.filter(
+        ExerciseDailyStats.user_id == user_id,
+        ExerciseDailyStats.exercise_id.in_(exercise_ids),
+        ExerciseDailyStats.date.in_(dates)
+    ).delete(synchronize_session=False)
+    db.session.execute(insert(ExerciseDailyStats).from_select(EXERCISE_STATS_COLUMNS, exercise_stats_select().where(
+        WorkoutSession.user_id == user_id,
+        WorkoutExercise.exercise_id.in_(exercise_ids),
+        WorkoutSession.date.in_(dates)
+    )))
+
+def rebuild_exercise_stats(user_id=None):
+    """Recompute per-exercise stats from all logged sets with one INSERT ... SELECT"""
+    stale = ExerciseDailyStats.query
+    fresh = exercise_stats_select()
+    if user_id is not None:
+        stale = stale.filter(ExerciseDailyStats.user_id == user_id)
+        fresh = fresh.where(WorkoutSession.user_id == user_id)
+    stale.delete(synchronize_session=False)
+    return db.session.execute(insert(ExerciseDailyStats).from_select(EXERCISE_STATS_COLUMNS, fresh)).rowcount
+
+def delete_session_exercises(session_ids):
+    """Bulk-delete the exercises of the given sessions along with their sets"""
+    exercise_ids = select(WorkoutExercise.id).where(WorkoutExercise.workout_session_id.in_(session_ids))
+    WorkoutExerciseSet.query.filter(WorkoutExerciseSet.workout_exercise_id.in_(exercise_ids)).delete(
+        synchronize_session=False
+    )
+    WorkoutExercise.query.filter(WorkoutExercise.workout_session_id.in_(session_ids)).delete(
+        synchronize_session=False
+    )
+
+def delete_plan_structure(plan_ids):
+    """Bulk-delete the parsed day/exercise rows of the given plans"""
+    day_ids = select(WorkoutPlanDay.id).where(WorkoutPlanDay.workout_plan_id.in_(plan_ids))
+    WorkoutPlanExercise.query.filter(WorkoutPlanExercise.plan_day_id.in_(day_ids)).delete(synchronize_session=False)
+    WorkoutPlanDay.query.filter(WorkoutPlanDay.workout_plan_id.in_(plan_ids)).delete(synchronize_session=False)
+
+def equipment_key(value):
+    """Normalized equipment name shared by goals and exercises, e.g. 'Pull-up Bar' -> 'pull_up_bar'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(value).strip().lower()).strip('_')
+
+def muscle_group_rows(*names):
+    return [ExerciseMuscleGroup(muscle_group=name.strip().lower()) for name in names]
+
+def find_or_create_exercise(name):
+    exercise = Exercise.query.filter(db.func.lower(Exercise.name) == name.strip().lower()).first()
+    if exercise is None:
+        exercise = Exercise(name=name.strip()[:100])
+        db.session.add(exercise)
+    return exercise
+
+def add_session_exercises(session_obj, items):
+    """Attach WorkoutExercise rows from request data ({exercise_id | exercise, sets, reps, weight, ...})"""
+    if items is not None and not isinstance(items, list):
+        raise ValueError('exercises must be a list')
+    for item in items or []:
+        if not isinstance(item, dict):
+            raise ValueError('Each exercise must be an object')
+        reps, weights = history_sets(item, 'reps'), history_sets(item, 'weight')
+        check_sets(item.get('sets'), reps, weights)
+        if item.get('exercise_id'):
+            exercise = db.session.get(Exercise, item['exercise_id'])
+            if exercise is None:
+                raise ValueError(f"Unknown exercise_id {item['exercise_id']}")
+        elif item.get('exercise'):
+            exercise = find_or_create_exercise(str(item['exercise']))
+        else:
+            raise ValueError('Each exercise needs an exercise_id or exercise name')
+        
+        session_obj.exercises.append(WorkoutExercise(
+            exercise=exercise,
+            sets=item.get('sets'),
+            set_rows=workout_exercise_set_rows(item.get('sets'), reps, weights),
+            rest_time=item.get('rest_time'),
+            completed=item.get('completed', session_obj.completed)
+        ))
+
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
     return render_template('dashboard.html')
 
-@app.route('/workout-plan')
+@bp.route('/workout-plan')
 def workout_plan():
     return render_template('workout_plan.html')
 
-@app.route('/progress')
+@bp.route('/progress')
 def progress():
     return render_template('progress.html')
 
-@app.route('/api/user', methods=['GET', 'POST'])
+@bp.route('/api/user', methods=['GET', 'POST'])
+@conditional_on_data_version
 def user_api():
     if request.method == 'POST':
         data = request.json
@@ -163,6 +1288,7 @@ def user_api():
                 date=datetime.now().date()
             )
             db.session.add(initial_progress)
+            bump_data_version(user.id)
             db.session.commit()
         
         return jsonify({'message': 'User created successfully', 'user_id': user.id})
@@ -181,7 +1307,7 @@ def user_api():
         })
     return jsonify({'error': 'User not found'}), 404
 
-@app.route('/api/user/update', methods=['PUT'])
+@bp.route('/api/user/update', methods=['PUT'])
 def update_user():
     user_id = session.get('user_id', 1)
     user = db.session.get(User, user_id)
@@ -215,10 +1341,84 @@ def update_user():
             )
             db.session.add(new_progress)
     
+    bump_data_version(user_id)
     db.session.commit()
     return jsonify({'message': 'Profile updated successfully'})
 
-@app.route('/api/progress', methods=['GET', 'POST'])
+# List endpoint pagination
+def encode_cursor(sort_value, row_id):
+    """Opaque keyset cursor pointing just past (sort_value, row_id)"""
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, parse_value):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        return parse_value(value), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def parse_date_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+def parse_page_args(args, serializers):
+    """Validate ?limit=, ?cursor=, ?since=, ?until= and ?fields= for a list endpoint"""
+    max_limit = current_app.config['API_PAGE_MAX_LIMIT']
+    limit = args.get('limit')
+    if limit is None:
+        limit = min(current_app.config['API_PAGE_DEFAULT_LIMIT'], max_limit)
+    elif not limit.isdigit() or not 1 <= int(limit) <= max_limit:
+        raise ValueError(f'limit must be an integer between 1 and {max_limit}')
+    else:
+        limit = int(limit)
+    
+    fields = list(serializers)
+    if args.get('fields'):
+        requested = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in requested if f not in serializers]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        fields = ['id'] + [f for f in requested if f != 'id']
+    
+    return {
+        'limit': limit,
+        'cursor': args.get('cursor'),
+        'since': parse_date_arg(args, 'since'),
+        'until': parse_date_arg(args, 'until'),
+        'fields': fields
+    }
+
+def keyset_page(query, sort_column, id_column, page, parse_value):
+    """Rows newest first, resuming after page['cursor']; returns (rows, next_cursor)"""
+    if page['cursor']:
+        value, row_id = decode_cursor(page['cursor'], parse_value)
+        query = query.filter(or_(sort_column < value, and_(sort_column == value, id_column < row_id)))
+    query = query.order_by(sort_column.desc(), id_column.desc())
+    
+    rows = query.limit(page['limit'] + 1).all()
+    if len(rows) <= page['limit']:
+        return rows, None
+    rows = rows[:page['limit']]
+    return rows, encode_cursor(getattr(rows[-1], sort_column.key), rows[-1].id)
+
+def project(rows, fields, serializers):
+    return [{field: serializers[field](row) for field in fields} for row in rows]
+
+def paged_response(payload, next_cursor):
+    response = jsonify(payload)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@bp.route('/api/progress', methods=['GET', 'POST'])
+@conditional_on_data_version
 def progress_api():
     user_id = session.get('user_id', 1)
     
@@ -238,49 +1438,100 @@ def progress_api():
             notes=data.get('notes')
         )
         db.session.add(progress)
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({'message': 'Progress recorded successfully'})
     
     # GET request
-    progress_entries = Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc()).all()
-    return jsonify([{
-        'id': p.id,
-        'date': p.date.isoformat(),
-        'weight': p.weight,
-        'body_fat_percentage': p.body_fat_percentage,
-        'muscle_mass': p.muscle_mass,
-        'chest': p.chest,
-        'waist': p.waist,
-        'hips': p.hips,
-        'arms': p.arms,
-        'thighs': p.thighs,
-        'notes': p.notes
-    } for p in progress_entries])
-
-@app.route('/api/goals', methods=['GET', 'POST'])
+    try:
+        page = parse_page_args(request.args, PROGRESS_FIELDS)
+        payload, next_cursor = build_progress_page(user_id, page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response(payload, next_cursor)
+
+PROGRESS_FIELDS = {
+    'id': lambda p: p.id,
+    'date': lambda p: p.date.isoformat(),
+    'weight': lambda p: p.weight,
+    'body_fat_percentage': lambda p: p.body_fat_percentage,
+    'muscle_mass': lambda p: p.muscle_mass,
+    'chest': lambda p: p.chest,
+    'waist': lambda p: p.waist,
+    'hips': lambda p: p.hips,
+    'arms': lambda p: p.arms,
+    'thighs': lambda p: p.thighs,
+    'notes': lambda p: p.notes
+}
+
+def build_progress_page(user_id, page, *criteria):
+    """One page of a user's progress entries matching criteria, newest first"""
+    query = Progress.query.filter(Progress.user_id == user_id, *criteria).options(
+        load_only(*[getattr(Progress, f) for f in page['fields']], Progress.date)
+    )
+    if page['since']:
+        query = query.filter(Progress.date >= page['since'])
+    if page['until']:
+        query = query.filter(Progress.date <= page['until'])
+    
+    rows, next_cursor = keyset_page(
+        query, Progress.date, Progress.id, page,
+        lambda value: datetime.strptime(value, '%Y-%m-%d').date()
+    )
+    return project(rows, page['fields'], PROGRESS_FIELDS), next_cursor
+
+# The dashboard only charts body measurements, over the most recent entries that have them
+DASHBOARD_PROGRESS_ARGS = {'limit': '30', 'fields': 'date,chest,waist,arms'}
+
+def build_progress_payload(user_id):
+    """The user's latest measured progress entries, newest first, with just the columns the dashboard charts"""
+    return build_progress_page(
+        user_id, parse_page_args(DASHBOARD_PROGRESS_ARGS, PROGRESS_FIELDS),
+        or_(Progress.chest.isnot(None), Progress.waist.isnot(None), Progress.arms.isnot(None))
+    )[0]
+
+@bp.route('/api/goals', methods=['GET', 'POST'])
+@conditional_on_data_version
 def goals_api():
     user_id = session.get('user_id', 1)
     
     if request.method == 'POST':
         data = request.json
+        try:
+            workout_frequency = plan_schedule_value(data.get('workout_frequency'), 'workout_frequency',
+                                                    PLAN_FREQUENCY_RANGE)
+            workout_duration = plan_schedule_value(data.get('workout_duration'), 'workout_duration',
+                                                   PLAN_DURATION_RANGE)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         goal = Goal(
             user_id=user_id,
             goal_type=data['goal_type'],
             target_weight=data.get('target_weight'),
             target_body_fat=data.get('target_body_fat'),
             target_date=datetime.strptime(data['target_date'], '%Y-%m-%d').date() if 'target_date' in data else None,
-            workout_frequency=data.get('workout_frequency', 3),
-            workout_duration=data.get('workout_duration', 60),
-            preferred_exercises=json.dumps(data.get('preferred_exercises', [])),
-            equipment_available=json.dumps(data.get('equipment_available', []))
+            workout_frequency=workout_frequency,
+            workout_duration=workout_duration,
+            preferred_exercise_items=[GoalPreferredExercise(position=i, name=str(name)[:100])
+                                      for i, name in enumerate(data.get('preferred_exercises', []))],
+            equipment_items=[GoalEquipment(position=i, equipment=equipment_key(equipment))
+                             for i, equipment in enumerate(data.get('equipment_available', []))]
         )
         db.session.add(goal)
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({'message': 'Goal created successfully', 'goal_id': goal.id})
     
     # GET request
-    goals = Goal.query.filter_by(user_id=user_id, is_active=True).all()
-    return jsonify([{
+    return jsonify(build_goals_payload(user_id))
+
+def build_goals_payload(user_id):
+    """Active goals for a user"""
+    goals = Goal.query.filter_by(user_id=user_id, is_active=True).options(
+        selectinload(Goal.preferred_exercise_items), selectinload(Goal.equipment_items)
+    ).all()
+    return [{
         'id': g.id,
         'goal_type': g.goal_type,
         'target_weight': g.target_weight,
@@ -288,36 +1539,320 @@ def goals_api():
         'target_date': g.target_date.isoformat() if g.target_date else None,
         'workout_frequency': g.workout_frequency,
         'workout_duration': g.workout_duration,
-        'preferred_exercises': json.loads(g.preferred_exercises),
-        'equipment_available': json.loads(g.equipment_available),
+        'preferred_exercises': g.preferred_exercise_names,
+        'equipment_available': g.equipment_names,
         'created_at': g.created_at.isoformat()
-    } for g in goals])
+    } for g in goals]
 
-@app.route('/api/generate-workout-plan', methods=['POST'])
-def generate_workout_plan():
+@bp.route('/api/exercises')
+def exercises_api():
+    """Exercise catalog filtered by category, difficulty, equipment and muscle group, optionally full-text searched"""
     user_id = session.get('user_id', 1)
-    data = request.json
+    args = request.args
+    limit = args.get('limit', 100, type=int)
+    offset = args.get('offset', 0, type=int)
+    if not 1 <= limit <= current_app.config['API_PAGE_MAX_LIMIT']:
+        return jsonify({'error': f"limit must be an integer between 1 and {current_app.config['API_PAGE_MAX_LIMIT']}"}), 400
+    if offset < 0:
+        return jsonify({'error': 'offset must be a non-negative integer'}), 400
     
-    # Get user info and goals
-    user = db.session.get(User, user_id)
-    latest_progress = Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc()).first()
-    active_goal = Goal.query.filter_by(user_id=user_id, is_active=True).first()
+    try:
+        query, score = exercise_filter_query(args, user_id, rank_window=offset + limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Prepare context for OpenAI
-    training_frequency = active_goal.workout_frequency if active_goal else data.get('frequency', 3)
-    context = f"""
+    order_by = (score, Exercise.id) if score is not None else (db.func.lower(Exercise.name),)
+    exercises = query.options(selectinload(Exercise.muscle_group_items)).order_by(*order_by).offset(offset).limit(limit).all()
+    return jsonify([exercise_payload(e) for e in exercises])
+
+@bp.route('/api/exercises/facets')
+def exercise_facets_api():
+    """Counts per category, equipment, difficulty and muscle group for the exercises matching the given filters"""
+    user_id = session.get('user_id', 1)
+    try:
+        query, score = exercise_filter_query(request.args, user_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(exercise_facet_counts(query, filtered=query.whereclause is not None or score is not None))
+
+@bp.route('/api/exercises/autocomplete')
+def exercise_autocomplete_api():
+    """Exercise names starting with (or containing a word starting with) the typed prefix"""
+    prefix = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    if not 1 <= limit <= 50:
+        return jsonify({'error': 'limit must be an integer between 1 and 50'}), 400
+    return jsonify([{'id': exercise_id, 'name': name} for exercise_id, name in autocomplete_exercises(prefix, limit)])
+
+def exercise_filter_query(args, user_id, rank_window=None):
+    """Exercise query for the catalog filters in args, plus a relevance column to order by when q is given"""
+    query = Exercise.query
+    if args.get('category'):
+        query = query.filter(Exercise.category == args['category'].lower())
+    if args.get('difficulty'):
+        query = query.filter(Exercise.difficulty_level == args['difficulty'].lower())
+    if args.get('equipment'):
+        query = query.filter(Exercise.equipment_needed.in_([equipment_key(e) for e in args['equipment'].split(',')]))
+    if args.get('muscle_group'):
+        muscle_groups = [m.strip().lower() for m in args['muscle_group'].split(',')]
+        query = query.filter(Exercise.id.in_(
+            select(ExerciseMuscleGroup.exercise_id).where(ExerciseMuscleGroup.muscle_group.in_(muscle_groups))
+        ))
+    if args.get('available_equipment') in ('1', 'true'):
+        # Bodyweight exercises plus whatever the active goal lists as available
+        active_goal = Goal.query.filter_by(user_id=user_id, is_active=True).first()
+        available = select(GoalEquipment.equipment).where(GoalEquipment.goal_id == (active_goal.id if active_goal else None))
+        query = query.filter(or_(Exercise.equipment_needed == 'bodyweight', Exercise.equipment_needed.in_(available)))
+    
+    if 'q' not in args:
+        return query, None
+    tokens = search_tokens(args['q'])
+    if not tokens:
+        raise ValueError('q must contain at least one letter or digit')
+    
+    if not exercise_search_available():
+        for token in tokens:
+            pattern = f'%{token}%'
+            query = query.filter(or_(Exercise.name.ilike(pattern), Exercise.instructions.ilike(pattern),
+                                     Exercise.tips.ilike(pattern)))
+        return query, db.func.length(Exercise.name)
+    
+    # Name matches weigh ten times as much as instructions/tips in the bm25 ranking
+    sql = 'SELECT rowid AS id, bm25(exercise_fts, 10.0, 1.0, 1.0) AS score FROM exercise_fts WHERE exercise_fts MATCH :match'
+    params = {'match': fts_prefix_query(tokens)}
+    if rank_window and query.whereclause is None:
+        # Nothing else narrows the hits, so only the top of the ranking needs joining to exercise
+        sql += ' ORDER BY score, rowid LIMIT :window'
+        params['window'] = rank_window
+    hits = db.text(sql).bindparams(**params).columns(id=db.Integer, score=db.Float).subquery('exercise_hits')
+    return query.join(hits, hits.c.id == Exercise.id), hits.c.score
+
+def exercise_facet_counts(query, filtered=True):
+    """Facet counts over the exercises a filter query matches"""
+    facet_columns = ('category', 'equipment_needed', 'difficulty_level')
+    counts = {facet: defaultdict(int) for facet in facet_columns + ('muscle_group',)}
+    
+    # One pass over the covering ix_exercise_facets index, split into the three facets here
+    combinations = query.with_entities(*[getattr(Exercise, c) for c in facet_columns], db.func.count()).group_by(
+        *[getattr(Exercise, c) for c in facet_columns]
+    ).order_by(None)
+    for *values, count in combinations:
+        for facet, value in zip(facet_columns, values):
+            if value is not None:
+                counts[facet][value] += count
+    
+    muscle_groups = db.session.query(ExerciseMuscleGroup.muscle_group, db.func.count()).group_by(
+        ExerciseMuscleGroup.muscle_group
+    )
+    if filtered:
+        matching = query.with_entities(Exercise.id).order_by(None).subquery()
+        muscle_groups = muscle_groups.filter(ExerciseMuscleGroup.exercise_id.in_(select(matching.c.id)))
+    for muscle_group, count in muscle_groups:
+        counts['muscle_group'][muscle_group] = count
+    
+    return {facet: [{'value': value, 'count': count}
+                    for value, count in sorted(values.items(), key=lambda item: (-item[1], item[0]))]
+            for facet, values in counts.items()}
+
+AUTOCOMPLETE_CANDIDATES = 200
+
+def autocomplete_exercises(prefix, limit):
+    """(id, name) pairs: names starting with prefix first (index range scan), then shortest word-prefix matches"""
+    key = ' '.join(prefix.lower().split())
+    if not key:
+        return []
+    lower_name = db.func.lower(Exercise.name)
+    upper_bound = key[:-1] + chr(ord(key[-1]) + 1)
+    results = db.session.query(Exercise.id, Exercise.name).filter(
+        lower_name >= key, lower_name < upper_bound
+    ).order_by(lower_name).limit(limit).all()
+    
+    tokens = search_tokens(key)
+    if len(results) >= limit or not tokens:
+        return results
+    seen = {exercise_id for exercise_id, _ in results}
+    if not exercise_search_available():
+        more = db.session.query(Exercise.id, Exercise.name).filter(
+            *[Exercise.name.ilike(f'%{token}%') for token in tokens]
+        ).order_by(db.func.length(Exercise.name), Exercise.name).limit(limit + len(seen))
+    else:
+        # Broad prefixes match thousands of names; ranking a bounded candidate set keeps the latency flat
+        more = db.session.execute(db.text(
+            'SELECT exercise.id, exercise.name FROM (SELECT rowid AS id FROM exercise_fts WHERE exercise_fts MATCH :match '
+            'LIMIT :candidates) AS hits JOIN exercise ON exercise.id = hits.id ORDER BY length(exercise.name), exercise.name '
+            'LIMIT :limit'
+        ), {'match': fts_prefix_query(tokens, column='name'), 'candidates': AUTOCOMPLETE_CANDIDATES,
+            'limit': limit + len(seen)})
+    return results + [row for row in more if row[0] not in seen][:limit - len(results)]
+
+def exercise_payload(exercise):
+    return {
+        'id': exercise.id,
+        'name': exercise.name,
+        'category': exercise.category,
+        'muscle_groups': exercise.muscle_group_names,
+        'equipment_needed': exercise.equipment_needed,
+        'difficulty_level': exercise.difficulty_level,
+        'instructions': exercise.instructions,
+        'tips': exercise.tips
+    }
+
+# Exercise catalog search index
+def search_tokens(text):
+    return re.findall(r'\w+', text.lower())
+
+def fts_prefix_query(tokens, column=None):
+    """FTS5 MATCH expression requiring every token as a word prefix, e.g. name : ("ben"* AND "pre"*)"""
+    terms = ' AND '.join(f'"{token}"*' for token in tokens)
+    return f'{column} : ({terms})' if column else terms
+
+EXERCISE_FTS_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS exercise_fts_insert AFTER INSERT ON exercise BEGIN
+        INSERT INTO exercise_fts(rowid, name, instructions, tips) VALUES (new.id, new.name, new.instructions, new.tips);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS exercise_fts_delete AFTER DELETE ON exercise BEGIN
+        INSERT INTO exercise_fts(exercise_fts, rowid, name, instructions, tips)
+        VALUES ('delete', old.id, old.name, old.instructions, old.tips);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS exercise_fts_update AFTER UPDATE OF name, instructions, tips ON exercise BEGIN
+        INSERT INTO exercise_fts(exercise_fts, rowid, name, instructions, tips)
+        VALUES ('delete', old.id, old.name, old.instructions, old.tips);
+        INSERT INTO exercise_fts(rowid, name, instructions, tips) VALUES (new.id, new.name, new.instructions, new.tips);
+    END""",
+)
+
+def create_exercise_search_index():
+    """Create the FTS5 index over exercise name/instructions/tips and its sync triggers; False if FTS5 is unavailable"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    try:
+        if not exercise_search_available():
+            # External-content table: the text lives in exercise, the index only stores terms (and 2/3-char prefixes)
+            db.session.execute(db.text(
+                "CREATE VIRTUAL TABLE exercise_fts USING fts5(name, instructions, tips, content='exercise', "
+                "content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            ))
+            db.session.execute(db.text("INSERT INTO exercise_fts(exercise_fts) VALUES ('rebuild')"))
+        for trigger in EXERCISE_FTS_TRIGGERS:
+            db.session.execute(db.text(trigger))
+        db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        current_app.logger.warning('Exercise search index unavailable, falling back to LIKE search: %s', e)
+        return False
+    return True
+
+def exercise_search_available():
+    return db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercise_fts'"
+    )).first() is not None if db.engine.dialect.name == 'sqlite' else False
+
+# Exercise catalog bulk loading
+def catalog_exercise_row(record):
+    """Validated exercise column values and muscle groups for one catalog record"""
+    if not isinstance(record, dict):
+        raise ValueError('record must be a JSON object')
+    name = ' '.join(str(record.get('name') or '').split())
+    if not name:
+        raise ValueError('name is required')
+    if len(name) > 100:
+        raise ValueError('name must be at most 100 characters')
+    
+    def text_value(field, max_length=None):
+        value = record.get(field)
+        if is_blank(value):
+            return None
+        value = str(value).strip()
+        return value[:max_length].lower() if max_length else value
+    
+    muscle_groups = record.get('muscle_groups')
+    if isinstance(muscle_groups, str):
+        muscle_groups = re.split(r'[,;|]', muscle_groups)
+    elif muscle_groups is None:
+        muscle_groups = []
+    elif not isinstance(muscle_groups, list):
+        raise ValueError('muscle_groups must be a list or a comma-separated string')
+    
+    equipment = record.get('equipment_needed')
+    return {
+        'name': name,
+        'category': text_value('category', 50),
+        'equipment_needed': None if is_blank(equipment) else equipment_key(equipment)[:100],
+        'difficulty_level': text_value('difficulty_level', 20),
+        'instructions': text_value('instructions'),
+        'tips': text_value('tips')
+    }, sorted({str(group).strip().lower()[:50] for group in muscle_groups if str(group).strip()})
+
+def load_exercise_catalog(records, batch_size=None, max_errors=100):
+    """Insert (line number, record) catalog entries in batches, skipping names already in the catalog"""
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    known = {name for (name,) in db.session.query(db.func.lower(Exercise.name))}
+    result = {'loaded': 0, 'skipped': 0, 'errors': [], 'error_count': 0}
+    batch = []
+    
+    def flush():
+        exercise_ids = db.session.scalars(
+            insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True), [row for row, _ in batch]
+        ).all()
+        group_rows = [{'exercise_id': exercise_id, 'muscle_group': group}
+                      for exercise_id, (_, groups) in zip(exercise_ids, batch) for group in groups]
+        if group_rows:
+            db.session.execute(insert(ExerciseMuscleGroup), group_rows)
+        db.session.commit()
+        result['loaded'] += len(batch)
+        batch.clear()
+    
+    for line_number, record in records:
+        try:
+            row, muscle_groups = catalog_exercise_row(record)
+        except (ValueError, TypeError) as e:
+            result['error_count'] += 1
+            if len(result['errors']) < max_errors:
+                result['errors'].append({'line': line_number, 'error': str(e)})
+            continue
+        if row['name'].lower() in known:
+            result['skipped'] += 1
+            continue
+        known.add(row['name'].lower())
+        batch.append((row, muscle_groups))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+WORKOUT_PLAN_SYSTEM_PROMPT = "You are a professional fitness programming specialist. Generate structured workout plans in a professional format without conversational language. Respond with only the workout plan content, structured with clear headings, exercise details, and programming parameters. Do not include phrases like 'Sure, here's a plan' or similar conversational text. Format your response as a clean, professional training program."
+
+def workout_plan_profile(user, latest_progress, active_goal, data):
+    """The handful of fields the plan prompt depends on"""
+    return {
+        'gender': user.gender,
+        'age': user.age,
+        'height': user.height,
+        'weight': latest_progress.weight if latest_progress else None,
+        'fitness_level': user.fitness_level,
+        'goal_type': active_goal.goal_type if active_goal else data.get('goal_type', 'general fitness'),
+        'frequency': active_goal.workout_frequency if active_goal else data.get('frequency', 3),
+        'duration': active_goal.workout_duration if active_goal else data.get('duration', 60),
+        'equipment': active_goal.equipment_names if active_goal else data.get('equipment', ['bodyweight'])
+    }
+
+def build_workout_plan_context(profile):
+    """Prompt describing the client profile and program parameters for plan generation"""
+    training_frequency = profile['frequency']
+    return f"""
     TRAINING PROGRAM SPECIFICATIONS
     
     Client Profile:
-    • Demographics: {user.gender}, {user.age} years, {user.height} inches
-    • Current Weight: {latest_progress.weight if latest_progress else 'Baseline required'} lbs
-    • Experience Level: {user.fitness_level}
-    • Primary Objective: {active_goal.goal_type if active_goal else data.get('goal_type', 'general fitness')}
+    • Demographics: {profile['gender']}, {profile['age']} years, {profile['height']} inches
+    • Current Weight: {profile['weight'] if profile['weight'] is not None else 'Baseline required'} lbs
+    • Experience Level: {profile['fitness_level']}
+    • Primary Objective: {profile['goal_type']}
     
     Program Parameters:
     • Training Frequency: {training_frequency} sessions per week
-    • Session Duration: {active_goal.workout_duration if active_goal else data.get('duration', 60)} minutes
-    • Available Equipment: {json.loads(active_goal.equipment_available) if active_goal else data.get('equipment', ['bodyweight'])}
+    • Session Duration: {profile['duration']} minutes
+    • Available Equipment: {profile['equipment']}
     
     CRITICAL: Create exactly {training_frequency} distinct workout days (Day 1, Day 2, etc.) with clear daily structure for weekly scheduling.
     
@@ -349,57 +1884,390 @@ def generate_workout_plan():
     PERFORMANCE NOTES
     [Technical cues and execution guidelines]
     """
+
+def save_workout_plan(user_id, active_goal, data, workout_plan_text):
+    """Persist a generated workout plan for the user"""
+    workout_plan = WorkoutPlan(
+        user_id=user_id,
+        name=f"{active_goal.goal_type.title() if active_goal else 'Custom'} Workout Plan",
+        description=workout_plan_text,
+        goal_type=active_goal.goal_type if active_goal else data.get('goal_type', 'general'),
+        duration_weeks=data.get('duration_weeks', 8),
+        days_per_week=active_goal.workout_frequency if active_goal else data.get('frequency', 3)
+    )
+    db.session.add(workout_plan)
+    store_plan_structure(workout_plan)
+    bump_data_version(user_id)
+    db.session.commit()
+    
+    prerender_plan_pdf(workout_plan.id)
+    return workout_plan
+
+# Accepted sessions per week and minutes per session, and what a missing value means
+PLAN_FREQUENCY_RANGE = (1, 7, 3)
+PLAN_DURATION_RANGE = (10, 240, 60)
+
+def plan_schedule_value(value, field, bounds):
+    """value as an integer within bounds (low, high, default), or ValueError naming field"""
+    low, high, default = bounds
+    if value is None or value == '':
+        return default
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(f'{field} must be an integer between {low} and {high}')
+    return value
+
+def workout_plan_request(user_id, data):
+    """Load the user's profile and build the chat completion request for a new plan"""
+    # Get user info and goals
+    user = db.session.get(User, user_id)
+    latest_progress = get_latest_progress(user_id)
+    active_goal = Goal.query.filter_by(user_id=user_id, is_active=True).first()
     
+    # Prepare context for OpenAI
+    profile = workout_plan_profile(user, latest_progress, active_goal, data)
+    for field, bounds in (('frequency', PLAN_FREQUENCY_RANGE), ('duration', PLAN_DURATION_RANGE)):
+        try:
+            profile[field] = plan_schedule_value(profile[field], field, bounds)
+        except ValueError:
+            if not active_goal:
+                raise
+            profile[field] = bounds[2]  # a goal saved before goals_api validated these
+    completion_params = dict(
+        model="gpt-4.1",
+        messages=[
+            {"role": "system", "content": WORKOUT_PLAN_SYSTEM_PROMPT},
+            {"role": "user", "content": build_workout_plan_context(profile)}
+        ],
+        max_tokens=2500,
+        temperature=0.3
+    )
+    return active_goal, profile, completion_params
+
+PLAN_GENERATORS = ('llm', 'local')
+
+def plan_generator_catalog(equipment):
+    """Categorized catalog exercises usable with the equipment keys, as plan_generator records"""
+    exercises = Exercise.query.filter(
+        Exercise.category.isnot(None),
+        or_(Exercise.equipment_needed.is_(None), Exercise.equipment_needed.in_(set(equipment) | {'bodyweight'}))
+    ).options(
+        load_only(Exercise.name, Exercise.category, Exercise.equipment_needed, Exercise.difficulty_level),
+        selectinload(Exercise.muscle_group_items)
+    )
+    return [
+        plan_generator.CatalogExercise(e.name, e.category, tuple(e.muscle_group_names), e.equipment_needed,
+                                       e.difficulty_level)
+        for e in exercises
+    ]
+
+def build_local_workout_plan(active_goal, profile):
+    """Plan text from the rule-based generator for a workout_plan_profile"""
+    equipment = profile['equipment'] or []
+    if isinstance(equipment, str):
+        equipment = equipment.split(',')
+    equipment = [equipment_key(e) for e in equipment if str(e).strip()]
+    return plan_generator.build_workout_plan(
+        dict(profile, equipment=equipment),
+        plan_generator_catalog(equipment),
+        preferred=active_goal.preferred_exercise_names if active_goal else (),
+        schedule=workout_schedule_for(int(profile['frequency'] or 3))
+    )
+
+def generate_plan_text(active_goal, profile, completion_params, data, fallback=True):
+    """(text, cached, generator) for a plan request: the local generator when asked for, else
+    the LLM, falling back to the local generator if the LLM gateway is unavailable"""
+    if data.get('generator') == 'local':
+        local_plans.inc(1, 'requested')
+        return build_local_workout_plan(active_goal, profile), False, 'local'
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": "You are a professional fitness programming specialist. Generate structured workout plans in a professional format without conversational language. Respond with only the workout plan content, structured with clear headings, exercise details, and programming parameters. Do not include phrases like 'Sure, here's a plan' or similar conversational text. Format your response as a clean, professional training program."},
-                {"role": "user", "content": context}
-            ],
-            max_tokens=2500,
-            temperature=0.3
-        )
+        text, cached = cached_chat_completion('workout_plan', profile, completion_params,
+                                              data.get('cache', True) is not False)
+        return text, cached, 'llm'
+    except LLMUnavailable:
+        if not (fallback and current_app.config['LOCAL_PLAN_FALLBACK']):
+            raise
+        local_plans.inc(1, 'fallback')
+        return build_local_workout_plan(active_goal, profile), False, 'local'
+
+def stream_plan_text(active_goal, profile, completion_params, data):
+    """Streaming generate_plan_text, yielding (generator, delta). A failed LLM stream only falls
+    back to the local generator before its first delta, as the client has nothing to discard"""
+    if data.get('generator') == 'local':
+        local_plans.inc(1, 'requested')
+        yield 'local', build_local_workout_plan(active_goal, profile)
+        return
+    started = False
+    try:
+        for delta in stream_cached_chat_completion('workout_plan', profile, completion_params,
+                                                   data.get('cache', True) is not False):
+            started = True
+            yield 'llm', delta
+    except LLMUnavailable:
+        if started or not current_app.config['LOCAL_PLAN_FALLBACK']:
+            raise
+        local_plans.inc(1, 'fallback')
+        yield 'local', build_local_workout_plan(active_goal, profile)
+
+@bp.route('/api/generate-workout-plan', methods=['POST'])
+def generate_workout_plan():
+    user_id = session.get('user_id', 1)
+    data = request.json
+    
+    if data.get('generator', 'llm') not in PLAN_GENERATORS:
+        return jsonify({'error': f"generator must be one of: {', '.join(PLAN_GENERATORS)}"}), 400
+    
+    try:
+        active_goal, profile, completion_params = workout_plan_request(user_id, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if data.get('async'):
+        job = enqueue_workout_plan_job(user_id, data)
+        return jsonify({
+            'message': 'Workout plan generation queued',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
+    
+    if data.get('stream'):
+        def generate():
+            # Flush headers straight away so the client can start rendering
+            yield ': stream opened\n\n'
+            
+            try:
+                chunks = []
+                generator = 'llm'
+                for generator, delta in stream_plan_text(active_goal, profile, completion_params, data):
+                    chunks.append(delta)
+                    yield sse_event({'delta': delta})
+                
+                workout_plan = save_workout_plan(user_id, active_goal, data, ''.join(chunks))
+                yield sse_event({
+                    'message': 'Workout plan generated successfully',
+                    'plan_id': workout_plan.id,
+                    'generator': generator
+                }, event='done')
+            
+            except Exception as e:
+                db.session.rollback()
+                yield sse_event({'error': f'Failed to generate workout plan: {str(e)}'}, event='error')
         
-        workout_plan_text = response.choices[0].message.content
+        return event_stream_response(generate())
+    
+    try:
+        text, cached, generator = generate_plan_text(active_goal, profile, completion_params, data)
         
         # Save the workout plan to database
-        workout_plan = WorkoutPlan(
-            user_id=user_id,
-            name=f"{active_goal.goal_type.title() if active_goal else 'Custom'} Workout Plan",
-            description=workout_plan_text,
-            goal_type=active_goal.goal_type if active_goal else data.get('goal_type', 'general'),
-            duration_weeks=data.get('duration_weeks', 8),
-            days_per_week=active_goal.workout_frequency if active_goal else data.get('frequency', 3)
-        )
-        db.session.add(workout_plan)
-        db.session.commit()
+        workout_plan = save_workout_plan(user_id, active_goal, data, text)
         
         return jsonify({
             'message': 'Workout plan generated successfully',
-            'workout_plan': workout_plan_text,
-            'plan_id': workout_plan.id
+            'workout_plan': text,
+            'plan_id': workout_plan.id,
+            'cached': cached,
+            'generator': generator
         })
         
+    except LLMUnavailable as e:
+        return llm_unavailable_response(f'Failed to generate workout plan: {str(e)}', e)
     except Exception as e:
         return jsonify({'error': f'Failed to generate workout plan: {str(e)}'}), 500
 
-@app.route('/api/workout-plans', methods=['GET'])
+# Background job queue for plan generation
+_job_executor = None
+_job_executor_lock = threading.Lock()
+
+JOB_STALE_AFTER = timedelta(minutes=10)  # running jobs older than this were orphaned by a restart
+
+def get_job_executor():
+    """Bounded worker pool for plan generation, started (and orphaned jobs resumed) on first use"""
+    global _job_executor
+    with _job_executor_lock:
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(
+                max_workers=current_app.config['PLAN_GENERATION_WORKERS'],
+                thread_name_prefix='plan-generation'
+            )
+            resume_pending_jobs()
+    return _job_executor
+
+@bp.before_app_request
+def start_job_workers():
+    """Start the worker pool with the process's first request, so jobs a previous process left
+    queued (including retries whose timers died with it) resume without waiting for a new job"""
+    if _job_executor is None:
+        get_job_executor()
+
+def submit_job(job_id, app=None):
+    # Retries are resubmitted from a timer thread, which passes the app in explicitly
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        get_job_executor().submit(run_job_in_context, app, job_id)
+
+def run_job_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_workout_plan_job(job_id)
+        finally:
+            db.session.remove()
+
+def enqueue_workout_plan_job(user_id, data):
+    """Persist a plan generation job and hand it to the worker pool"""
+    job = GenerationJob(user_id=user_id, payload=json.dumps(data))
+    db.session.add(job)
+    db.session.commit()
+    submit_job(job.id)
+    return job
+
+def resume_pending_jobs():
+    """Requeue jobs left queued, or stuck running, by a previous process"""
+    app = current_app._get_current_object()
+    with app.app_context():
+        stale_before = datetime.utcnow() - JOB_STALE_AFTER
+        GenerationJob.query.filter(
+            GenerationJob.status == 'running', GenerationJob.started_at < stale_before
+        ).update({'status': 'queued'})
+        db.session.commit()
+        
+        for job in GenerationJob.query.filter_by(status='queued').order_by(GenerationJob.created_at):
+            _job_executor.submit(run_job_in_context, app, job.id)
+
+def run_workout_plan_job(job_id):
+    """Generate and save the plan for one job, rescheduling with backoff on failure"""
+    # Claim the job atomically so a job is never run twice
+    claimed = GenerationJob.query.filter_by(id=job_id, status='queued').update({
+        'status': 'running',
+        'started_at': datetime.utcnow(),
+        'attempts': GenerationJob.attempts + 1
+    })
+    db.session.commit()
+    if not claimed:
+        return
+    
+    job = db.session.get(GenerationJob, job_id)
+    data = json.loads(job.payload)
+    
+    try:
+        active_goal, profile, completion_params = workout_plan_request(job.user_id, data)
+        # Retries give the LLM another chance; only the last attempt falls back to a local plan
+        last_attempt = job.attempts >= current_app.config['PLAN_GENERATION_MAX_ATTEMPTS']
+        text, _, _ = generate_plan_text(active_goal, profile, completion_params, data, fallback=last_attempt)
+        workout_plan = save_workout_plan(job.user_id, active_goal, data, text)
+        
+        job.status = 'succeeded'
+        job.plan_id = workout_plan.id
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(GenerationJob, job_id)
+        job.error = str(e)
+        
+        if job.attempts >= current_app.config['PLAN_GENERATION_MAX_ATTEMPTS']:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            return
+        
+        # Exponential backoff with jitter before the next attempt, and no sooner than the LLM
+        # gateway expects to accept calls again (e.g. while its circuit breaker is open)
+        job.status = 'queued'
+        db.session.commit()
+        delay = current_app.config['PLAN_GENERATION_RETRY_DELAY'] * (2 ** (job.attempts - 1))
+        delay = max(delay * random.uniform(0.5, 1.5), getattr(e, 'retry_after', None) or 0)
+        timer = threading.Timer(delay, submit_job,
+                                args=(job_id, current_app._get_current_object()))
+        timer.daemon = True
+        timer.start()
+
+def build_job_payload(job):
+    payload = {
+        'job_id': job.id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'plan_id': job.plan_id,
+        'error': job.error
+    }
+    if job.status == 'succeeded':
+        plan = db.session.get(WorkoutPlan, job.plan_id)
+        payload['workout_plan'] = plan.description if plan else None
+    return payload
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status; pass ?wait=<seconds> to long-poll until the job finishes"""
+    user_id = session.get('user_id', 1)
+    wait = request.args.get('wait', 0, type=float)
+    if not math.isfinite(wait):
+        wait = 0  # a NaN deadline would never pass
+    wait = max(0.0, min(wait, 30))
+    deadline = time.monotonic() + wait
+    
+    while True:
+        job = GenerationJob.query.filter_by(id=job_id, user_id=user_id).first()
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status in ('succeeded', 'failed') or time.monotonic() >= deadline:
+            return jsonify(build_job_payload(job))
+        
+        db.session.rollback()  # end the read transaction so the next poll sees new commits
+        time.sleep(0.25)
+
+@bp.route('/api/workout-plans', methods=['GET'])
+@conditional_on_data_version
 def get_workout_plans():
     user_id = session.get('user_id', 1)
-    plans = WorkoutPlan.query.filter_by(user_id=user_id).order_by(WorkoutPlan.created_at.desc()).all()
-    return jsonify([{
-        'id': p.id,
-        'name': p.name,
-        'description': p.description,
-        'goal_type': p.goal_type,
-        'duration_weeks': p.duration_weeks,
-        'days_per_week': p.days_per_week,
-        'created_at': p.created_at.isoformat(),
-        'is_active': p.is_active
-    } for p in plans])
-
-@app.route('/api/workout-plans/<int:plan_id>', methods=['DELETE'])
+    try:
+        page = parse_page_args(request.args, WORKOUT_PLAN_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Only the requested columns are loaded, so list views can skip the plan text
+    query = WorkoutPlan.query.filter_by(user_id=user_id).options(
+        load_only(*[getattr(WorkoutPlan, f) for f in page['fields']], WorkoutPlan.created_at)
+    )
+    if page['since']:
+        query = query.filter(WorkoutPlan.created_at >= datetime.combine(page['since'], datetime.min.time()))
+    if page['until']:
+        query = query.filter(WorkoutPlan.created_at < datetime.combine(page['until'] + timedelta(days=1), datetime.min.time()))
+    
+    try:
+        plans, next_cursor = keyset_page(query, WorkoutPlan.created_at, WorkoutPlan.id, page, datetime.fromisoformat)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response(project(plans, page['fields'], WORKOUT_PLAN_FIELDS), next_cursor)
+
+WORKOUT_PLAN_FIELDS = {
+    'id': lambda p: p.id,
+    'name': lambda p: p.name,
+    'description': lambda p: p.description,
+    'preview': lambda p: p.preview,
+    'goal_type': lambda p: p.goal_type,
+    'duration_weeks': lambda p: p.duration_weeks,
+    'days_per_week': lambda p: p.days_per_week,
+    'created_at': lambda p: p.created_at.isoformat(),
+    'is_active': lambda p: p.is_active
+}
+
+@bp.route('/api/workout-plans/<int:plan_id>', methods=['GET'])
+@conditional_on_data_version
+def get_workout_plan(plan_id):
+    user_id = session.get('user_id', 1)
+    plan = WorkoutPlan.query.filter_by(id=plan_id, user_id=user_id).first()
+    
+    if not plan:
+        return jsonify({'error': 'Workout plan not found'}), 404
+    
+    return jsonify({field: serialize(plan) for field, serialize in WORKOUT_PLAN_FIELDS.items() if field != 'preview'})
+
+@bp.route('/api/workout-plans/<int:plan_id>', methods=['DELETE'])
 def delete_workout_plan(plan_id):
     user_id = session.get('user_id', 1)
     plan = WorkoutPlan.query.filter_by(id=plan_id, user_id=user_id).first()
@@ -408,16 +2276,28 @@ def delete_workout_plan(plan_id):
         return jsonify({'error': 'Workout plan not found'}), 404
     
     try:
-        # Also delete any workout sessions associated with this plan
-        associated_sessions = WorkoutSession.query.filter_by(workout_plan_id=plan_id, user_id=user_id).all()
+        # Also delete any workout sessions associated with this plan. Everything is removed with
+        # set-based DELETEs, so the statement count does not grow with the number of sessions
+        stats = load_user_statistics(user_id)
+        associated_sessions = WorkoutSession.query.filter_by(workout_plan_id=plan_id, user_id=user_id).options(
+            load_only(WorkoutSession.date, WorkoutSession.completed, WorkoutSession.duration_minutes)
+        ).all()
+        session_ids = [s.id for s in associated_sessions]
+        exercise_keys = session_exercise_keys(session_ids)
+        # Delete the sessions' workout exercises
+        delete_session_exercises(session_ids)
         for workout_session in associated_sessions:
-            # Delete workout exercises for each session
-            WorkoutExercise.query.filter_by(workout_session_id=workout_session.id).delete()
-            db.session.delete(workout_session)
+            apply_session_to_statistics(stats, workout_session, delta=-1)
+        WorkoutSession.query.filter(WorkoutSession.id.in_(session_ids)).delete(synchronize_session=False)
         
         # Delete the plan itself
-        db.session.delete(plan)
+        delete_plan_structure([plan_id])
+        WorkoutPlan.query.filter_by(id=plan_id).delete(synchronize_session=False)
+        refresh_exercise_stats(user_id, exercise_keys)
+        bump_data_version(user_id)
         db.session.commit()
+        invalidate_parsed_plans([plan_id])
+        evict_plan_pdfs(plan_id)
         
         return jsonify({
             'message': 'Workout plan deleted successfully',
@@ -428,7 +2308,110 @@ def delete_workout_plan(plan_id):
         db.session.rollback()
         return jsonify({'error': f'Failed to delete workout plan: {str(e)}'}), 500
 
-@app.route('/api/workout-plans/<int:plan_id>/pdf', methods=['GET'])
+def plan_pdf_fingerprint(plan):
+    """Hash of everything that appears in a plan's PDF"""
+    material = json.dumps([
+        plan.name, plan.goal_type, plan.duration_weeks, plan.days_per_week,
+        plan.created_at.isoformat(), plan.description
+    ])
+    return hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+
+def plan_pdf_path(plan_id, fingerprint='*'):
+    return os.path.join(current_app.config['PDF_CACHE_DIR'], f'plan_{plan_id}_{fingerprint}.pdf')
+
+def render_workout_plan_pdf(plan):
+    """Lay out a workout plan with reportlab and return the PDF bytes"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from io import BytesIO
+    
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Title
+    title = Paragraph(f"<b>{plan.name}</b>", styles['Title'])
+    story.append(title)
+    story.append(Spacer(1, 12))
+    
+    # Plan details
+    details = f"""
+    <b>Goal Type:</b> {plan.goal_type.title() if plan.goal_type else 'General Fitness'}<br/>
+    <b>Duration:</b> {plan.duration_weeks} weeks<br/>
+    <b>Frequency:</b> {plan.days_per_week} days per week<br/>
+    <b>Created:</b> {plan.created_at.strftime('%B %d, %Y')}<br/>
+    """
+    details_para = Paragraph(details, styles['Normal'])
+    story.append(details_para)
+    story.append(Spacer(1, 24))
+    
+    # Plan description
+    for line, is_header in get_parsed_plan(plan)['lines']:
+        # Format headers
+        if is_header:
+            para = Paragraph(f"<b>{line}</b>", styles['Heading2'])
+        else:
+            para = Paragraph(line, styles['Normal'])
+        story.append(para)
+        story.append(Spacer(1, 6))
+    
+    doc.build(story)
+    return buffer.getvalue()
+
+def ensure_plan_pdf(plan):
+    """Path of the plan's cached PDF, rendering it first if the cached copy is missing or stale"""
+    fingerprint = plan_pdf_fingerprint(plan)
+    path = plan_pdf_path(plan.id, fingerprint)
+    if os.path.exists(path):
+        return path, fingerprint
+    
+    pdf_bytes = render_workout_plan_pdf(plan)
+    
+    # Write atomically so concurrent renders and readers never see a partial file, and only then
+    # remove the stale versions: the current file is never deleted under a reader that found it
+    os.makedirs(current_app.config['PDF_CACHE_DIR'], exist_ok=True)
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(pdf_bytes)
+    os.replace(temp_path, path)
+    evict_plan_pdfs(plan.id, keep=path)
+    return path, fingerprint
+
+def evict_plan_pdfs(plan_id, keep=None):
+    """Delete the plan's cached PDFs, except the one at keep"""
+    for path in glob.glob(plan_pdf_path(plan_id)):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+_pdf_executor = None
+_pdf_executor_lock = threading.Lock()
+
+def prerender_plan_pdf(plan_id):
+    """Render a new plan's PDF in the background so the first download is a file send"""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-render')
+    _pdf_executor.submit(prerender_plan_pdf_in_context, current_app._get_current_object(), plan_id)
+
+def prerender_plan_pdf_in_context(app, plan_id):
+    with app.app_context():
+        try:
+            plan = db.session.get(WorkoutPlan, plan_id)
+            if plan:
+                ensure_plan_pdf(plan)
+        except Exception as e:
+            app.logger.warning('Background PDF render failed for plan %s: %s', plan_id, e)
+        finally:
+            db.session.remove()
+
+@bp.route('/api/workout-plans/<int:plan_id>/pdf', methods=['GET'])
 def export_workout_plan_pdf(plan_id):
     user_id = session.get('user_id', 1)
     plan = WorkoutPlan.query.filter_by(id=plan_id, user_id=user_id).first()
@@ -437,55 +2420,16 @@ def export_workout_plan_pdf(plan_id):
         return jsonify({'error': 'Workout plan not found'}), 404
     
     try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from io import BytesIO
-        import re
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title = Paragraph(f"<b>{plan.name}</b>", styles['Title'])
-        story.append(title)
-        story.append(Spacer(1, 12))
-        
-        # Plan details
-        details = f"""
-        <b>Goal Type:</b> {plan.goal_type.title() if plan.goal_type else 'General Fitness'}<br/>
-        <b>Duration:</b> {plan.duration_weeks} weeks<br/>
-        <b>Frequency:</b> {plan.days_per_week} days per week<br/>
-        <b>Created:</b> {plan.created_at.strftime('%B %d, %Y')}<br/>
-        """
-        details_para = Paragraph(details, styles['Normal'])
-        story.append(details_para)
-        story.append(Spacer(1, 24))
-        
-        # Plan description
-        description_lines = plan.description.split('\n')
-        for line in description_lines:
-            if line.strip():
-                # Format headers
-                if any(keyword in line.lower() for keyword in ['day ', 'week ', 'workout']):
-                    para = Paragraph(f"<b>{line}</b>", styles['Heading2'])
-                else:
-                    para = Paragraph(line, styles['Normal'])
-                story.append(para)
-                story.append(Spacer(1, 6))
-        
-        doc.build(story)
-        buffer.seek(0)
-        
-        from flask import send_file
+        path, fingerprint = ensure_plan_pdf(plan)
+        
+        # conditional=True answers If-None-Match / If-Modified-Since with 304
         return send_file(
-            buffer,
+            path,
             as_attachment=True,
             download_name=f"{plan.name.replace(' ', '_')}.pdf",
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            conditional=True,
+            etag=fingerprint
         )
         
     except ImportError:
@@ -493,7 +2437,8 @@ def export_workout_plan_pdf(plan_id):
     except Exception as e:
         return jsonify({'error': f'Failed to generate PDF: {str(e)}'}), 500
 
-@app.route('/api/workout-sessions', methods=['GET', 'POST'])
+@bp.route('/api/workout-sessions', methods=['GET', 'POST'])
+@conditional_on_data_version
 def workout_sessions_api():
     user_id = session.get('user_id', 1)
     
@@ -509,23 +2454,78 @@ def workout_sessions_api():
             notes=data.get('notes'),
             completed=data.get('completed', False)
         )
+        stats = load_user_statistics(user_id)
         db.session.add(session_obj)
+        try:
+            add_session_exercises(session_obj, data.get('exercises'))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        apply_session_to_statistics(stats, session_obj)
+        db.session.flush()
+        refresh_exercise_stats(user_id, {(e.exercise_id, session_obj.date) for e in session_obj.exercises})
+        bump_data_version(user_id)
         db.session.commit()
         return jsonify({'message': 'Workout session created', 'session_id': session_obj.id})
     
-    # GET request - get recent sessions
-    sessions = WorkoutSession.query.filter_by(user_id=user_id).order_by(WorkoutSession.date.desc()).limit(10).all()
-    return jsonify([{
-        'id': s.id,
-        'date': s.date.isoformat(),
-        'name': s.name,
-        'duration_minutes': s.duration_minutes,
-        'calories_burned': s.calories_burned,
-        'completed': s.completed,
-        'notes': s.notes
-    } for s in sessions])
-
-@app.route('/api/workout-sessions/<int:session_id>', methods=['DELETE'])
+    # GET request - get recent sessions, with ?include=exercises for their nested exercises
+    include_exercises = 'exercises' in request.args.get('include', '').split(',')
+    return jsonify(build_recent_sessions_payload(user_id, include_exercises))
+
+def build_recent_sessions_payload(user_id, include_exercises=False):
+    """The user's ten most recent workout sessions"""
+    query = WorkoutSession.query.filter_by(user_id=user_id).order_by(WorkoutSession.date.desc())
+    if include_exercises:
+        query = query.options(session_exercises_loader())
+    return [workout_session_payload(s, include_exercises) for s in query.limit(10)]
+
+def session_exercises_loader():
+    """Eager loading of sessions' exercises with their sets and catalog names: two SELECT ... IN
+    queries for any number of sessions, instead of lazy loads per session and per exercise"""
+    return selectinload(WorkoutSession.exercises).options(
+        joinedload(WorkoutExercise.exercise).load_only(Exercise.name),
+        selectinload(WorkoutExercise.set_rows)
+    )
+
+def workout_session_payload(workout_session, include_exercises=False):
+    payload = {
+        'id': workout_session.id,
+        'date': workout_session.date.isoformat(),
+        'name': workout_session.name,
+        'duration_minutes': workout_session.duration_minutes,
+        'calories_burned': workout_session.calories_burned,
+        'completed': workout_session.completed,
+        'notes': workout_session.notes
+    }
+    if include_exercises:
+        payload['workout_plan_id'] = workout_session.workout_plan_id
+        payload['exercises'] = [{
+            'id': e.id,
+            'exercise_id': e.exercise_id,
+            'exercise': e.exercise.name,
+            'sets': e.sets,
+            'reps': [row.reps for row in e.set_rows],
+            'weight': [row.weight for row in e.set_rows],
+            'rest_time': e.rest_time,
+            'completed': e.completed
+        } for e in workout_session.exercises]
+    return payload
+
+@bp.route('/api/workout-sessions/<int:session_id>', methods=['GET'])
+@conditional_on_data_version
+def get_workout_session(session_id):
+    user_id = session.get('user_id', 1)
+    workout_session = WorkoutSession.query.filter_by(id=session_id, user_id=user_id).options(
+        session_exercises_loader()
+    ).first()
+    
+    if not workout_session:
+        return jsonify({'error': 'Workout session not found'}), 404
+    
+    return jsonify(workout_session_payload(workout_session, include_exercises=True))
+
+@bp.route('/api/workout-sessions/<int:session_id>', methods=['DELETE'])
 def delete_workout_session(session_id):
     user_id = session.get('user_id', 1)
     workout_session = WorkoutSession.query.filter_by(id=session_id, user_id=user_id).first()
@@ -534,11 +2534,16 @@ def delete_workout_session(session_id):
         return jsonify({'error': 'Workout session not found'}), 404
     
     try:
+        exercise_keys = session_exercise_keys([session_id])
+        
         # Delete associated workout exercises
-        WorkoutExercise.query.filter_by(workout_session_id=session_id).delete()
+        delete_session_exercises([session_id])
+        apply_session_to_statistics(load_user_statistics(user_id), workout_session, delta=-1)
         
-        # Delete the session
-        db.session.delete(workout_session)
+        # Delete the session (a bulk DELETE skips loading the already-deleted exercises for the ORM cascade)
+        WorkoutSession.query.filter_by(id=session_id).delete(synchronize_session=False)
+        refresh_exercise_stats(user_id, exercise_keys)
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({
@@ -550,19 +2555,33 @@ def delete_workout_session(session_id):
         db.session.rollback()
         return jsonify({'error': f'Failed to delete workout session: {str(e)}'}), 500
 
-@app.route('/api/bmi-gauge', methods=['GET'])
+@bp.route('/api/bmi-gauge', methods=['GET'])
+@conditional_on_data_version
 def get_bmi_gauge():
     user_id = session.get('user_id', 1)
     
     # Get user data and latest progress
     user = db.session.get(User, user_id)
-    latest_progress = Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc()).first()
+    latest_progress = get_latest_progress(user_id)
     
-    if not user or not user.height or not latest_progress or not latest_progress.weight:
-        return jsonify({'error': 'Insufficient data for BMI calculation'}), 400
-    
-    # Calculate BMI
-    bmi = calculate_bmi(latest_progress.weight, user.height)
+    payload, status = build_bmi_gauge_payload(user, latest_progress)
+    return jsonify(payload), status
+
+def bmi_category(bmi):
+    """BMI category label and gauge color"""
+    if bmi < 18.5:
+        return "Underweight", "#3B82F6"
+    elif bmi < 25:
+        return "Normal", "#10B981"
+    elif bmi < 30:
+        return "Overweight", "#F59E0B"
+    else:
+        return "Obese", "#DC2626"
+
+def build_bmi_gauge_figure(bmi, category, color, weight, height):
+    """Serialized Plotly gauge figure, built with Plotly itself (the uncached path)"""
+    import plotly.graph_objects as go
+    import plotly.utils
     
     # Create Plotly gauge figure with enhanced styling
     fig = go.Figure(go.Indicator(
@@ -615,7 +2634,7 @@ def get_bmi_gauge():
         showlegend=False,
         annotations=[
             dict(
-                text=f"Weight: {latest_progress.weight} lbs<br>Height: {user.height}\"",
+                text=f"Weight: {weight} lbs<br>Height: {height}\"",
                 showarrow=False,
                 x=0.5, y=0.1,
                 xref="paper", yref="paper",
@@ -625,33 +2644,195 @@ def get_bmi_gauge():
         ]
     )
     
-    # Get BMI category and color
-    if bmi < 18.5:
-        category = "Underweight"
-        color = "#3B82F6"
-    elif bmi < 25:
-        category = "Normal"
-        color = "#10B981"
-    elif bmi < 30:
-        category = "Overweight"
-        color = "#F59E0B"
-    else:
-        category = "Obese"
-        color = "#DC2626"
-    
-    # Convert to JSON
-    graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+# Server-side BMI gauge cache: the figure is built with Plotly once, then only the
+# value, category suffix, bar color and weight/height annotation are patched in
+bmi_gauge_cache = LRUCache(4 * 1024 * 1024)  # resized to BMI_GAUGE_CACHE_MAX_BYTES by create_app
+_bmi_gauge_template = None
+
+# Held while analytics (and with it pandas) is imported. Plotly's validators use pandas whenever
+# it is in sys.modules, so a figure built during that import would see a half-initialized module
+_pandas_import_lock = threading.Lock()
+
+def bmi_gauge_template():
+    global _bmi_gauge_template
+    if _bmi_gauge_template is None:
+        with _pandas_import_lock:
+            if _bmi_gauge_template is None:  # another thread may have built it while we waited
+                _bmi_gauge_template = json.loads(build_bmi_gauge_figure(22.0, 'Normal', '#10B981', 0, 0))
+    return _bmi_gauge_template
+
+def render_bmi_gauge_figure(bmi, category, color, weight, height):
+    """Same JSON as build_bmi_gauge_figure, produced by patching the precomputed template"""
+    template = bmi_gauge_template()
+    indicator = template['data'][0]
+    annotation = template['layout']['annotations'][0]
     
-    return jsonify({
-        'graph': graphJSON,
-        'bmi': round(bmi, 1),
-        'category': category,
-        'color': color,
-        'weight': latest_progress.weight,
-        'height': user.height
+    return json.dumps({
+        **template,
+        'data': [{
+            **indicator,
+            'value': bmi,
+            'number': {**indicator['number'], 'suffix': f' ({category})'},
+            'gauge': {**indicator['gauge'], 'bar': {**indicator['gauge']['bar'], 'color': color}}
+        }],
+        'layout': {
+            **template['layout'],
+            'annotations': [{**annotation, 'text': f"Weight: {weight} lbs<br>Height: {height}\""}]
+        }
     })
 
-@app.route('/api/chatbot', methods=['POST'])
+def build_bmi_gauge_payload(user, latest_progress):
+    """Plotly BMI gauge for a user's latest weight, returned with an HTTP status"""
+    if not user or not user.height or not latest_progress or not latest_progress.weight:
+        return {'error': 'Insufficient data for BMI calculation'}, 400
+    
+    # Calculate BMI
+    bmi = calculate_bmi(latest_progress.weight, user.height)
+    category, color = bmi_category(bmi)
+    
+    cache_key = (category, latest_progress.weight, user.height)
+    payload = bmi_gauge_cache.get(cache_key)
+    if payload is None:
+        payload = {
+            'graph': render_bmi_gauge_figure(bmi, category, color, latest_progress.weight, user.height),
+            'bmi': round(bmi, 1),
+            'category': category,
+            'color': color,
+            'weight': latest_progress.weight,
+            'height': user.height
+        }
+        bmi_gauge_cache.put(cache_key, payload)
+    return payload, 200
+
+# Chatbot with conversation memory
+CHAT_SYSTEM_PROMPT = "You are a professional exercise physiologist and training consultant. Provide evidence-based responses to fitness, exercise, and training inquiries. Maintain a professional tone while being helpful and informative. Provide concise, scientifically-supported guidance. Focus on practical application and safety considerations."
+
+def chat_profile_lines(user_id, topics):
+    """Client profile for the chat prompt: experience level and goal, plus only the
+    chat_context.PROFILE_TOPICS the conversation touches (each costs tokens and queries)"""
+    user = db.session.get(User, user_id)
+    active_goal = Goal.query.filter_by(user_id=user_id, is_active=True).first()
+    lines = [
+        f"• Experience Level: {user.fitness_level if user and user.fitness_level else 'Assessment required'}",
+        f"• Training Objective: {active_goal.goal_type if active_goal else 'Goals to be established'}"
+    ]
+    
+    if 'body' in topics:
+        latest_progress = get_latest_progress(user_id)
+        lines.append(f"• Demographics: {user.age if user else 'Age not specified'} years, "
+                     f"{user.height if user else 'Height not specified'} inches, {user.gender if user else 'Gender not specified'}")
+        lines.append(f"• Current Status: {latest_progress.weight if latest_progress else 'Baseline assessment pending'} lbs")
+        if active_goal and active_goal.target_weight:
+            lines.append(f"• Target Weight: {active_goal.target_weight} lbs")
+    if 'schedule' in topics and active_goal:
+        lines.append(f"• Training Schedule: {active_goal.workout_frequency or 3} sessions per week, "
+                     f"{active_goal.workout_duration or 60} minutes each")
+    if 'equipment' in topics:
+        equipment = active_goal.equipment_names if active_goal else []
+        lines.append(f"• Available Equipment: {', '.join(e.replace('_', ' ') for e in equipment) or 'Not specified'}")
+    if 'activity' in topics:
+        recent_sessions = WorkoutSession.query.filter_by(user_id=user_id).options(
+            load_only(WorkoutSession.date)
+        ).order_by(WorkoutSession.date.desc()).limit(5).all()
+        last = f', most recently on {recent_sessions[0].date.isoformat()}' if recent_sessions else ''
+        lines.append(f"• Recent Activity: {len(recent_sessions)} training sessions completed{last}")
+    if 'plan' in topics:
+        payload, status = build_todays_workout_payload(user_id)
+        if status == 200 and payload['is_rest_day']:
+            lines.append(f"• Today ({payload['day']}): rest day in the current plan")
+        elif status == 200:
+            workout = payload['workout']
+            lines.append(f"• Today ({payload['day']}): {workout['name']} - {'; '.join(workout['exercises'][:8])}")
+    return lines
+
+def load_chat_conversation(user_id, conversation_id):
+    """The user's conversation to continue, a new one when conversation_id is None, or None if not found"""
+    if conversation_id is None:
+        return ChatConversation(user_id=user_id)
+    return ChatConversation.query.filter_by(id=conversation_id, user_id=user_id).first()
+
+def summarize_chat_turns(conversation, turns):
+    """Fold turns into the conversation's rolling summary and commit it. If the LLM is unavailable
+    the turns stay unsummarized (and out of this prompt), to be folded in on a later turn"""
+    config = current_app.config
+    usage = {}
+    try:
+        response = create_chat_completion('chat_summary', dict(
+            model=config['CHAT_SUMMARY_MODEL'],
+            messages=chat_context.summary_messages(conversation.summary, turns, config['CHAT_SUMMARY_MAX_WORDS']),
+            max_tokens=config['CHAT_SUMMARY_MAX_WORDS'] * 2,
+            temperature=0.2
+        ), usage)
+    except LLMUnavailable:
+        return
+    
+    conversation.summary = response.choices[0].message.content.strip()
+    conversation.summarized_through = turns[-1]['id']
+    conversation.prompt_tokens += usage.get('prompt_tokens', 0)
+    conversation.completion_tokens += usage.get('completion_tokens', 0)
+    bump_data_version(conversation.user_id)
+    db.session.commit()
+
+def build_chat_turn(conversation, message):
+    """Completion params for the next turn of a conversation, summarizing older turns first
+    once the unsummarized history no longer fits CHAT_CONTEXT_TOKENS"""
+    config = current_app.config
+    turns = []
+    if conversation.id is not None:
+        turns = [{'id': m.id, 'role': m.role, 'content': m.content} for m in ChatMessage.query.filter(
+            ChatMessage.conversation_id == conversation.id, ChatMessage.id > conversation.summarized_through
+        ).options(load_only(ChatMessage.role, ChatMessage.content)).order_by(ChatMessage.id)]
+    
+    # Profile facts for what is being asked, and for the question before it so follow-ups keep their context
+    last_question = next((t['content'] for t in reversed(turns) if t['role'] == 'user'), None)
+    topics = chat_context.relevant_topics(message, last_question)
+    system_prompt = '\n'.join([CHAT_SYSTEM_PROMPT, '', 'Client Profile:', *chat_profile_lines(conversation.user_id, topics)])
+    
+    fixed = chat_context.messages_tokens(chat_context.chat_messages(system_prompt, conversation.summary, [], message))
+    older, recent = chat_context.split_history(turns, config['CHAT_CONTEXT_TOKENS'] - fixed,
+                                               config['CHAT_KEEP_RECENT_MESSAGES'])
+    if older:
+        summarize_chat_turns(conversation, older)
+    
+    return dict(
+        model="gpt-4.1",
+        messages=chat_context.chat_messages(system_prompt, conversation.summary, recent, message),
+        max_tokens=600,
+        temperature=0.4
+    )
+
+def save_chat_turn(conversation, message, reply, usage, context_tokens):
+    """Store a question and its reply, adding the reply's token usage to the conversation totals"""
+    now = datetime.utcnow()
+    if conversation.id is None:
+        conversation.title = ' '.join(message.split())[:100]
+        db.session.add(conversation)
+    conversation.updated_at = now
+    conversation.prompt_tokens = (conversation.prompt_tokens or 0) + usage.get('prompt_tokens', 0)
+    conversation.completion_tokens = (conversation.completion_tokens or 0) + usage.get('completion_tokens', 0)
+    db.session.flush()
+    
+    db.session.add_all([
+        ChatMessage(conversation_id=conversation.id, role='user', content=message, created_at=now),
+        ChatMessage(conversation_id=conversation.id, role='assistant', content=reply, created_at=now,
+                    prompt_tokens=usage.get('prompt_tokens'), completion_tokens=usage.get('completion_tokens'),
+                    context_tokens=context_tokens)
+    ])
+    bump_data_version(conversation.user_id)
+    db.session.commit()
+
+def chat_usage_payload(conversation, usage, context_tokens):
+    return {
+        'prompt_tokens': usage.get('prompt_tokens'),
+        'completion_tokens': usage.get('completion_tokens'),
+        'context_tokens': context_tokens,
+        'conversation_prompt_tokens': conversation.prompt_tokens,
+        'conversation_completion_tokens': conversation.completion_tokens
+    }
+
+@bp.route('/api/chatbot', methods=['POST'])
 def chatbot_api():
     user_id = session.get('user_id', 1)
     data = request.json
@@ -659,49 +2840,177 @@ def chatbot_api():
     if not data or 'message' not in data:
         return jsonify({'error': 'Message is required'}), 400
     
-    # Get user context
-    user = db.session.get(User, user_id)
-    latest_progress = Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc()).first()
-    active_goal = Goal.query.filter_by(user_id=user_id, is_active=True).first()
-    recent_sessions = WorkoutSession.query.filter_by(user_id=user_id).order_by(WorkoutSession.date.desc()).limit(5).all()
-    
-    # Build context for AI
-    context = f"""
-    You are a professional exercise physiologist and training consultant. Provide evidence-based responses to fitness, exercise, and training inquiries. Maintain a professional tone while being helpful and informative.
+    message = str(data['message'])
+    if chat_context.estimate_tokens(message) > current_app.config['CHAT_CONTEXT_TOKENS'] // 2:
+        return jsonify({'error': 'Message is too long'}), 400
     
-    Client Profile:
-    • Individual: {user.name if user else 'Client'}
-    • Demographics: {user.age if user else 'Age not specified'} years, {user.height if user else 'Height not specified'} inches, {user.gender if user else 'Gender not specified'}
-    • Experience Level: {user.fitness_level if user else 'Assessment required'}
-    • Current Status: {latest_progress.weight if latest_progress else 'Baseline assessment pending'} lbs
-    • Training Objective: {active_goal.goal_type if active_goal else 'Goals to be established'}
-    • Recent Activity: {len(recent_sessions)} training sessions completed
-    
-    Provide concise, scientifically-supported guidance. Focus on practical application and safety considerations.
-    """
+    conversation = load_chat_conversation(user_id, data.get('conversation_id'))
+    if conversation is None:
+        return jsonify({'error': 'Conversation not found'}), 404
     
+    use_cache = data.get('cache', True) is not False
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": context},
-                {"role": "user", "content": data['message']}
-            ],
-            max_tokens=600,
-            temperature=0.4
-        )
+        completion_params = build_chat_turn(conversation, message)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to get AI response: {str(e)}'}), 500
+    context_tokens = chat_context.messages_tokens(completion_params['messages'])
+    chat_prompt_tokens.observe(context_tokens)
+    
+    if data.get('stream'):
+        def generate():
+            yield ': stream opened\n\n'
+            
+            try:
+                chunks = []
+                usage = {}
+                for delta in stream_cached_chat_completion('chatbot', completion_params['messages'], completion_params,
+                                                           use_cache, usage):
+                    chunks.append(delta)
+                    yield sse_event({'delta': delta})
+                
+                save_chat_turn(conversation, message, ''.join(chunks), usage, context_tokens)
+                yield sse_event({
+                    'timestamp': datetime.utcnow().isoformat(),
+                    'conversation_id': conversation.id,
+                    'usage': chat_usage_payload(conversation, usage, context_tokens)
+                }, event='done')
+            
+            except Exception as e:
+                db.session.rollback()
+                yield sse_event({'error': f'Failed to get AI response: {str(e)}'}, event='error')
         
-        ai_response = response.choices[0].message.content
+        return event_stream_response(generate())
+    
+    try:
+        usage = {}
+        ai_response, cached = cached_chat_completion('chatbot', completion_params['messages'], completion_params,
+                                                     use_cache, usage)
+        save_chat_turn(conversation, message, ai_response, usage, context_tokens)
         
         return jsonify({
             'response': ai_response,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow().isoformat(),
+            'cached': cached,
+            'conversation_id': conversation.id,
+            'usage': chat_usage_payload(conversation, usage, context_tokens)
         })
         
+    except LLMUnavailable as e:
+        return llm_unavailable_response(f'Failed to get AI response: {str(e)}', e)
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Failed to get AI response: {str(e)}'}), 500
 
-@app.route('/api/log-past-workout', methods=['POST'])
+CHAT_CONVERSATION_FIELDS = {
+    'id': lambda c: c.id,
+    'title': lambda c: c.title,
+    'summary': lambda c: c.summary,
+    'prompt_tokens': lambda c: c.prompt_tokens,
+    'completion_tokens': lambda c: c.completion_tokens,
+    'created_at': lambda c: c.created_at.isoformat(),
+    'updated_at': lambda c: c.updated_at.isoformat()
+}
+
+CHAT_MESSAGE_FIELDS = {
+    'id': lambda m: m.id,
+    'role': lambda m: m.role,
+    'content': lambda m: m.content,
+    'prompt_tokens': lambda m: m.prompt_tokens,
+    'completion_tokens': lambda m: m.completion_tokens,
+    'context_tokens': lambda m: m.context_tokens,
+    'created_at': lambda m: m.created_at.isoformat()
+}
+
+@bp.route('/api/chat/conversations', methods=['GET'])
+@conditional_on_data_version
+def get_chat_conversations():
+    user_id = session.get('user_id', 1)
+    try:
+        page = parse_page_args(request.args, CHAT_CONVERSATION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = ChatConversation.query.filter_by(user_id=user_id).options(
+        load_only(*[getattr(ChatConversation, f) for f in page['fields']], ChatConversation.created_at)
+    )
+    if page['since']:
+        query = query.filter(ChatConversation.created_at >= datetime.combine(page['since'], datetime.min.time()))
+    if page['until']:
+        query = query.filter(ChatConversation.created_at < datetime.combine(page['until'] + timedelta(days=1), datetime.min.time()))
+    
+    try:
+        conversations, next_cursor = keyset_page(query, ChatConversation.created_at, ChatConversation.id, page,
+                                                 datetime.fromisoformat)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response(project(conversations, page['fields'], CHAT_CONVERSATION_FIELDS), next_cursor)
+
+@bp.route('/api/chat/conversations/<int:conversation_id>', methods=['GET'])
+@conditional_on_data_version
+def get_chat_conversation(conversation_id):
+    """A conversation with all its messages and per-reply token counts"""
+    user_id = session.get('user_id', 1)
+    conversation = ChatConversation.query.filter_by(id=conversation_id, user_id=user_id).first()
+    
+    if not conversation:
+        return jsonify({'error': 'Conversation not found'}), 404
+    
+    messages = ChatMessage.query.filter_by(conversation_id=conversation_id).order_by(ChatMessage.id)
+    return jsonify({
+        **{field: serialize(conversation) for field, serialize in CHAT_CONVERSATION_FIELDS.items()},
+        'messages': project(messages, CHAT_MESSAGE_FIELDS, CHAT_MESSAGE_FIELDS)
+    })
+
+@bp.route('/api/chat/conversations/<int:conversation_id>', methods=['DELETE'])
+def delete_chat_conversation(conversation_id):
+    user_id = session.get('user_id', 1)
+    conversation = ChatConversation.query.filter_by(id=conversation_id, user_id=user_id).first()
+    
+    if not conversation:
+        return jsonify({'error': 'Conversation not found'}), 404
+    
+    ChatMessage.query.filter_by(conversation_id=conversation_id).delete(synchronize_session=False)
+    db.session.delete(conversation)
+    bump_data_version(user_id)
+    db.session.commit()
+    return jsonify({'message': 'Conversation deleted successfully'})
+
+@bp.route('/api/cache-stats', methods=['GET'])
+def cache_stats_api():
+    """Hit/miss counters for the application's caches (since process start)"""
+    return jsonify({
+        'llm': {**llm_cache_stats.as_dict(), 'entries': LLMCacheEntry.query.count()},
+        'parsed_plans': plan_cache.as_dict(),
+        'bmi_gauge': bmi_gauge_cache.as_dict()
+    })
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_api():
+    """Request, SQL, LLM and cache metrics in the Prometheus text exposition format"""
+    caches = {'llm': llm_cache_stats, 'parsed_plans': plan_cache.stats, 'bmi_gauge': bmi_gauge_cache.stats}
+    cache_metrics = []
+    for field in ('hits', 'misses', 'evictions'):
+        counter = Counter(f'workoutbuddy_cache_{field}_total', f'Cache {field} since process start', ('cache',))
+        for name, stats in caches.items():
+            counter.inc(getattr(stats, field), name)
+        cache_metrics.append(counter)
+    
+    # Only reported once the gateway exists, so scraping does not load openai
+    gateway_events = Counter('workoutbuddy_llm_gateway_events_total',
+                             'LLM gateway retries, rejections, deadline misses and circuit openings', ('event',))
+    gateway = current_app.extensions.get('llm_gateway')
+    for name, count in sorted((gateway.event_counts() if gateway else {}).items()):
+        gateway_events.inc(count, name)
+    
+    text = render_prometheus([
+        http_request_duration, db_queries_per_request, db_time_per_request,
+        llm_request_duration, llm_first_token_duration, llm_requests, llm_tokens, chat_prompt_tokens, local_plans,
+        gateway_events, *cache_metrics
+    ])
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+@bp.route('/api/log-past-workout', methods=['POST'])
 def log_past_workout():
     user_id = session.get('user_id', 1)
     data = request.json
@@ -723,7 +3032,18 @@ def log_past_workout():
             notes=data.get('notes', ''),
             completed=True  # Past workouts are completed by definition
         )
+        stats = load_user_statistics(user_id)
         db.session.add(session_obj)
+        try:
+            add_session_exercises(session_obj, data.get('exercises'))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        apply_session_to_statistics(stats, session_obj)
+        db.session.flush()
+        refresh_exercise_stats(user_id, {(e.exercise_id, workout_date) for e in session_obj.exercises})
+        bump_data_version(user_id)
         db.session.commit()
         
         return jsonify({
@@ -736,42 +3056,513 @@ def log_past_workout():
     except Exception as e:
         return jsonify({'error': f'Failed to log workout: {str(e)}'}), 500
 
-@app.route('/api/statistics')
-def statistics_api():
+# Bulk history import/export
+# Records are flat dicts tagged with a "type". Exercises point at their session through
+# session_ref, which matches the ref of a session earlier in the same import; in NDJSON a
+# session may instead carry its exercises inline as an "exercises" list.
+HISTORY_RECORD_COLUMNS = {
+    'progress': ['date', 'weight', 'body_fat_percentage', 'muscle_mass', 'chest', 'waist', 'hips', 'arms', 'thighs', 'notes'],
+    'workout_session': ['ref', 'date', 'name', 'duration_minutes', 'calories_burned', 'notes', 'completed'],
+    'workout_exercise': ['session_ref', 'exercise', 'sets', 'reps', 'weight', 'rest_time', 'completed'],
+}
+HISTORY_CSV_HEADER = ['type'] + list(dict.fromkeys(c for columns in HISTORY_RECORD_COLUMNS.values() for c in columns))
+
+def is_blank(value):
+    return value is None or value == ''
+
+def history_date(record):
+    if is_blank(record.get('date')):
+        raise ValueError('date is required')
+    try:
+        return datetime.strptime(str(record['date']), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('date must be in YYYY-MM-DD format')
+
+def history_number(record, field, cast=float):
+    value = record.get(field)
+    if is_blank(value):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be a number')
+    # inf, nan and overflowing literals like 1e400 are not measurements (and int() raises on them)
+    if not math.isfinite(number):
+        raise ValueError(f'{field} must be a finite number')
+    return cast(number) if cast is int else cast(value)
+
+def history_bool(record, field, default):
+    value = record.get(field)
+    if is_blank(value):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+def history_sets(record, field):
+    """Per-set values as a list: a list or number in NDJSON, a JSON array string in CSV"""
+    value = record.get(field)
+    if is_blank(value):
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError(f'{field} must be a JSON array')
+    return value if isinstance(value, list) else [value]
+
+def validate_history_record(record):
+    """Check one import record and return (type, column values)"""
+    record_type = record.get('type')
+    if record_type == 'progress':
+        row = {field: history_number(record, field) for field in HISTORY_RECORD_COLUMNS['progress'][1:-1]}
+        row.update(date=history_date(record), notes=record.get('notes') or None)
+    elif record_type == 'workout_session':
+        if is_blank(record.get('name')):
+            raise ValueError('name is required')
+        row = {
+            'ref': None if is_blank(record.get('ref')) else str(record['ref']),
+            'date': history_date(record),
+            'name': str(record['name'])[:100],
+            'duration_minutes': history_number(record, 'duration_minutes', int),
+            'calories_burned': history_number(record, 'calories_burned', int),
+            'notes': record.get('notes') or None,
+            'completed': history_bool(record, 'completed', True)
+        }
+    elif record_type == 'workout_exercise':
+        if is_blank(record.get('session_ref')):
+            raise ValueError('session_ref is required')
+        if is_blank(record.get('exercise')):
+            raise ValueError('exercise is required')
+        row = {
+            'session_ref': str(record['session_ref']),
+            'exercise': str(record['exercise']).strip()[:100],
+            'sets': history_number(record, 'sets', int),
+            'reps': history_sets(record, 'reps'),
+            'weight': history_sets(record, 'weight'),
+            'rest_time': history_number(record, 'rest_time', int),
+            'completed': history_bool(record, 'completed', True)
+        }
+        check_sets(row['sets'], row['reps'], row['weight'])
+    else:
+        raise ValueError(f'Unknown record type: {record_type!r}')
+    return record_type, row
+
+def read_history_records(lines, fmt, default_type=None):
+    """Yield (line number, record) from NDJSON or CSV lines without reading the whole input"""
+    decoded = (line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in lines)
+    if fmt == 'csv':
+        reader = csv.DictReader(decoded)
+        for record in reader:
+            if default_type and not record.get('type'):
+                record['type'] = default_type
+            yield reader.line_num, record
+        return
+    
+    for line_number, line in enumerate(decoded, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if default_type and isinstance(record, dict) and not record.get('type'):
+            record['type'] = default_type
+        yield line_number, record
+
+class HistoryImporter:
+    """Validates history records for one user and inserts them in batched transactions"""
+    
+    def __init__(self, user_id, batch_size=None, max_errors=100):
+        self.user_id = user_id
+        self.batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+        self.max_errors = max_errors
+        self.pending = defaultdict(list)
+        self.pending_refs = set()
+        self.session_ids = {}  # import ref -> workout_session.id
+        self.exercise_ids = None  # lowercased exercise name -> exercise.id, loaded on first use
+        self.imported = defaultdict(int)
+        self.errors = []
+        self.error_count = 0
+    
+    def add(self, line_number, record):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError('record must be a JSON object')
+            record_type, row = validate_history_record(record)
+            
+            if record_type == 'workout_session':
+                nested = record.get('exercises') or []
+                if not isinstance(nested, list) or not all(isinstance(e, dict) for e in nested):
+                    raise ValueError('exercises must be a list of objects')
+                if nested and row['ref'] is None:
+                    row['ref'] = f'line-{line_number}'
+                if row['ref'] is not None and (row['ref'] in self.session_ids or row['ref'] in self.pending_refs):
+                    raise ValueError(f"Duplicate session ref {row['ref']!r}")
+                nested_rows = [validate_history_record(dict(e, type='workout_exercise', session_ref=row['ref']))[1]
+                               for e in nested]
+                if row['ref'] is not None:
+                    self.pending_refs.add(row['ref'])
+                self.pending['workout_session'].append(row)
+                self.pending['workout_exercise'].extend(nested_rows)
+            else:
+                if record_type == 'workout_exercise' and not (
+                        row['session_ref'] in self.session_ids or row['session_ref'] in self.pending_refs):
+                    raise ValueError(f"Unknown session_ref {row['session_ref']!r}")
+                self.pending[record_type].append(row)
+        except (ValueError, TypeError) as e:
+            self.error_count += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append({'line': line_number, 'error': str(e)})
+            return
+        
+        if sum(len(rows) for rows in self.pending.values()) >= self.batch_size:
+            self.flush()
+    
+    def resolve_exercises(self, names):
+        if self.exercise_ids is None:
+            self.exercise_ids = {name.lower(): exercise_id for exercise_id, name in db.session.query(Exercise.id, Exercise.name)}
+        
+        # Exercises the catalog doesn't know yet are added by name
+        missing = {}
+        for name in names:
+            if name.lower() not in self.exercise_ids:
+                missing.setdefault(name.lower(), name)
+        if missing:
+            ids = db.session.scalars(
+                insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True),
+                [{'name': name} for name in missing.values()]
+            ).all()
+            self.exercise_ids.update(zip(missing, ids))
+    
+    def flush(self):
+        """Insert pending rows with one executemany per table and commit"""
+        progress_rows = self.pending.pop('progress', [])
+        if progress_rows:
+            db.session.execute(insert(Progress), [dict(row, user_id=self.user_id) for row in progress_rows])
+        
+        session_rows = self.pending.pop('workout_session', [])
+        if session_rows:
+            refs = [row.pop('ref') for row in session_rows]
+            ids = db.session.scalars(
+                insert(WorkoutSession).returning(WorkoutSession.id, sort_by_parameter_order=True),
+                [dict(row, user_id=self.user_id) for row in session_rows]
+            ).all()
+            self.session_ids.update((ref, session_id) for ref, session_id in zip(refs, ids) if ref is not None)
+        
+        exercise_rows = self.pending.pop('workout_exercise', [])
+        if exercise_rows:
+            self.resolve_exercises({row['exercise'] for row in exercise_rows})
+            ids = db.session.scalars(
+                insert(WorkoutExercise).returning(WorkoutExercise.id, sort_by_parameter_order=True), [{
+                    'workout_session_id': self.session_ids[row['session_ref']],
+                    'exercise_id': self.exercise_ids[row['exercise'].lower()],
+                    'sets': row['sets'],
+                    'rest_time': row['rest_time'],
+                    'completed': row['completed']
+                } for row in exercise_rows]
+            ).all()
+            set_rows = [
+                {'workout_exercise_id': exercise_id, 'set_number': number, 'reps': set_reps, 'weight': weight}
+                for exercise_id, row in zip(ids, exercise_rows)
+                for number, (set_reps, weight) in enumerate(expand_sets(row['sets'], row['reps'], row['weight']), 1)
+            ]
+            if set_rows:
+                db.session.execute(insert(WorkoutExerciseSet), set_rows)
+        
+        if progress_rows or session_rows or exercise_rows:
+            bump_data_version(self.user_id)
+        db.session.commit()
+        self.pending_refs.clear()
+        self.imported['progress'] += len(progress_rows)
+        self.imported['workout_session'] += len(session_rows)
+        self.imported['workout_exercise'] += len(exercise_rows)
+    
+    def finish(self):
+        """Flush the last batch, rebuild the user's statistics rollup and summarize the import"""
+        self.flush()
+        if self.imported['progress'] or self.imported['workout_session']:
+            rebuild_user_statistics(self.user_id)
+        if self.imported['workout_exercise']:
+            rebuild_exercise_stats(self.user_id)
+        if any(self.imported.values()):
+            bump_data_version(self.user_id)  # the rollups change after the last batch's bump
+        db.session.commit()
+        return {
+            'imported': dict(self.imported),
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
+
+def import_history(user_id, lines, fmt, default_type=None, batch_size=None):
+    importer = HistoryImporter(user_id, batch_size)
+    for line_number, record in read_history_records(lines, fmt, default_type):
+        importer.add(line_number, record)
+    return importer.finish()
+
+def export_history_records(user_id, types=tuple(HISTORY_RECORD_COLUMNS)):
+    """Yield a user's history as import-compatible records, streaming rows from the database"""
+    if 'progress' in types:
+        columns = [getattr(Progress, c) for c in HISTORY_RECORD_COLUMNS['progress']]
+        query = db.session.query(*columns).filter(Progress.user_id == user_id).order_by(Progress.date, Progress.id)
+        for row in query.yield_per(1000):
+            record = dict({'type': 'progress'}, **row._mapping)
+            record['date'] = row.date.isoformat()
+            yield record
+    
+    if 'workout_session' in types:
+        columns = [WorkoutSession.id] + [getattr(WorkoutSession, c) for c in HISTORY_RECORD_COLUMNS['workout_session'][1:]]
+        query = db.session.query(*columns).filter(WorkoutSession.user_id == user_id).order_by(WorkoutSession.id)
+        for row in query.yield_per(1000):
+            record = dict({'type': 'workout_session'}, **row._mapping)
+            record['ref'] = str(record.pop('id'))
+            record['date'] = row.date.isoformat()
+            yield record
+    
+    if 'workout_exercise' in types:
+        # One row per set (or per exercise without sets), grouped back into exercises as they stream past
+        query = db.session.query(
+            WorkoutExercise.id, WorkoutExercise.workout_session_id, Exercise.name, WorkoutExercise.sets,
+            WorkoutExercise.rest_time, WorkoutExercise.completed, WorkoutExerciseSet.reps, WorkoutExerciseSet.weight
+        ).join(WorkoutSession, WorkoutExercise.workout_session_id == WorkoutSession.id).join(
+            Exercise, WorkoutExercise.exercise_id == Exercise.id
+        ).outerjoin(WorkoutExerciseSet, WorkoutExerciseSet.workout_exercise_id == WorkoutExercise.id).filter(
+            WorkoutSession.user_id == user_id
+        ).order_by(WorkoutExercise.workout_session_id, WorkoutExercise.id, WorkoutExerciseSet.set_number)
+        
+        for _, rows in itertools.groupby(query.yield_per(1000), key=lambda row: row.id):
+            rows = list(rows)
+            first = rows[0]
+            reps = [row.reps for row in rows if row.reps is not None]
+            weights = [row.weight for row in rows if row.reps is not None]
+            yield {
+                'type': 'workout_exercise',
+                'session_ref': str(first.workout_session_id),
+                'exercise': first.name,
+                'sets': first.sets,
+                'reps': reps or None,
+                'weight': weights if any(w is not None for w in weights) else None,
+                'rest_time': first.rest_time,
+                'completed': first.completed
+            }
+
+def format_history_records(records, fmt, chunk_size=64 * 1024):
+    """Serialize records as NDJSON or CSV text, yielded in chunks of roughly chunk_size characters"""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, HISTORY_CSV_HEADER, extrasaction='ignore')
+        writer.writeheader()
+    
+    for record in records:
+        if fmt == 'csv':
+            writer.writerow({
+                key: json.dumps(value) if isinstance(value, list) else str(value).lower() if isinstance(value, bool) else value
+                for key, value in record.items()
+            })
+        else:
+            buffer.write(json.dumps(record))
+            buffer.write('\n')
+        
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def history_format(value, filename=''):
+    if value:
+        fmt = value.lower()
+    else:
+        fmt = 'csv' if 'csv' in filename.lower() else 'ndjson'
+    if fmt not in ('ndjson', 'csv'):
+        raise ValueError('format must be ndjson or csv')
+    return fmt
+
+@bp.route('/api/import', methods=['POST'])
+def import_history_api():
+    """Bulk import progress, workout session and workout exercise records from an NDJSON or CSV body"""
     user_id = session.get('user_id', 1)
+    try:
+        fmt = history_format(request.args.get('format'), request.content_type or '')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Get progress data for charts
-    progress_data = Progress.query.filter_by(user_id=user_id).order_by(Progress.date).all()
-    workout_sessions = WorkoutSession.query.filter_by(user_id=user_id, completed=True).order_by(WorkoutSession.date).all()
+    default_type = request.args.get('type')
+    if default_type and default_type not in HISTORY_RECORD_COLUMNS:
+        return jsonify({'error': f'type must be one of: {", ".join(HISTORY_RECORD_COLUMNS)}'}), 400
     
-    # Calculate statistics
-    total_workouts = len(workout_sessions)
-    total_minutes = sum(s.duration_minutes for s in workout_sessions if s.duration_minutes)
-    avg_duration = total_minutes / total_workouts if total_workouts > 0 else 0
+    try:
+        # request.stream is read line by line, so large uploads are never held in memory
+        result = import_history(user_id, request.stream, fmt, default_type)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Import failed: {str(e)}'}), 500
+    return jsonify(result)
+
+@bp.route('/api/export', methods=['GET'])
+def export_history_api():
+    """Stream the user's history as NDJSON or CSV in the import format"""
+    user_id = session.get('user_id', 1)
+    try:
+        fmt = history_format(request.args.get('format') or 'ndjson')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Weight progress
-    weight_data = [{'date': p.date.isoformat(), 'weight': p.weight} for p in progress_data if p.weight]
+    types = request.args.get('types')
+    types = types.split(',') if types else list(HISTORY_RECORD_COLUMNS)
+    unknown = [t for t in types if t not in HISTORY_RECORD_COLUMNS]
+    if unknown:
+        return jsonify({'error': f"Unknown types: {', '.join(unknown)}"}), 400
     
-    # Workout frequency by month
-    from collections import defaultdict
-    monthly_workouts = defaultdict(int)
-    for workout_session in workout_sessions:
-        month_key = workout_session.date.strftime('%Y-%m')
-        monthly_workouts[month_key] += 1
+    return Response(
+        stream_with_context(format_history_records(export_history_records(user_id, types), fmt)),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=workout_history.{fmt}'}
+    )
+
+@bp.route('/api/statistics')
+@conditional_on_data_version
+def statistics_api():
+    user_id = session.get('user_id', 1)
+    return jsonify(build_statistics_payload(user_id))
+
+def build_statistics_payload(user_id):
+    """Dashboard statistics for a user: totals from their pre-aggregated rollup, plus their weigh-ins"""
+    # Read the pre-aggregated rollup (built from history on first access)
+    stats = db.session.get(UserStatistics, user_id)
+    if stats is None:
+        stats = load_user_statistics(user_id)
+        db.session.commit()
     
-    return jsonify({
+    total_workouts = stats.total_workouts
+    total_minutes = stats.total_minutes
+    avg_duration = total_minutes / total_workouts if total_workouts > 0 else 0
+    
+    return {
         'total_workouts': total_workouts,
         'total_minutes': total_minutes,
         'average_duration': round(avg_duration, 1),
-        'weight_progress': weight_data,
-        'monthly_workouts': dict(monthly_workouts),
+        # Not in the rollup on purpose: the chart needs every weigh-in, so a stored copy would be the
+        # same rows rewritten as one growing blob on each progress write. Reading them is a range scan
+        # of ix_progress_user_date (checked by check-query-plans) that touches only this user's
+        # weigh-ins and no other table, and conditional GETs skip it while the data version holds
+        'weight_progress': [{'date': d.isoformat(), 'weight': w} for d, w in weight_series(user_id)],
+        'monthly_workouts': json.loads(stats.monthly_workouts),
         'database_location': 'workoutbot.db (in project root directory)'
-    })
+    }
 
-@app.route('/api/todays-workout', methods=['GET'])
-def get_todays_workout():
+@bp.route('/api/analytics')
+def analytics_api():
+    """Weight trends, goal projection and training volume computed from the user's full history"""
+    user_id = session.get('user_id', 1)
+    try:
+        since = parse_date_arg(request.args, 'since')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        # Imported lazily so pandas is only loaded by processes that serve analytics
+        with _pandas_import_lock:
+            import analytics
+    except ImportError:
+        return jsonify({'error': 'Analytics not available. Please install numpy and pandas'}), 500
+    
+    history = load_analytics_history(user_id)
+    active_goal = Goal.query.filter_by(user_id=user_id, is_active=True).first()
+    return jsonify(analytics.build_analytics(
+        *history,
+        target_weight=active_goal.target_weight if active_goal else None,
+        target_date=active_goal.target_date if active_goal else None,
+        since=since
+    ))
+
+@bp.route('/api/exercise-progress')
+@conditional_on_data_version
+def exercise_progress_api():
+    """Per-exercise strength summary, or one exercise's daily volume / e1RM series with ?exercise_id="""
     user_id = session.get('user_id', 1)
+    exercise_id = request.args.get('exercise_id', type=int)
+    if exercise_id is None:
+        return jsonify(build_exercise_summary_payload(user_id))
+    
+    exercise = db.session.get(Exercise, exercise_id)
+    if not exercise:
+        return jsonify({'error': 'Exercise not found'}), 404
+    return jsonify(build_exercise_series_payload(user_id, exercise))
+
+def build_exercise_summary_payload(user_id):
+    """Exercises the user has logged sets for, with their records, most trained first"""
+    rows = db.session.query(
+        ExerciseDailyStats.exercise_id,
+        Exercise.name,
+        db.func.count(ExerciseDailyStats.date),
+        db.func.max(ExerciseDailyStats.date),
+        db.func.sum(ExerciseDailyStats.tonnage),
+        db.func.max(ExerciseDailyStats.best_weight),
+        db.func.max(ExerciseDailyStats.best_e1rm)
+    ).join(Exercise, ExerciseDailyStats.exercise_id == Exercise.id).filter(
+        ExerciseDailyStats.user_id == user_id
+    ).group_by(ExerciseDailyStats.exercise_id, Exercise.name).all()
+    
+    return sorted([{
+        'exercise_id': exercise_id,
+        'name': name,
+        'training_days': days,
+        'last_trained': last_date.isoformat(),
+        'total_tonnage': round(tonnage or 0, 1),
+        'best_weight': best_weight,
+        'best_e1rm': best_e1rm
+    } for exercise_id, name, days, last_date, tonnage, best_weight, best_e1rm in rows],
+        key=lambda e: (-e['training_days'], e['name']))
+
+def build_exercise_series_payload(user_id, exercise):
+    """Daily tonnage and estimated 1RM for one exercise, with the days that set a new record"""
+    rows = ExerciseDailyStats.query.filter_by(user_id=user_id, exercise_id=exercise.id).order_by(
+        ExerciseDailyStats.date
+    ).all()
+    
+    personal_records = []
+    best = 0
+    for row in rows:
+        if row.best_e1rm and row.best_e1rm > best:
+            best = row.best_e1rm
+            personal_records.append({'date': row.date.isoformat(), 'best_e1rm': row.best_e1rm})
     
+    return {
+        'exercise_id': exercise.id,
+        'name': exercise.name,
+        'dates': [row.date.isoformat() for row in rows],
+        'sets': [row.sets for row in rows],
+        'reps': [row.reps for row in rows],
+        'tonnage': [round(row.tonnage, 1) for row in rows],
+        'best_weight': [row.best_weight for row in rows],
+        'best_e1rm': [row.best_e1rm for row in rows],
+        'personal_records': personal_records
+    }
+
+def load_analytics_history(user_id):
+    """Weight and completed-session history as columns: (progress dates, weights, session dates, minutes)"""
+    weight_rows = db.session.query(Progress.date, Progress.weight).filter(
+        Progress.user_id == user_id, Progress.weight.isnot(None)
+    ).order_by(Progress.date).all()
+    session_rows = db.session.query(WorkoutSession.date, WorkoutSession.duration_minutes).filter_by(
+        user_id=user_id, completed=True
+    ).order_by(WorkoutSession.date).all()
+    
+    progress_dates, weights = zip(*weight_rows) if weight_rows else ((), ())
+    session_dates, durations = zip(*session_rows) if session_rows else ((), ())
+    return progress_dates, weights, session_dates, [d if d is not None else float('nan') for d in durations]
+
+@bp.route('/api/todays-workout', methods=['GET'])
+def get_todays_workout():
+    user_id = session.get('user_id', 1)
+    payload, status = build_todays_workout_payload(user_id)
+    return jsonify(payload), status
+
+def build_todays_workout_payload(user_id):
+    """Today's scheduled workout from the user's active plan, returned with an HTTP status"""
     # Get current day of week (0 = Monday, 6 = Sunday)
     current_day = datetime.now().weekday()
     day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -781,21 +3572,19 @@ def get_todays_workout():
     active_plan = WorkoutPlan.query.filter_by(user_id=user_id, is_active=True).order_by(WorkoutPlan.created_at.desc()).first()
     
     if not active_plan:
-        return jsonify({'error': 'No active workout plan found'}), 404
+        return {'error': 'No active workout plan found'}, 404
     
-    # Parse the workout plan to extract daily workouts
-    daily_workouts = parse_daily_workouts(active_plan.description)
-    
-    # Get workout for today based on training frequency and day
-    todays_workout = get_workout_for_day(daily_workouts, current_day, active_plan.days_per_week)
+    # Look up the plan day scheduled for today based on training frequency
+    workout_day = workout_schedule_for(active_plan.days_per_week).get(current_day)
+    todays_workout = get_parsed_plan(active_plan)['days'].get(workout_day)
     
     if not todays_workout:
-        return jsonify({
+        return {
             'day': today_name,
             'workout': None,
             'plan_id': active_plan.id,
             'is_rest_day': True
-        })
+        }, 200
     
     # Check if workout was already completed today
     today_date = datetime.now().date()
@@ -805,7 +3594,7 @@ def get_todays_workout():
         completed=True
     ).first()
     
-    return jsonify({
+    return {
         'day': today_name,
         'workout': {
             'name': todays_workout['name'],
@@ -817,6 +3606,27 @@ def get_todays_workout():
         },
         'plan_id': active_plan.id,
         'is_rest_day': False
+    }, 200
+
+@bp.route('/api/dashboard-bootstrap', methods=['GET'])
+def dashboard_bootstrap():
+    """Everything the dashboard needs on load, in one round trip"""
+    user_id = session.get('user_id', 1)
+    
+    # Shared lookups used by several panels
+    user = db.session.get(User, user_id)
+    latest_progress = get_latest_progress(user_id)
+    
+    bmi_gauge, _ = build_bmi_gauge_payload(user, latest_progress)
+    todays_workout, _ = build_todays_workout_payload(user_id)
+    
+    return jsonify({
+        'statistics': build_statistics_payload(user_id),
+        'workout_sessions': build_recent_sessions_payload(user_id),
+        'progress': build_progress_payload(user_id),
+        'goals': build_goals_payload(user_id),
+        'bmi_gauge': bmi_gauge,
+        'todays_workout': todays_workout
     })
 
 def parse_daily_workouts(plan_description):
@@ -879,11 +3689,112 @@ def extract_focus_from_name(workout_name):
     else:
         return 'Full Body'
 
-def get_workout_for_day(daily_workouts, current_day, days_per_week):
-    """Determine which workout to do based on current day and training frequency"""
+# Matches "Exercise 1: Name - Sets x Reps @ Intensity | Rest: Time" (intensity and rest optional)
+EXERCISE_LINE_PATTERN = re.compile(
+    r'^(?:Exercise\s*\d+\s*:\s*)?'
+    r'(?P<name>.+?)\s+[-–—]\s+'
+    r'(?P<sets>\d+)\s*[x×]\s*(?P<reps>[^@|]+?)'
+    r'(?:\s*@\s*(?P<intensity>[^|]+?))?'
+    r'(?:\s*\|\s*(?:Rest\s*:?\s*)?(?P<rest>.+?))?\s*$',
+    re.IGNORECASE
+)
+
+def parse_exercise_line(exercise):
+    """Split a plan exercise line into name, sets, reps, intensity and rest"""
+    match = EXERCISE_LINE_PATTERN.match(exercise)
+    if not match:
+        name = re.sub(r'^Exercise\s*\d+\s*:\s*', '', exercise, flags=re.IGNORECASE)
+        return {'name': name[:200], 'sets': None, 'reps': None, 'intensity': None, 'rest': None}
+    
+    return {
+        'name': match.group('name').strip()[:200],
+        'sets': int(match.group('sets')),
+        'reps': match.group('reps').strip()[:50],
+        'intensity': match.group('intensity').strip()[:100] if match.group('intensity') else None,
+        'rest': match.group('rest').strip()[:50] if match.group('rest') else None
+    }
+
+def store_plan_structure(plan):
+    """Parse a plan's description into WorkoutPlanDay/WorkoutPlanExercise rows (replacing any existing ones)"""
+    if plan.id is not None:
+        invalidate_parsed_plans([plan.id])
+    plan.days = []
+    daily_workouts = parse_daily_workouts(plan.description or '')
+    
+    for position, (day_label, workout) in enumerate(daily_workouts.items()):
+        plan_day = WorkoutPlanDay(
+            day_label=day_label[:20],
+            name=workout['name'][:200],
+            focus=workout['focus'],
+            position=position
+        )
+        for index, exercise in enumerate(workout['exercises']):
+            plan_day.exercises.append(WorkoutPlanExercise(position=index, description=exercise, **parse_exercise_line(exercise)))
+        plan.days.append(plan_day)
+    
+    plan.structured_at = datetime.utcnow()
+
+# Memoized parsed plans, shared by today's workout and the PDF export
+plan_cache = LRUCache(16 * 1024 * 1024)  # resized to PLAN_CACHE_MAX_BYTES by create_app
+
+PLAN_HEADER_KEYWORDS = ['day ', 'week ', 'workout']
+
+def plan_content_hash(plan):
+    return hashlib.blake2b((plan.description or '').encode(), digest_size=16).hexdigest()
+
+def get_parsed_plan(plan):
+    """A plan's days and formatted description lines, memoized per (plan id, content hash)"""
+    key = (plan.id, plan_content_hash(plan))
+    parsed_plan = plan_cache.get(key)
+    if parsed_plan is None:
+        parsed_plan = load_parsed_plan(plan)
+        plan_cache.invalidate(lambda cached_key: cached_key[0] == plan.id)
+        plan_cache.put(key, parsed_plan)
+    return parsed_plan
+
+def load_parsed_plan(plan):
+    """Read a plan's structured days (parsing it first if needed) plus its description lines"""
+    # Plans saved before structured storage are parsed once, on first use
+    if plan.structured_at is None:
+        store_plan_structure(plan)
+        db.session.commit()
+    
+    plan_days = WorkoutPlanDay.query.options(db.selectinload(WorkoutPlanDay.exercises)).filter_by(
+        workout_plan_id=plan.id
+    ).order_by(WorkoutPlanDay.position)
     
-    # Create a mapping of weekdays to workout days based on frequency
-    if days_per_week == 3:
+    lines = [
+        (line, any(keyword in line.lower() for keyword in PLAN_HEADER_KEYWORDS))
+        for line in (plan.description or '').split('\n') if line.strip()
+    ]
+    return {
+        'days': {plan_day.day_label: plan_day_payload(plan_day) for plan_day in plan_days},
+        'lines': lines
+    }
+
+def invalidate_parsed_plans(plan_ids):
+    plan_ids = set(plan_ids)
+    plan_cache.invalidate(lambda cached_key: cached_key[0] in plan_ids)
+
+def plan_day_payload(plan_day):
+    """Workout dict for a stored plan day, in the shape parse_daily_workouts produces"""
+    exercises = [e.description for e in plan_day.exercises]
+    return {
+        'name': plan_day.name,
+        'exercises': exercises,
+        'preview': '<br>'.join(f"• {exercise}" for exercise in exercises[:3]),
+        'focus': plan_day.focus
+    }
+
+def workout_schedule_for(days_per_week):
+    """Mapping of weekday (0 = Monday) to plan day label for a training frequency"""
+    if days_per_week == 1:
+        # Mon
+        workout_schedule = {0: 'Day 1'}
+    elif days_per_week == 2:
+        # Mon, Thu
+        workout_schedule = {0: 'Day 1', 3: 'Day 2'}
+    elif days_per_week == 3:
         # Mon, Wed, Fri
         workout_schedule = {0: 'Day 1', 2: 'Day 2', 4: 'Day 3'}
     elif days_per_week == 4:
@@ -895,47 +3806,458 @@ def get_workout_for_day(daily_workouts, current_day, days_per_week):
     elif days_per_week == 6:
         # Mon-Sat
         workout_schedule = {0: 'Day 1', 1: 'Day 2', 2: 'Day 3', 3: 'Day 4', 4: 'Day 5', 5: 'Day 6'}
+    elif days_per_week == 7:
+        # Every day
+        workout_schedule = {weekday: f'Day {weekday + 1}' for weekday in range(7)}
     else:
         # Default: 3 days
         workout_schedule = {0: 'Day 1', 2: 'Day 2', 4: 'Day 3'}
     
-    workout_day = workout_schedule.get(current_day)
+    return workout_schedule
+
+# Schema migrations
+# Columns the models no longer have, dropped from existing databases (needs SQLite 3.35+)
+DROPPED_COLUMNS = (
+    ('user_statistics', 'weight_progress'),  # the weight series is read from progress instead
+)
+
+# Indexes the models no longer define, which would otherwise still be maintained on every write
+DROPPED_INDEXES = (
+    'ix_workout_plan_day_plan_label',  # replaced by ix_workout_plan_day_plan_position
+)
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models (new tables, indexes and the search index)"""
+    db.create_all()
+    
+    # create_all skips tables that already exist, so add their new (nullable) columns explicitly
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    for table_name, column_name in DROPPED_COLUMNS:
+        if column_name in {column['name'] for column in inspector.get_columns(table_name)}:
+            db.session.execute(db.text(f'ALTER TABLE {table_name} DROP COLUMN {column_name}'))
+    db.session.commit()
+    
+    # ...and their missing indexes (IF NOT EXISTS, since reflection does not report expression indexes)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            db.session.execute(CreateIndex(index, if_not_exists=True))
+    for index_name in DROPPED_INDEXES:
+        db.session.execute(db.text(f'DROP INDEX IF EXISTS {index_name}'))
+    db.session.commit()
+    
+    create_exercise_search_index()
+    return migrate_json_columns()
+
+def migrate_json_columns(batch_size=1000):
+    """Move legacy JSON-in-text columns into their child tables, clearing each column once moved"""
+    moved = defaultdict(int)
+    
+    # Each pass picks up rows whose legacy column is still set, so the loop is safe to resume
+    while True:
+        goals = db.session.query(Goal.id, Goal.preferred_exercises, Goal.equipment_available).filter(
+            or_(Goal.preferred_exercises.isnot(None), Goal.equipment_available.isnot(None))
+        ).limit(batch_size).all()
+        if not goals:
+            break
+        preferred = [{'goal_id': goal_id, 'position': i, 'name': str(name)[:100]}
+                     for goal_id, names, _ in goals for i, name in enumerate(load_json_list(names))]
+        equipment = [{'goal_id': goal_id, 'position': i, 'equipment': equipment_key(item)}
+                     for goal_id, _, items in goals for i, item in enumerate(load_json_list(items))]
+        if preferred:
+            db.session.execute(insert(GoalPreferredExercise), preferred)
+        if equipment:
+            db.session.execute(insert(GoalEquipment), equipment)
+        db.session.execute(update(Goal).where(Goal.id.in_([g.id for g in goals])).values(
+            preferred_exercises=None, equipment_available=None
+        ))
+        db.session.commit()
+        moved['goals'] += len(goals)
+    
+    while True:
+        exercises = db.session.query(Exercise.id, Exercise.muscle_groups).filter(
+            Exercise.muscle_groups.isnot(None)
+        ).limit(batch_size).all()
+        if not exercises:
+            break
+        muscle_groups = {(exercise_id, str(group).strip().lower()[:50])
+                         for exercise_id, groups in exercises for group in load_json_list(groups) if str(group).strip()}
+        if muscle_groups:
+            db.session.execute(insert(ExerciseMuscleGroup), [
+                {'exercise_id': exercise_id, 'muscle_group': group} for exercise_id, group in muscle_groups
+            ])
+        db.session.execute(update(Exercise).where(Exercise.id.in_([e.id for e in exercises])).values(muscle_groups=None))
+        db.session.commit()
+        moved['exercises'] += len(exercises)
+    
+    while True:
+        workout_exercises = db.session.query(
+            WorkoutExercise.id, WorkoutExercise.sets, WorkoutExercise.reps, WorkoutExercise.weight
+        ).filter(or_(WorkoutExercise.reps.isnot(None), WorkoutExercise.weight.isnot(None))).limit(batch_size).all()
+        if not workout_exercises:
+            break
+        set_rows = [
+            {'workout_exercise_id': exercise_id, 'set_number': number, 'reps': set_reps, 'weight': weight}
+            for exercise_id, sets, reps, weights in workout_exercises
+            for number, (set_reps, weight) in enumerate(expand_sets(sets, load_json_list(reps), load_json_list(weights)), 1)
+        ]
+        if set_rows:
+            db.session.execute(insert(WorkoutExerciseSet), set_rows)
+        db.session.execute(update(WorkoutExercise).where(
+            WorkoutExercise.id.in_([e.id for e in workout_exercises])
+        ).values(reps=None, weight=None))
+        db.session.commit()
+        moved['workout_exercises'] += len(workout_exercises)
     
-    if workout_day and workout_day in daily_workouts:
-        return daily_workouts[workout_day]
+    # Equipment is compared by key, so bring free-form exercise equipment names in line
+    for exercise_id, equipment in db.session.query(Exercise.id, Exercise.equipment_needed).filter(
+        Exercise.equipment_needed.isnot(None)
+    ):
+        if equipment != equipment_key(equipment):
+            db.session.execute(update(Exercise).where(Exercise.id == exercise_id).values(
+                equipment_needed=equipment_key(equipment)
+            ))
+    db.session.commit()
+    return dict(moved)
+
+def query_plan_audit_queries(user_id=1):
+    """Representative per-user queries issued by the API routes, keyed by route/purpose"""
+    today = datetime.now().date()
+    return {
+        'latest progress (bmi-gauge, chatbot, plan generation)':
+            Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc()).limit(1),
+        'progress list (GET /api/progress)':
+            Progress.query.filter_by(user_id=user_id).order_by(Progress.date.desc(), Progress.id.desc()),
+        'progress page (GET /api/progress?cursor=)':
+            Progress.query.filter(Progress.user_id == user_id, or_(
+                Progress.date < today, and_(Progress.date == today, Progress.id < 100)
+            )).order_by(Progress.date.desc(), Progress.id.desc()).limit(51),
+        "today's progress (PUT /api/user/update)":
+            Progress.query.filter_by(user_id=user_id, date=today),
+        'weight series (GET /api/statistics)':
+            db.session.query(Progress.date, Progress.weight).filter(
+                Progress.user_id == user_id, Progress.weight.isnot(None)
+            ).order_by(Progress.date, Progress.id),
+        'active goal (GET /api/goals)':
+            Goal.query.filter_by(user_id=user_id, is_active=True),
+        'plan list (GET /api/workout-plans)':
+            WorkoutPlan.query.filter_by(user_id=user_id).order_by(WorkoutPlan.created_at.desc(), WorkoutPlan.id.desc()),
+        'plan page (GET /api/workout-plans?cursor=)':
+            WorkoutPlan.query.filter(WorkoutPlan.user_id == user_id, or_(
+                WorkoutPlan.created_at < datetime(today.year, today.month, today.day),
+                and_(WorkoutPlan.created_at == datetime(today.year, today.month, today.day), WorkoutPlan.id < 100)
+            )).order_by(WorkoutPlan.created_at.desc(), WorkoutPlan.id.desc()).limit(51),
+        'active plan (GET /api/todays-workout)':
+            WorkoutPlan.query.filter_by(user_id=user_id, is_active=True).order_by(WorkoutPlan.created_at.desc()).limit(1),
+        'recent sessions (GET /api/workout-sessions)':
+            WorkoutSession.query.filter_by(user_id=user_id).order_by(WorkoutSession.date.desc()).limit(10),
+        'completed sessions (statistics rollup)':
+            db.session.query(WorkoutSession.date, WorkoutSession.duration_minutes).filter_by(user_id=user_id, completed=True),
+        "today's completed session (GET /api/todays-workout)":
+            WorkoutSession.query.filter_by(user_id=user_id, date=today, completed=True),
+        'plan sessions (DELETE /api/workout-plans/<id>)':
+            WorkoutSession.query.filter_by(workout_plan_id=1, user_id=user_id),
+        'session exercises (DELETE /api/workout-sessions/<id>)':
+            WorkoutExercise.query.filter_by(workout_session_id=1),
+        'exercise summary (GET /api/exercise-progress)':
+            db.session.query(ExerciseDailyStats.exercise_id, db.func.max(ExerciseDailyStats.best_e1rm)).filter(
+                ExerciseDailyStats.user_id == user_id
+            ).group_by(ExerciseDailyStats.exercise_id),
+        'exercise series (GET /api/exercise-progress?exercise_id=)':
+            ExerciseDailyStats.query.filter_by(user_id=user_id, exercise_id=1).order_by(ExerciseDailyStats.date),
+        'exercises for available equipment (GET /api/exercises?available_equipment=1)':
+            Exercise.query.filter(Exercise.equipment_needed.in_(
+                select(GoalEquipment.equipment).where(GoalEquipment.goal_id == 1)
+            )),
+        'exercises by muscle group (GET /api/exercises?muscle_group=)':
+            Exercise.query.filter(Exercise.id.in_(
+                select(ExerciseMuscleGroup.exercise_id).where(ExerciseMuscleGroup.muscle_group.in_(['chest']))
+            )),
+        'exercise by name (find_or_create_exercise)':
+            Exercise.query.filter(db.func.lower(Exercise.name) == 'bench press'),
+        'exercises by difficulty (GET /api/exercises?difficulty=)':
+            Exercise.query.filter(Exercise.difficulty_level == 'beginner'),
+        'name prefix (GET /api/exercises/autocomplete)':
+            db.session.query(Exercise.id, Exercise.name).filter(
+                db.func.lower(Exercise.name) >= 'ben', db.func.lower(Exercise.name) < 'beo'
+            ).order_by(db.func.lower(Exercise.name)).limit(10),
+        'exercise sets (exercise stats refresh)':
+            db.session.query(WorkoutExerciseSet).filter(WorkoutExerciseSet.workout_exercise_id.in_([1, 2, 3])),
+        'plan days (parsed plan cache miss)':
+            WorkoutPlanDay.query.filter_by(workout_plan_id=1).order_by(WorkoutPlanDay.position),
+        'plan day exercises (parsed plan cache miss)':
+            WorkoutPlanExercise.query.filter(WorkoutPlanExercise.plan_day_id.in_([1, 2, 3])).order_by(
+                WorkoutPlanExercise.plan_day_id, WorkoutPlanExercise.position
+            ),
+    }
+
+def explain_query_plan(query):
+    """Return SQLite's EXPLAIN QUERY PLAN detail lines for an ORM query"""
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+def query_plan_problems(plan_lines):
+    """Pick out plan steps that fall back to a table scan or a temporary sort"""
+    return [line for line in plan_lines if line.startswith('SCAN') or 'TEMP B-TREE' in line]
+
+# Query count audit: endpoints returning or deleting sessions must not issue queries per row
+QUERY_COUNT_AUDIT_SIZES = ((2, 2), (8, 5))  # (sessions, exercises per session)
+
+@contextmanager
+def counting_queries():
+    """Collect the SQL statements executed on the engine while the block runs"""
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'after_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', record)
+
+def query_count_audit(sessions, exercises_per_session):
+    """Statements issued by each audited request for a throwaway user with this much history"""
+    user = User(name='query-count-audit', height=70, age=30, gender='male', fitness_level='intermediate')
+    db.session.add(user)
+    db.session.flush()
+    plan = WorkoutPlan(user_id=user.id, name='Query count audit', goal_type='strength', duration_weeks=4,
+                       days_per_week=3, description='Day 1: Full Body\n• Exercise 1: Squats - 3 x 5 @ RPE 8 | Rest: 2 min')
+    db.session.add(plan)
+    db.session.commit()
+    user_id, plan_id = user.id, plan.id
+    names = [name for name, in db.session.query(Exercise.name).order_by(Exercise.id).limit(exercises_per_session)]
     
-    return None
+    client = current_app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+    try:
+        for number in range(sessions):
+            client.post('/api/workout-sessions', json={
+                'date': (datetime(2020, 1, 1) + timedelta(days=number)).strftime('%Y-%m-%d'),
+                'name': f'Session {number + 1}', 'workout_plan_id': plan_id, 'duration_minutes': 45, 'completed': True,
+                'exercises': [{'exercise': name, 'sets': 3, 'reps': [8, 8, 6], 'weight': [100, 100, 110]} for name in names]
+            })
+        session_id = db.session.query(db.func.max(WorkoutSession.id)).filter_by(user_id=user_id).scalar()
+        
+        counts = {}
+        for name, method, url in [
+            ('recent sessions with exercises', 'GET', '/api/workout-sessions?include=exercises'),
+            ('session detail', 'GET', f'/api/workout-sessions/{session_id}'),
+            ('dashboard bootstrap', 'GET', '/api/dashboard-bootstrap'),
+            ('delete session', 'DELETE', f'/api/workout-sessions/{session_id}'),
+            ('delete plan', 'DELETE', f'/api/workout-plans/{plan_id}'),
+        ]:
+            db.session.remove()  # start each request with an empty identity map, as a real request would
+            with counting_queries() as statements:
+                response = client.open(url, method=method)
+            if response.status_code != 200:
+                raise click.ClickException(f'{method} {url} returned {response.status_code}')
+            counts[name] = statements
+        return counts
+    finally:
+        db.session.rollback()
+        session_ids = select(WorkoutSession.id).where(WorkoutSession.user_id == user_id)
+        delete_session_exercises(session_ids)
+        WorkoutSession.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        delete_plan_structure(select(WorkoutPlan.id).where(WorkoutPlan.user_id == user_id))
+        WorkoutPlan.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        UserStatistics.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        ExerciseDailyStats.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        UserDataVersion.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        User.query.filter_by(id=user_id).delete(synchronize_session=False)
+        db.session.commit()
 
 # Initialize database
 def init_db():
-    with app.app_context():
-        db.create_all()
-        
-        # Add sample exercises if none exist
-        if Exercise.query.count() == 0:
-            sample_exercises = [
-                Exercise(name="Push-ups", category="chest", muscle_groups=json.dumps(["chest", "triceps", "shoulders"]), 
-                        equipment_needed="bodyweight", difficulty_level="beginner",
-                        instructions="Start in plank position, lower body until chest nearly touches floor, push back up"),
-                Exercise(name="Squats", category="legs", muscle_groups=json.dumps(["quadriceps", "glutes", "hamstrings"]),
-                        equipment_needed="bodyweight", difficulty_level="beginner",
-                        instructions="Stand with feet shoulder-width apart, lower into sitting position, return to standing"),
-                Exercise(name="Deadlifts", category="back", muscle_groups=json.dumps(["hamstrings", "glutes", "back"]),
-                        equipment_needed="barbell", difficulty_level="intermediate",
-                        instructions="Stand with feet hip-width apart, hinge at hips to lower bar, return to standing"),
-                Exercise(name="Pull-ups", category="back", muscle_groups=json.dumps(["lats", "biceps", "rhomboids"]),
-                        equipment_needed="pull-up bar", difficulty_level="intermediate",
-                        instructions="Hang from bar with palms facing away, pull body up until chin over bar, lower with control"),
-                Exercise(name="Plank", category="core", muscle_groups=json.dumps(["core", "shoulders"]),
-                        equipment_needed="bodyweight", difficulty_level="beginner",
-                        instructions="Hold push-up position on forearms, keep body straight, engage core")
-            ]
-            
-            for exercise in sample_exercises:
-                db.session.add(exercise)
-            
-            db.session.commit()
+    """Bring the schema up to date and seed the exercise catalog; run inside an app context"""
+    upgrade_schema()
+    
+    # Add sample exercises if none exist
+    if db.session.query(Exercise.id).first() is None:
+        sample_exercises = [
+            Exercise(name="Push-ups", category="chest", muscle_group_items=muscle_group_rows("chest", "triceps", "shoulders"), 
+                    equipment_needed="bodyweight", difficulty_level="beginner",
+                    instructions="Start in plank position, lower body until chest nearly touches floor, push back up"),
+            Exercise(name="Squats", category="legs", muscle_group_items=muscle_group_rows("quadriceps", "glutes", "hamstrings"),
+                    equipment_needed="bodyweight", difficulty_level="beginner",
+                    instructions="Stand with feet shoulder-width apart, lower into sitting position, return to standing"),
+            Exercise(name="Deadlifts", category="back", muscle_group_items=muscle_group_rows("hamstrings", "glutes", "back"),
+                    equipment_needed="barbell", difficulty_level="intermediate",
+                    instructions="Stand with feet hip-width apart, hinge at hips to lower bar, return to standing"),
+            Exercise(name="Pull-ups", category="back", muscle_group_items=muscle_group_rows("lats", "biceps", "rhomboids"),
+                    equipment_needed="pull_up_bar", difficulty_level="intermediate",
+                    instructions="Hang from bar with palms facing away, pull body up until chin over bar, lower with control"),
+            Exercise(name="Plank", category="core", muscle_group_items=muscle_group_rows("core", "shoulders"),
+                    equipment_needed="bodyweight", difficulty_level="beginner",
+                    instructions="Hold push-up position on forearms, keep body straight, engage core")
+        ]
+        
+        for exercise in sample_exercises:
+            db.session.add(exercise)
+        
+        db.session.commit()
 
-if __name__ == '__main__':
+@bp.cli.command('rebuild-statistics')
+@click.option('--user-id', type=int, help='Only rebuild the rollup for this user')
+def rebuild_statistics_command(user_id):
+    """Backfill statistics rollups from existing progress and session rows"""
+    user_ids = [user_id] if user_id else [u.id for u in User.query.with_entities(User.id)]
+    for uid in user_ids:
+        rebuild_user_statistics(uid)
+        bump_data_version(uid)
+    db.session.commit()
+    click.echo(f'Rebuilt statistics for {len(user_ids)} user(s)')
+
+@bp.cli.command('rebuild-exercise-stats')
+@click.option('--user-id', type=int, help='Only rebuild the stats for this user')
+def rebuild_exercise_stats_command(user_id):
+    """Recompute per-exercise volume, estimated 1RM and records from logged sets"""
+    started = time.perf_counter()
+    count = rebuild_exercise_stats(user_id)
+    for uid in [user_id] if user_id else [u.id for u in User.query.with_entities(User.id)]:
+        bump_data_version(uid)
+    db.session.commit()
+    click.echo(f'Rebuilt {count} exercise day(s) in {time.perf_counter() - started:.2f}s')
+
+@bp.cli.command('check-statistics')
+@click.option('--user-id', type=int, help='Only check the rollup for this user')
+def check_statistics_command(user_id):
+    """Verify statistics rollups match the underlying history"""
+    user_ids = [user_id] if user_id else [u.id for u in User.query.with_entities(User.id)]
+    inconsistent = 0
+    for uid in user_ids:
+        mismatches = statistics_mismatches(uid)
+        if mismatches:
+            inconsistent += 1
+            click.echo(f'User {uid}: {", ".join(mismatches)}')
+    
+    if inconsistent:
+        raise click.ClickException(f'{inconsistent} of {len(user_ids)} rollup(s) inconsistent; run rebuild-statistics')
+    click.echo(f'All {len(user_ids)} rollup(s) consistent')
+
+@bp.cli.command('backfill-plan-structure')
+@click.option('--batch-size', default=100, show_default=True, help='Plans parsed per transaction')
+@click.option('--all', 'reparse_all', is_flag=True, help='Re-parse plans that already have structured days')
+def backfill_plan_structure_command(batch_size, reparse_all):
+    """Parse existing workout plans into structured day/exercise rows"""
+    query = WorkoutPlan.query if reparse_all else WorkoutPlan.query.filter(WorkoutPlan.structured_at.is_(None))
+    plan_ids = [row.id for row in query.with_entities(WorkoutPlan.id)]
+    
+    for start in range(0, len(plan_ids), batch_size):
+        user_ids = set()
+        for plan in WorkoutPlan.query.filter(WorkoutPlan.id.in_(plan_ids[start:start + batch_size])):
+            store_plan_structure(plan)
+            user_ids.add(plan.user_id)
+        for uid in user_ids:
+            bump_data_version(uid)
+        db.session.commit()
+    click.echo(f'Structured {len(plan_ids)} workout plan(s)')
+
+@bp.cli.command('import-history')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option('--user-id', type=int, default=1, show_default=True, help='User the records belong to')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), help='Input format (default: from the file extension)')
+@click.option('--type', 'default_type', type=click.Choice(list(HISTORY_RECORD_COLUMNS)), help='Record type for rows without one')
+@click.option('--batch-size', type=int, help='Records inserted per transaction')
+def import_history_command(path, user_id, fmt, default_type, batch_size):
+    """Bulk import history records from an NDJSON or CSV file"""
+    started = time.perf_counter()
+    with click.open_file(path, 'rb') as f:
+        result = import_history(user_id, f, fmt or history_format(None, path), default_type, batch_size)
+    
+    for error in result['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    counts = ', '.join(f'{count} {record_type}' for record_type, count in result['imported'].items()) or 'nothing'
+    click.echo(f"Imported {counts} in {time.perf_counter() - started:.2f}s ({result['error_count']} rejected)")
+
+@bp.cli.command('export-history')
+@click.option('--user-id', type=int, default=1, show_default=True, help='User to export')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--output', '-o', default='-', show_default=True, help='Output file')
+def export_history_command(user_id, fmt, output):
+    """Stream a user's history to a file in the import format"""
+    with click.open_file(output, 'w') as f:
+        for chunk in format_history_records(export_history_records(user_id), fmt):
+            f.write(chunk)
+
+@bp.cli.command('load-exercises')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option('--format', 'fmt', type=click.Choice(['json', 'ndjson', 'csv']), help='Input format (default: from the file extension)')
+@click.option('--batch-size', type=int, help='Exercises inserted per transaction')
+def load_exercises_command(path, fmt, batch_size):
+    """Bulk load exercises into the catalog from a JSON array, NDJSON or CSV file"""
+    fmt = fmt or ('json' if path.lower().endswith('.json') else history_format(None, path))
+    started = time.perf_counter()
+    with click.open_file(path, 'rb') as f:
+        if fmt == 'json':
+            records = enumerate(json.load(f), 1)
+        else:
+            records = read_history_records(f, fmt)
+        result = load_exercise_catalog(records, batch_size)
+    
+    for error in result['errors']:
+        click.echo(f"record {error['line']}: {error['error']}", err=True)
+    click.echo(f"Loaded {result['loaded']} exercise(s) in {time.perf_counter() - started:.2f}s "
+               f"({result['skipped']} already in the catalog, {result['error_count']} rejected)")
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the schema and seed the exercise catalog if it is empty"""
     init_db()
+    click.echo('Database initialized')
+
+@bp.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables and indexes on an existing database and migrate legacy JSON columns"""
+    moved = upgrade_schema()
+    for kind, count in moved.items():
+        click.echo(f'Moved JSON columns of {count} {kind.replace("_", " ")} into child tables')
+    click.echo('Database schema is up to date')
+
+@bp.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any hot per-user query is planned as a full scan instead of an index search"""
+    failures = 0
+    for name, query in query_plan_audit_queries().items():
+        plan_lines = explain_query_plan(query)
+        problems = query_plan_problems(plan_lines)
+        status = 'SCAN' if problems else 'ok'
+        click.echo(f'[{status}] {name}: {"; ".join(plan_lines)}')
+        failures += bool(problems)
+    
+    if failures:
+        raise click.ClickException(f'{failures} query plan(s) fall back to a scan')
+
+@bp.cli.command('check-query-counts')
+@click.option('--show-sql', is_flag=True, help='Print the statements of endpoints whose count changes')
+def check_query_counts_command(show_sql):
+    """Fail if an endpoint's query count grows with the number of sessions it returns or deletes"""
+    runs = [(sizes, query_count_audit(*sizes)) for sizes in QUERY_COUNT_AUDIT_SIZES]
+    failures = 0
+    for name in runs[0][1]:
+        counts = [len(statements[name]) for _, statements in runs]
+        status = 'ok' if len(set(counts)) == 1 else 'N+1'
+        click.echo(f'[{status}] {name}: ' + ', '.join(
+            f'{len(statements[name])} queries with {sessions} sessions x {exercises} exercises'
+            for (sessions, exercises), statements in runs
+        ))
+        if status != 'ok':
+            failures += 1
+            if show_sql:
+                for statement in runs[-1][1][name]:
+                    click.echo('    ' + ' '.join(statement.split()))
+    
+    if failures:
+        raise click.ClickException(f'{failures} endpoint(s) issue more queries as the data grows')
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        init_db()
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Benchmark for analytics.py against a naive per-row Python implementation.
+
+Builds ten years of daily weigh-ins and a session every other day, runs the
+vectorized ``analytics.build_analytics`` and an equivalent pure-Python loop
+implementation, checks that both agree and reports the timings::
+
+    python -m benchmarks.analytics --years 10 --repeat 5
+"""
+import argparse
+import math
+import random
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import analytics
+
+
+def synthetic_history(years, seed=0):
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365 * years)
+    progress_dates, weights, session_dates, durations = [], [], [], []
+    weight = 210.0
+    for offset in range(365 * years):
+        day = start + timedelta(days=offset)
+        weight += rng.gauss(-0.01, 0.4)
+        progress_dates.append(day)
+        weights.append(round(weight, 1))
+        if offset % 2 == 0:
+            session_dates.append(day)
+            durations.append(rng.randint(30, 90))
+    return progress_dates, weights, session_dates, durations
+
+
+def naive_analytics(progress_dates, weights, session_dates, durations):
+    """Row-at-a-time reimplementation of analytics.build_analytics (weight part and volume)"""
+    daily = OrderedDict()
+    for day, weight in sorted(zip(progress_dates, weights)):
+        daily.setdefault(day, []).append(weight)
+    days = list(daily)
+    values = [sum(v) / len(v) for v in daily.values()]
+
+    averages = {}
+    for window in analytics.MOVING_AVERAGE_WINDOWS:
+        series = []
+        for i, day in enumerate(days):
+            window_values = [values[j] for j in range(i + 1) if (day - days[j]).days < window]
+            series.append(sum(window_values) / len(window_values))
+        averages[f'moving_average_{window}d'] = series
+
+    weeks = OrderedDict()
+    for day, value in zip(days, values):
+        weeks.setdefault(day - timedelta(days=day.weekday()), []).append(value)
+    week_days = list(weeks)
+    week_means = [sum(v) / len(v) for v in weeks.values()]
+    change = [None] + [
+        (week_means[i] - week_means[i - 1]) / ((week_days[i] - week_days[i - 1]).days / 7)
+        for i in range(1, len(week_means))
+    ]
+
+    # Ordinary least squares over the projection window
+    cutoff = days[-1] - timedelta(days=analytics.PROJECTION_WINDOW_DAYS)
+    points = [((day - cutoff).days, value) for day, value in zip(days, values) if day >= cutoff]
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / sum((x - mean_x) ** 2 for x, _ in points)
+    trend_weight = mean_y + slope * (points[-1][0] - mean_x)
+
+    minutes = OrderedDict()
+    for day, duration in zip(session_dates, durations):
+        week = day - timedelta(days=day.weekday())
+        minutes[week] = minutes.get(week, 0) + duration
+
+    return {
+        'averages': averages,
+        'weekly_change': change,
+        'slope': slope,
+        'trend_weight': trend_weight,
+        'weekly_minutes': list(minutes.values())
+    }
+
+
+def assert_close(vectorized, naive, places=2):
+    for name, series in naive['averages'].items():
+        for a, b in zip(vectorized['weight'][name], series):
+            assert math.isclose(a, round(b, places), abs_tol=10 ** -places), (name, a, b)
+    for a, b in zip(vectorized['weekly_change']['change_per_week'][1:], naive['weekly_change'][1:]):
+        assert math.isclose(a, round(b, places), abs_tol=10 ** -places), ('weekly_change', a, b)
+    projection = vectorized['goal_projection']
+    assert math.isclose(projection['rate_per_week'], round(naive['slope'] * 7, 2), abs_tol=0.01)
+    assert math.isclose(projection['trend_weight'], round(naive['trend_weight'], 2), abs_tol=0.01)
+    nonzero = [m for m in vectorized['training_volume']['minutes'] if m]
+    assert nonzero == [float(m) for m in naive['weekly_minutes']]
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.years)
+    target_weight, target_date = 150.0, date.today() + timedelta(days=365)
+    print(f'{len(history[0])} weigh-ins, {len(history[2])} sessions')
+
+    vectorized_time, vectorized = best_of(
+        lambda: analytics.build_analytics(*history, target_weight=target_weight, target_date=target_date), args.repeat
+    )
+    naive_time, naive = best_of(
+        lambda: naive_analytics(*history), max(1, args.repeat // 5)
+    )
+    assert_close(vectorized, naive)
+
+    print(f'vectorized: {vectorized_time * 1000:8.1f} ms')
+    print(f'naive:      {naive_time * 1000:8.1f} ms  ({naive_time / vectorized_time:.0f}x slower)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Micro-benchmark for /api/bmi-gauge rendering.
+
+Compares three ways of producing the gauge payload for a set of
+(weight, height) profiles:
+
+* ``plotly``   - build a ``go.Figure`` and serialize it with PlotlyJSONEncoder
+* ``template`` - patch the precomputed figure template (a cache miss)
+* ``cached``   - ``build_bmi_gauge_payload`` with a warm cache (a cache hit)
+
+It also checks that the template path produces byte-identical JSON::
+
+    python -m benchmarks.bmi_gauge --iterations 2000 --profiles 50
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+import app
+
+
+def profile_inputs(count, seed=0):
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(count):
+        weight = round(rng.uniform(110, 300), 1)
+        height = round(rng.uniform(58, 78), 1)
+        bmi = app.calculate_bmi(weight, height)
+        category, color = app.bmi_category(bmi)
+        inputs.append((bmi, category, color, weight, height))
+    return inputs
+
+
+def time_per_call(func, inputs, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(inputs[i % len(inputs)])
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BMI gauge rendering paths')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--profiles', type=int, default=50,
+                        help='distinct (weight, height) pairs cycled through')
+    args = parser.parse_args()
+
+    inputs = profile_inputs(args.profiles)
+
+    mismatches = sum(app.build_bmi_gauge_figure(*i) != app.render_bmi_gauge_figure(*i) for i in inputs)
+    print(f'Output check: {len(inputs) - mismatches}/{len(inputs)} profiles identical to the Plotly path')
+
+    def cached(i):
+        user = SimpleNamespace(height=i[4])
+        latest_progress = SimpleNamespace(weight=i[3])
+        app.build_bmi_gauge_payload(user, latest_progress)
+
+    app.bmi_gauge_cache.clear()
+    for i in inputs:
+        cached(i)  # warm the cache
+
+    results = {
+        'plotly': time_per_call(lambda i: app.build_bmi_gauge_figure(*i), inputs, max(args.iterations // 10, 1)),
+        'template': time_per_call(lambda i: app.render_bmi_gauge_figure(*i), inputs, args.iterations),
+        'cached': time_per_call(cached, inputs, args.iterations),
+    }
+
+    baseline = results['plotly']
+    print(f'{"path":<10}{"per call":>14}{"speedup":>12}')
+    for name, seconds in results.items():
+        print(f'{name:<10}{seconds * 1e6:>11.1f} us{baseline / seconds:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Throughput benchmark for the bulk history import/export pipeline.
+
+Generates a synthetic multi-year history (daily progress entries, workout
+sessions with nested exercises) as NDJSON, imports it for a throwaway user
+through ``import_history``, streams it back out with ``export_history_records``
+and then deletes the user's rows again::
+
+    python -m benchmarks.bulk_import --rows 100000 --batch-size 2000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+import app
+
+EXERCISES = ['Bench Press', 'Squat', 'Deadlift', 'Overhead Press', 'Barbell Row', 'Pull-ups', 'Lunges', 'Dips']
+
+
+def history_lines(rows, seed=0):
+    """Yield roughly ``rows`` NDJSON lines (as bytes), counting nested exercises as rows"""
+    rng = random.Random(seed)
+    day = date(2000, 1, 1)
+    weight = 200.0
+    produced = 0
+    while produced < rows:
+        weight += rng.uniform(-0.6, 0.5)
+        yield json.dumps({'type': 'progress', 'date': day.isoformat(), 'weight': round(weight, 1)}).encode() + b'\n'
+        produced += 1
+
+        exercises = [{
+            'exercise': name,
+            'sets': 3,
+            'reps': [rng.randint(5, 12) for _ in range(3)],
+            'weight': [rng.choice(range(45, 315, 5))] * 3
+        } for name in rng.sample(EXERCISES, 5)]
+        yield json.dumps({
+            'type': 'workout_session',
+            'date': day.isoformat(),
+            'name': 'Training Session',
+            'duration_minutes': rng.randint(30, 90),
+            'exercises': exercises
+        }).encode() + b'\n'
+        produced += 1 + len(exercises)
+        day += timedelta(days=1)
+
+
+def delete_user_history(user_id):
+    db = app.db
+    app.delete_session_exercises(select(app.WorkoutSession.id).where(app.WorkoutSession.user_id == user_id))
+    app.WorkoutSession.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    app.Progress.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    app.UserStatistics.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    app.ExerciseDailyStats.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    app.User.query.filter_by(id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--keep', action='store_true', help='Leave the imported rows in the database')
+    args = parser.parse_args()
+
+    with app.create_app().app_context():
+        app.init_db()
+        user = app.User(name='bulk-import-benchmark')
+        app.db.session.add(user)
+        app.db.session.commit()
+
+        try:
+            lines = list(history_lines(args.rows))
+            started = time.perf_counter()
+            result = app.import_history(user.id, lines, 'ndjson', batch_size=args.batch_size)
+            import_seconds = time.perf_counter() - started
+            imported = sum(result['imported'].values())
+            print(f'import: {imported} rows in {import_seconds:.2f}s ({imported / import_seconds:,.0f} rows/s), '
+                  f'{result["error_count"]} rejected')
+
+            for fmt in ('ndjson', 'csv'):
+                started = time.perf_counter()
+                size = sum(len(chunk) for chunk in app.format_history_records(app.export_history_records(user.id), fmt))
+                export_seconds = time.perf_counter() - started
+                print(f'export ({fmt}): {size / 1e6:.1f} MB in {export_seconds:.2f}s')
+
+            mismatches = app.statistics_mismatches(user.id)
+            print(f'statistics rollup: {"consistent" if not mismatches else ", ".join(mismatches)}')
+        finally:
+            if not args.keep:
+                delete_user_history(user.id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Latency benchmark for exercise catalog search and autocomplete.
+
+Loads a synthetic catalog of tens of thousands of exercises through
+``load_exercise_catalog``, then times full-text search, faceted filtering and
+prefix autocomplete through the API routes, reporting p50/p95 per query kind.
+The synthetic exercises are deleted again afterwards::
+
+    python -m benchmarks.exercise_search --exercises 50000 --repeat 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+import app
+
+MODIFIERS = ['Incline', 'Decline', 'Seated', 'Standing', 'Single-Arm', 'Alternating', 'Paused', 'Tempo', 'Wide-Grip',
+             'Close-Grip', 'Kneeling', 'Reverse', 'Deficit', 'Banded', 'Isometric', 'Explosive', 'Split', 'Sumo']
+EQUIPMENT = ['Barbell', 'Dumbbell', 'Kettlebell', 'Cable', 'Machine', 'Band', 'Smith Machine', 'Landmine', 'Bodyweight']
+MOVEMENTS = {
+    'chest': ['Bench Press', 'Fly', 'Push-up', 'Chest Press', 'Dip'],
+    'back': ['Row', 'Pulldown', 'Pull-up', 'Deadlift', 'Pullover', 'Shrug'],
+    'legs': ['Squat', 'Lunge', 'Leg Press', 'Step-up', 'Hip Thrust', 'Calf Raise', 'Leg Curl'],
+    'shoulders': ['Overhead Press', 'Lateral Raise', 'Front Raise', 'Face Pull', 'Arnold Press'],
+    'arms': ['Curl', 'Triceps Extension', 'Skull Crusher', 'Hammer Curl', 'Kickback'],
+    'core': ['Plank', 'Crunch', 'Russian Twist', 'Leg Raise', 'Rollout', 'Woodchop'],
+}
+MUSCLES = {
+    'chest': ['chest', 'triceps', 'shoulders'], 'back': ['lats', 'rhomboids', 'biceps', 'back'],
+    'legs': ['quadriceps', 'glutes', 'hamstrings', 'calves'], 'shoulders': ['shoulders', 'traps'],
+    'arms': ['biceps', 'triceps', 'forearms'], 'core': ['core', 'obliques'],
+}
+SEARCHES = ['bench', 'press', 'incline dumbbell', 'row', 'squat barbell', 'curl hammer', 'hold brace', 'kettlebell sw']
+PREFIXES = ['b', 'be', 'ben', 'inc', 'incline d', 'sq', 'dumbbell r', 'hip', 'cable f', 'zzz']
+
+
+def catalog_records(count, seed=0):
+    """Yield (record number, record) pairs of distinct synthetic exercises"""
+    rng = random.Random(seed)
+    for number in range(1, count + 1):
+        category = rng.choice(list(MOVEMENTS))
+        equipment = rng.choice(EQUIPMENT)
+        name = f'{rng.choice(MODIFIERS)} {equipment} {rng.choice(MOVEMENTS[category])} #{number}'
+        yield number, {
+            'name': name,
+            'category': category,
+            'equipment_needed': equipment,
+            'difficulty_level': rng.choice(['beginner', 'intermediate', 'advanced']),
+            'muscle_groups': rng.sample(MUSCLES[category], 2),
+            'instructions': f'Set up the {equipment.lower()}, brace your core and move through a full range of motion.',
+            'tips': rng.choice(['Hold the top position for a second', 'Control the eccentric', 'Keep a neutral spine']),
+        }
+
+
+def percentiles(timings):
+    cuts = statistics.quantiles(timings, n=100)
+    return cuts[49] * 1000, cuts[94] * 1000
+
+
+def time_route(client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, (url, response.status_code)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--exercises', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--keep', action='store_true', help='Leave the synthetic exercises in the catalog')
+    args = parser.parse_args()
+
+    application = app.create_app()
+    with application.app_context():
+        app.init_db()
+        first_id = (app.db.session.query(app.db.func.max(app.Exercise.id)).scalar() or 0) + 1
+        client = application.test_client()
+        try:
+            started = time.perf_counter()
+            result = app.load_exercise_catalog(catalog_records(args.exercises))
+            seconds = time.perf_counter() - started
+            print(f'load: {result["loaded"]} exercises in {seconds:.2f}s ({result["loaded"] / seconds:,.0f}/s), '
+                  f'full-text index: {"fts5" if app.exercise_search_available() else "unavailable (LIKE fallback)"}')
+
+            kinds = {
+                'search': [f'/api/exercises?q={q}&limit=20' for q in SEARCHES],
+                'search + filters': [f'/api/exercises?q={q}&category=chest&difficulty=beginner&limit=20'
+                                     for q in SEARCHES],
+                'autocomplete': [f'/api/exercises/autocomplete?q={p}' for p in PREFIXES],
+                'facets': ['/api/exercises/facets?category=legs', '/api/exercises/facets?q=press'],
+            }
+            for kind, urls in kinds.items():
+                timings = [t for url in urls for t in time_route(client, url, max(1, args.repeat // len(urls)))]
+                p50, p95 = percentiles(timings)
+                print(f'{kind:18} p50 {p50:6.2f} ms   p95 {p95:6.2f} ms   ({len(timings)} requests)')
+        finally:
+            if not args.keep:
+                ids = app.db.select(app.Exercise.id).where(app.Exercise.id >= first_id)
+                app.ExerciseMuscleGroup.query.filter(app.ExerciseMuscleGroup.exercise_id.in_(ids)).delete(
+                    synchronize_session=False)
+                app.Exercise.query.filter(app.Exercise.id >= first_id).delete(synchronize_session=False)
+                app.db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
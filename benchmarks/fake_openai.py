@@ -0,0 +1,295 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers ``POST /v1/chat/completions`` with a canned workout plan (for plan
+generation prompts) or a short consultation reply, either as a single JSON
+body or streamed as server-sent events with configurable delays. Faults can
+be injected: a random share of requests answered with an error status, and
+random extra latency before the first token.
+
+Run it and point the app at it::
+
+    python -m benchmarks.fake_openai --port 8011 --first-token-delay 0.5 --chunk-delay 0.05
+    python -m benchmarks.fake_openai --port 8011 --error-rate 0.3 --error-status 503 --latency-jitter 2
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 python app.py
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EXERCISES = [
+    ('Barbell Back Squat', '4 x 8', '70% 1RM', '120s'),
+    ('Bench Press', '4 x 8', '70% 1RM', '90s'),
+    ('Bent-Over Row', '3 x 10', 'RPE 7', '90s'),
+    ('Romanian Deadlift', '3 x 10', 'RPE 7', '90s'),
+    ('Overhead Press', '3 x 8', 'RPE 8', '90s'),
+    ('Walking Lunges', '3 x 12', 'Bodyweight', '60s'),
+    ('Pull-ups', '3 x 8', 'Bodyweight', '90s'),
+    ('Plank', '3 x 45s', 'Bodyweight', '45s'),
+]
+
+DAY_NAMES = [
+    'Upper Body Strength Training',
+    'Lower Body Power Training',
+    'Full Body Conditioning',
+    'Push Hypertrophy',
+    'Pull Hypertrophy',
+    'Core and Cardio',
+]
+
+CHAT_REPLY = (
+    "Aim for progressive overload: add a small amount of load or one or two reps each week "
+    "while keeping technique consistent. Prioritise 7-9 hours of sleep, adequate protein "
+    "(roughly 0.7-1 g per lb of bodyweight) and at least one full rest day between hard "
+    "sessions for the same muscle groups."
+)
+
+
+def workout_plan_text(days):
+    """A plan in the format the app's prompt asks for, with the requested number of days"""
+    lines = [
+        'PROGRAM OVERVIEW',
+        'A linear progression program alternating strength and hypertrophy emphasis.',
+        '',
+        'WEEKLY TRAINING SCHEDULE',
+        'Monday: Day 1, Wednesday: Day 2, Friday: Day 3',
+        '',
+        'DETAILED WORKOUT SESSIONS',
+    ]
+    for day in range(days):
+        lines.append(f'Day {day + 1}: {DAY_NAMES[day % len(DAY_NAMES)]}')
+        for index in range(6):
+            name, volume, intensity, rest = EXERCISES[(day + index) % len(EXERCISES)]
+            lines.append(f'• Exercise {index + 1}: {name} - {volume} @ {intensity} | Rest: {rest}')
+        lines.append('')
+    lines += [
+        'PROGRESSION PROTOCOL',
+        'Add 5 lbs to lower body lifts and 2.5 lbs to upper body lifts each week.',
+        '',
+        'PERFORMANCE NOTES',
+        'Control the eccentric phase and keep a neutral spine on all hinge patterns.',
+    ]
+    return '\n'.join(lines)
+
+
+def reply_for(messages):
+    """Pick the canned reply that matches the kind of prompt the app sent"""
+    prompt = '\n'.join(m.get('content') or '' for m in messages)
+    if 'TRAINING PROGRAM SPECIFICATIONS' in prompt:
+        match = re.search(r'Create exactly (\d+) distinct workout days', prompt)
+        return workout_plan_text(int(match.group(1)) if match else 3)
+    return CHAT_REPLY
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def setup(self):
+        super().setup()
+        self.server.record('connections')
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        self.server.record('requests')
+        with self.server.in_flight():
+            self.answer(body)
+
+    def answer(self, body):
+        status, latency = self.server.inject_faults()
+        if status:
+            time.sleep(latency)
+            self.send_json(status, {'error': {'message': f'Injected fault ({status})', 'type': 'server_error'}},
+                           {'Retry-After': '1'} if status == 429 else None)
+            return
+
+        text = reply_for(body.get('messages', []))
+        model = body.get('model', 'gpt-4.1')
+        prompt_tokens = sum(len((m.get('content') or '').split()) for m in body.get('messages', []))
+        completion_tokens = len(text.split())
+
+        time.sleep(self.server.first_token_delay + latency)
+
+        if not body.get('stream'):
+            time.sleep(self.server.chunk_delay * len(self.chunks(text)))
+            self.send_json(200, {
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': text},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens,
+                },
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        for piece in self.chunks(text):
+            self.send_chunk(model, {'content': piece}, None)
+            time.sleep(self.server.chunk_delay)
+        self.send_chunk(model, {}, 'stop')
+        if (body.get('stream_options') or {}).get('include_usage'):
+            self.send_chunk(model, None, None, usage={
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            })
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+        self.close_connection = True
+
+    def chunks(self, text):
+        words = re.findall(r'\s*\S+', text)
+        size = self.server.chunk_words
+        return [''.join(words[i:i + size]) for i in range(0, len(words), size)]
+
+    def send_chunk(self, model, delta, finish_reason, usage=None):
+        """A content chunk, or with usage the trailing usage-only chunk (no choices)"""
+        chunk = {
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [] if usage else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+        }
+        if usage:
+            chunk['usage'] = usage
+        self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+        self.wfile.flush()
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded fake OpenAI server; use start()/stop() to run it in-process.
+
+    Delays and fault settings are plain attributes and may be changed while it runs.
+    ``stats`` counts connections, requests, injected errors and the most requests
+    handled at once.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, first_token_delay=0.0, chunk_delay=0.0,
+                 chunk_words=3, verbose=False, error_rate=0.0, error_status=500, latency_jitter=0.0, seed=None):
+        super().__init__((host, port), FakeOpenAIHandler)
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_words = chunk_words
+        self.verbose = verbose
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.latency_jitter = latency_jitter
+        self.stats = {'connections': 0, 'requests': 0, 'errors': 0, 'in_flight': 0, 'max_in_flight': 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up (e.g. at their deadline) close the connection mid-response
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def record(self, field, count=1):
+        with self._lock:
+            self.stats[field] += count
+
+    @contextmanager
+    def in_flight(self):
+        with self._lock:
+            self.stats['in_flight'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+        try:
+            yield
+        finally:
+            self.record('in_flight', -1)
+
+    def inject_faults(self):
+        """(error status or None, extra seconds of latency) for the next request"""
+        with self._lock:
+            latency = self._rng.uniform(0, self.latency_jitter)
+            if self._rng.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return self.error_status, latency
+        return None, latency
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.update(connections=0, requests=0, errors=0, max_in_flight=self.stats['in_flight'])
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8011)
+    parser.add_argument('--first-token-delay', type=float, default=0.0,
+                        help='seconds to wait before the first chunk (or the whole response)')
+    parser.add_argument('--chunk-delay', type=float, default=0.0,
+                        help='seconds to wait between streamed chunks')
+    parser.add_argument('--chunk-words', type=int, default=3,
+                        help='words per streamed chunk')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of requests (0-1) answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--latency-jitter', type=float, default=0.0,
+                        help='up to this many extra seconds, at random, before the first chunk or an error')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.first_token_delay, args.chunk_delay,
+                              args.chunk_words, verbose=True, error_rate=args.error_rate,
+                              error_status=args.error_status, latency_jitter=args.latency_jitter, seed=args.seed)
+    print(f'Fake OpenAI API listening on {server.base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
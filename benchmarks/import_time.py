@@ -0,0 +1,92 @@
+"""Import-time budget check for app.py.
+
+Imports app.py in fresh interpreters, prints the slowest imports it pulls in
+(from ``python -X importtime``) and exits non-zero if the import (plus building
+an application with ``create_app``) exceeds the budget, or if a dependency that
+should only load on first use was imported::
+
+    python -m benchmarks.import_time --budget-ms 600
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Loaded on first use by the routes that need them, never at import
+LAZY_MODULES = ('openai', 'plotly', 'reportlab', 'pandas', 'numpy', 'analytics')
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print((imported - started) * 1000, (created - imported) * 1000)
+print(' '.join(name for name in {lazy!r} if name in sys.modules))
+"""
+
+
+def parse_importtime(stderr):
+    """(cumulative microseconds, module name, depth) for each line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name.strip(), (len(name) - len(name.lstrip())) // 2))
+    return entries
+
+
+def probe(root, importtime=False):
+    """Wall-clock import / create_app milliseconds, lazy modules loaded and the -X importtime entries"""
+    result = subprocess.run(
+        [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE.format(lazy=LAZY_MODULES)],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    timings, lazy_loaded = (result.stdout.splitlines() + [''])[:2]
+    import_ms, create_ms = map(float, timings.split())
+    return import_ms, create_ms, lazy_loaded.split(), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=600, help='Import plus create_app, best of --repeat')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Timed without -X importtime, whose bookkeeping adds noticeably to the total
+    runs = [probe(root) for _ in range(args.repeat)]
+    import_ms, create_ms, lazy_loaded, _ = min(runs, key=lambda run: run[0] + run[1])
+    entries = probe(root, importtime=True)[3]
+
+    # A module's own imports are listed just before it, one level deeper
+    app_index = next(i for i, (_, name, _) in enumerate(entries) if name == 'app')
+    app_depth = entries[app_index][2]
+    direct = []
+    for us, name, depth in reversed(entries[:app_index]):
+        if depth <= app_depth:
+            break
+        if depth == app_depth + 1:
+            direct.append((us, name))
+    direct.sort(reverse=True)
+    print('slowest imports under app:')
+    for us, name in direct[:args.top]:
+        print(f'  {us / 1000:8.1f} ms  {name}')
+    print(f'import app: {import_ms:.1f} ms, create_app(): {create_ms:.1f} ms (best of {args.repeat}), '
+          f'budget {args.budget_ms:.0f} ms')
+
+    failures = []
+    if import_ms + create_ms > args.budget_ms:
+        failures.append(f'startup takes {import_ms + create_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget')
+    if lazy_loaded:
+        failures.append(f'imported at startup but should load lazily: {", ".join(lazy_loaded)}')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
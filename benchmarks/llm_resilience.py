@@ -0,0 +1,156 @@
+"""Fault-injection check for the LLM gateway (llm_gateway.py).
+
+Runs concurrent chat completions through an ``LLMGateway`` against an
+in-process fake OpenAI server, one scenario at a time: a healthy but slow
+upstream, a flaky one, an outage, a hung one and a burst beyond the in-flight
+cap. For each it reports outcomes, latency and what the upstream saw
+(requests, connections opened, most requests at once), and exits non-zero if
+the gateway did not behave as expected: connections reused and concurrency
+capped, transient errors retried away, fast failure once the circuit opens,
+deadlines kept, and recovery after the upstream heals::
+
+    python -m benchmarks.llm_resilience --callers 16 --calls 4
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+PARAMS = {'model': 'gpt-4.1', 'messages': [{'role': 'user', 'content': 'How often should I deload?'}]}
+
+# Quick retries and a short breaker reset so each scenario runs in seconds
+GATEWAY_SETTINGS = dict(default_deadline=5.0, max_in_flight=4, queue_timeout=5.0, rate_per_second=1000.0,
+                        burst=1000, max_retries=3, retry_base_delay=0.05, retry_max_delay=0.5,
+                        breaker_failures=5, breaker_reset=1.0)
+
+
+def timed_call(gateway, stream, deadline):
+    """(outcome, seconds) for one call: 'ok' or the name of the exception raised"""
+    started = time.perf_counter()
+    try:
+        if stream:
+            for _ in gateway.stream_chat_completion(PARAMS, deadline):
+                pass
+        else:
+            gateway.chat_completion(PARAMS, deadline)
+        outcome = 'ok'
+    except Exception as e:
+        outcome = type(e).__name__
+    return outcome, time.perf_counter() - started
+
+
+def run_calls(gateway, server, callers, calls, stream=False, deadline=None):
+    """Run callers x calls completions concurrently; returns a summary dict"""
+    # Requests abandoned by an earlier scenario keep the fake server busy until they finish
+    while server.stats['in_flight']:
+        time.sleep(0.05)
+    server.reset_stats()
+    with ThreadPoolExecutor(callers) as pool:
+        results = list(pool.map(lambda _: timed_call(gateway, stream, deadline), range(callers * calls)))
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    seconds = sorted(s for _, s in results)
+    failed = sorted(s for outcome, s in results if outcome != 'ok')
+    return {
+        'calls': len(results),
+        'ok': outcomes.get('ok', 0),
+        'outcomes': outcomes,
+        'p50': statistics.median(seconds),
+        'max': seconds[-1],
+        'failed_p50': statistics.median(failed) if failed else 0.0,
+        **{f'upstream_{field}': value for field, value in server.stats.items()},
+    }
+
+
+def print_result(name, result, checks):
+    outcomes = ', '.join(f'{k} {v}' for k, v in sorted(result['outcomes'].items()))
+    print(f'{name:10} {result["calls"]:4} calls  [{outcomes}]  p50 {result["p50"] * 1000:7.1f} ms  '
+          f'max {result["max"] * 1000:7.1f} ms  failed p50 {result["failed_p50"] * 1000:7.1f} ms  '
+          f'upstream: {result["upstream_requests"]} requests, {result["upstream_connections"]} connections, '
+          f'{result["upstream_max_in_flight"]} at once')
+    failures = [f'{name}: {description}' for description, passed in checks if not passed]
+    for failure in failures:
+        print(f'  FAIL {failure}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--callers', type=int, default=16, help='Concurrent calling threads')
+    parser.add_argument('--calls', type=int, default=4, help='Calls per caller in each scenario')
+    parser.add_argument('--latency', type=float, default=0.1, help='Upstream seconds before answering')
+    args = parser.parse_args()
+
+    from llm_gateway import LLMGateway
+
+    server = FakeOpenAIServer(first_token_delay=args.latency, seed=0).start()
+    settings = GATEWAY_SETTINGS
+    cap = settings['max_in_flight']
+    failures = []
+    try:
+        def new_gateway(**overrides):
+            return LLMGateway(api_key='fake', base_url=server.base_url, **dict(settings, **overrides))
+
+        gateway = new_gateway()
+        result = run_calls(gateway, server, args.callers, args.calls)
+        failures += print_result('healthy', result, [
+            ('every call succeeds', result['ok'] == result['calls']),
+            (f'at most {cap} upstream requests at once', result['upstream_max_in_flight'] <= cap),
+            (f'at most {cap} connections opened', result['upstream_connections'] <= cap),
+        ])
+
+        server.error_rate, server.error_status = 0.3, 503
+        result = run_calls(new_gateway(max_retries=0, breaker_failures=10 ** 6), server, args.callers, args.calls)
+        failures += print_result('flaky', result, [('(no retries, for comparison)', True)])
+        result = run_calls(new_gateway(breaker_failures=10 ** 6), server, args.callers, args.calls)
+        failures += print_result('flaky', result, [
+            ('retries recover at least 95% of calls', result['ok'] >= 0.95 * result['calls']),
+        ])
+        result = run_calls(new_gateway(breaker_failures=10 ** 6), server, args.callers, args.calls, stream=True)
+        failures += print_result('flaky/sse', result, [
+            ('retries recover at least 95% of streams', result['ok'] >= 0.95 * result['calls']),
+        ])
+
+        server.error_rate = 1.0
+        result = run_calls(gateway, server, args.callers, args.calls)
+        failures += print_result('outage', result, [
+            ('the circuit opens and rejects calls', result['outcomes'].get('CircuitOpenError', 0) > 0),
+            ('most calls never reach the upstream', result['upstream_requests'] < result['calls'] / 2),
+            ('failures are fast once it is open (p50 under 50 ms)', result['failed_p50'] < 0.05),
+        ])
+
+        # Half-open lets a single probe through; its success closes the circuit
+        server.error_rate = 0.0
+        time.sleep(settings['breaker_reset'])
+        probe = timed_call(gateway, False, None)[0]
+        result = run_calls(gateway, server, args.callers, args.calls)
+        failures += print_result('recovered', result, [
+            ('the probe after the reset timeout succeeds', probe == 'ok'),
+            ('then every call succeeds again', result['ok'] == result['calls']),
+        ])
+
+        server.first_token_delay = 3.0
+        result = run_calls(new_gateway(), server, args.callers, 1, deadline=0.5)
+        failures += print_result('hung', result, [
+            ('every call misses its deadline', result['outcomes'].get('DeadlineExceededError', 0) == result['calls']),
+            ('no call outlives its 0.5 s deadline by more than 250 ms', result['max'] < 0.75),
+        ])
+
+        server.first_token_delay = 0.5
+        result = run_calls(new_gateway(max_in_flight=2, queue_timeout=0.2), server, args.callers, 1)
+        failures += print_result('burst', result, [
+            ('calls beyond the in-flight cap are shed', result['outcomes'].get('OverloadedError', 0) > 0),
+            ('at most 2 upstream requests at once', result['upstream_max_in_flight'] <= 2),
+        ])
+    finally:
+        server.stop()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
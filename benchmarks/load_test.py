@@ -0,0 +1,322 @@
+"""Concurrent load test of the HTTP routes against a seeded database.
+
+Serves app.py with a threaded server in a child process, pointed at a
+database filled by ``benchmarks.seed`` and at an in-process fake OpenAI API
+with configurable latency. Concurrent clients, each signed in as one of the
+seeded users, then send a weighted mix of requests over keep-alive
+connections:
+- dashboard bootstrap and its panels
+- statistics
+- today's workout
+- PDF export
+- chatbot and plan generation
+- logging a session
+
+The report gives per-route p50/p95/p99 latency, throughput and the SQL query
+count from the ``Server-Timing`` header. Results are saved as JSON tagged with
+the git commit, so runs can be compared between commits::
+
+    python -m benchmarks.seed --users 20 --years 3
+    python -m benchmarks.load_test --clients 8 --seconds 30 --llm-latency 0.5
+    python -m benchmarks.load_test --compare latest --max-regression 25
+"""
+import argparse
+import glob
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import re
+import secrets
+import statistics
+import subprocess
+import threading
+import time
+from datetime import date, timedelta
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.seed import DEFAULT_DATABASE_URL, EXERCISE_NAMES, ROOT
+
+DEFAULT_RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# (name, weight, method, path); {plan_id} is the signed-in user's latest plan at start-up
+ROUTES = [
+    ('dashboard-bootstrap', 10, 'GET', '/api/dashboard-bootstrap'),
+    ('statistics', 5, 'GET', '/api/statistics'),
+    ('todays-workout', 5, 'GET', '/api/todays-workout'),
+    ('workout-sessions', 4, 'GET', '/api/workout-sessions?include=exercises'),
+    ('progress-page', 4, 'GET', '/api/progress?limit=50'),
+    ('goals', 2, 'GET', '/api/goals'),
+    ('bmi-gauge', 3, 'GET', '/api/bmi-gauge'),
+    ('exercise-progress', 3, 'GET', '/api/exercise-progress'),
+    ('analytics', 2, 'GET', '/api/analytics'),
+    ('exercise-search', 3, 'GET', '/api/exercises?q=press&limit=20'),
+    ('plan-pdf', 2, 'GET', '/api/workout-plans/{plan_id}/pdf'),
+    ('chatbot', 2, 'POST', '/api/chatbot'),
+    ('generate-plan', 1, 'POST', '/api/generate-workout-plan'),
+    ('log-session', 2, 'POST', '/api/workout-sessions'),
+]
+
+CHAT_MESSAGES = ['How many rest days should I take?', 'Is it fine to train legs twice a week?',
+                 'What should I eat after a workout?', 'How do I break a bench press plateau?']
+
+SERVER_TIMING_PATTERN = re.compile(r'db;dur=(?P<db_ms>[\d.]+);desc="(?P<queries>\d+) queries"')
+
+
+def serve(database_url, openai_base_url, secret_key, ready):
+    """Child process: serve app.py on a free port and report the port through ``ready``"""
+    import logging
+    from werkzeug.serving import make_server
+    import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    application = app.create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SECRET_KEY': secret_key,
+        'OPENAI_BASE_URL': openai_base_url,
+        'OPENAI_API_KEY': 'load-test',
+    })
+    server = make_server('127.0.0.1', 0, application, threaded=True)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def seeded_users(database_url):
+    """(user id, latest plan id) for every user created by benchmarks.seed"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            'SELECT "user".id, MAX(workout_plan.id) FROM "user" JOIN workout_plan ON workout_plan.user_id = "user".id '
+            'WHERE "user".name LIKE :pattern GROUP BY "user".id ORDER BY "user".id'
+        ), {'pattern': 'load-test-%'}).all()
+    engine.dispose()
+    return [tuple(row) for row in rows]
+
+
+def session_cookie(secret_key, user_id):
+    """A Flask session cookie signing the client in as user_id, as the server will read it"""
+    from flask import Flask
+
+    signer = Flask(__name__)
+    signer.secret_key = secret_key
+    return 'session=' + signer.session_interface.get_signing_serializer(signer).dumps({'user_id': user_id})
+
+
+def request_body(name, rng):
+    if name == 'chatbot':
+        return {'message': rng.choice(CHAT_MESSAGES), 'cache': False}
+    if name == 'generate-plan':
+        return {'cache': False}
+    if name == 'log-session':
+        return {
+            'date': (date.today() - timedelta(days=rng.randrange(365))).isoformat(),
+            'name': 'Load test session',
+            'duration_minutes': rng.randint(30, 90),
+            'completed': True,
+            'exercises': [{'exercise': exercise, 'sets': 3, 'reps': [8, 8, 8], 'weight': [rng.choice(range(45, 225, 5))] * 3}
+                          for exercise in rng.sample(EXERCISE_NAMES, 4)],
+        }
+    return None
+
+
+def client(port, cookie, plan_id, routes, deadline, warmup_until, seed, samples):
+    """One simulated user sending requests back to back over a keep-alive connection"""
+    rng = random.Random(seed)
+    weights = [route[1] for route in routes]
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    while time.perf_counter() < deadline:
+        name, _, method, path = rng.choices(routes, weights)[0]
+        body = request_body(name, rng)
+        headers = {'Cookie': cookie}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+
+        started = time.perf_counter()
+        try:
+            connection.request(method, path.format(plan_id=plan_id), json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+            timing = SERVER_TIMING_PATTERN.search(response.getheader('Server-Timing') or '')
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+            status, timing = None, None
+        elapsed = time.perf_counter() - started
+
+        if started >= warmup_until:
+            samples.append((name, status, elapsed, int(timing['queries']) if timing else None,
+                            float(timing['db_ms']) if timing else None))
+    connection.close()
+
+
+def percentile_ms(cuts, percent):
+    return round(cuts[percent - 1] * 1000, 2)
+
+
+def summarize(samples, seconds):
+    """Per-route and overall latency percentiles, throughput and query counts"""
+    by_route = {}
+    for sample in samples:
+        by_route.setdefault(sample[0], []).append(sample)
+    by_route['all'] = samples
+
+    summary = {}
+    for name, rows in by_route.items():
+        latencies = [elapsed for _, status, elapsed, _, _ in rows if status is not None and status < 400]
+        queries = [count for _, _, _, count, _ in rows if count is not None]
+        db_ms = [value for _, _, _, _, value in rows if value is not None]
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else [
+            latencies[0] if latencies else 0.0] * 99
+        summary[name] = {
+            'requests': len(rows),
+            'errors': len(rows) - len(latencies),
+            'throughput': round(len(latencies) / seconds, 2),
+            'p50_ms': percentile_ms(cuts, 50),
+            'p95_ms': percentile_ms(cuts, 95),
+            'p99_ms': percentile_ms(cuts, 99),
+            'queries': round(statistics.fmean(queries), 1) if queries else None,
+            'db_ms': round(statistics.fmean(db_ms), 2) if db_ms else None,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f'{"route":22} {"requests":>8} {"errors":>6} {"req/s":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+          f'{"queries":>7} {"db ms":>7}')
+    for name, row in sorted(summary.items(), key=lambda item: (item[0] == 'all', item[0])):
+        print(f'{name:22} {row["requests"]:8} {row["errors"]:6} {row["throughput"]:7.1f} {row["p50_ms"]:8.1f} '
+              f'{row["p95_ms"]:8.1f} {row["p99_ms"]:8.1f} {row["queries"] if row["queries"] is not None else "-":>7} '
+              f'{row["db_ms"] if row["db_ms"] is not None else "-":>7}')
+
+
+def git_revision():
+    """Short commit hash, marked -dirty when the working tree has uncommitted changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+
+def save_results(results_dir, result):
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f'{time.strftime("%Y%m%dT%H%M%S")}-{result["revision"]}.json')
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def compare(previous, summary, routes, max_regression):
+    """Print p95 and query count changes against an earlier run; returns the regressed routes"""
+    print(f'\ncompared with {previous["revision"]} ({previous["started_at"]}):')
+    regressed = []
+    for name, row in sorted(summary.items()):
+        before = previous['routes'].get(name)
+        if before is None or not before['p95_ms']:
+            continue
+        if name == 'all' and previous['config'].get('routes') != routes:
+            continue  # the totals of different route mixes are not comparable
+        change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        more_queries = row['queries'] is not None and before['queries'] is not None and row['queries'] > before['queries']
+        flag = ''
+        if max_regression is not None and (change > max_regression or more_queries):
+            flag = '  REGRESSION'
+            regressed.append(name)
+        print(f'  {name:22} p95 {before["p95_ms"]:8.1f} -> {row["p95_ms"]:8.1f} ms ({change:+6.1f}%)   '
+              f'queries {before["queries"]} -> {row["queries"]}{flag}')
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL, help='A database filled by benchmarks.seed')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent simulated users')
+    parser.add_argument('--seconds', type=float, default=30, help='Measured duration')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds of load before measuring starts')
+    parser.add_argument('--routes', help='Comma-separated route names to drive (default: all)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Fake OpenAI seconds to first token')
+    parser.add_argument('--llm-chunk-delay', type=float, default=0.01, help='Fake OpenAI seconds between chunks')
+    parser.add_argument('--results-dir', default=DEFAULT_RESULTS_DIR)
+    parser.add_argument('--compare', help='Earlier result file, or "latest" for the newest one in --results-dir')
+    parser.add_argument('--max-regression', type=float,
+                        help='With --compare, exit non-zero if a route p95 grows by more than this percent '
+                             'or its query count grows')
+    args = parser.parse_args()
+
+    routes = ROUTES
+    if args.routes:
+        wanted = set(args.routes.split(','))
+        unknown = wanted - {route[0] for route in ROUTES}
+        if unknown:
+            parser.error(f'unknown routes: {", ".join(sorted(unknown))}')
+        routes = [route for route in ROUTES if route[0] in wanted]
+
+    previous = None
+    if args.compare:
+        path = args.compare
+        if path == 'latest':
+            earlier = sorted(glob.glob(os.path.join(args.results_dir, '*.json')))
+            if not earlier:
+                parser.error(f'no earlier results in {args.results_dir}')
+            path = earlier[-1]
+        with open(path) as f:
+            previous = json.load(f)
+
+    users = seeded_users(args.database_url)
+    if not users:
+        parser.error(f'no seeded users in {args.database_url}; run python -m benchmarks.seed first')
+
+    secret_key = secrets.token_hex(16)
+    fake_openai = FakeOpenAIServer(first_token_delay=args.llm_latency, chunk_delay=args.llm_chunk_delay).start()
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    server = context.Process(target=serve, args=(args.database_url, fake_openai.base_url, secret_key, ready),
+                             daemon=True)
+    server.start()
+    try:
+        port = ready.get(timeout=60)
+        samples = []  # list.append is atomic, so client threads share it
+        started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        warmup_until = time.perf_counter() + args.warmup
+        deadline = warmup_until + args.seconds
+        threads = []
+        for number in range(args.clients):
+            user_id, plan_id = users[number % len(users)]
+            thread = threading.Thread(target=client, args=(
+                port, session_cookie(secret_key, user_id), plan_id, routes, deadline, warmup_until, number, samples
+            ))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.join()
+        fake_openai.stop()
+
+    summary = summarize(samples, args.seconds)
+    print(f'{args.clients} clients, {len(users)} seeded users, {args.seconds:g}s measured after {args.warmup:g}s warm-up, '
+          f'LLM first token {args.llm_latency:g}s')
+    print_summary(summary)
+
+    result = {
+        'revision': git_revision(),
+        'started_at': started_at,
+        'config': {key: value for key, value in vars(args).items() if key not in ('compare', 'results_dir')},
+        'routes': summary,
+    }
+    print(f'\nresults saved to {os.path.relpath(save_results(args.results_dir, result), ROOT)}')
+
+    if previous is not None and compare(previous, summary, args.routes, args.max_regression):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Synthetic database seeder for load tests.
+
+Creates users, each with a goal, a structured workout plan and years of
+history: a weigh-in on most days and four workout sessions a week, with
+exercises and per-set reps and weights. History goes through ``import_history``,
+so the statistics rollups and per-exercise stats are built the same way as for
+real users. The target database is created if needed; existing users are kept::
+
+    python -m benchmarks.seed --users 20 --years 3
+    python -m benchmarks.seed --database-url postgresql://localhost/workoutbuddy_load --users 100
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE_URL = f'sqlite:///{os.path.join(ROOT, "instance", "loadtest.db")}'
+
+# Names missing from the catalog are added to it by the importer
+EXERCISE_NAMES = ['Squats', 'Deadlifts', 'Pull-ups', 'Push-ups', 'Plank', 'Bench Press', 'Overhead Press',
+                  'Bent-Over Row', 'Romanian Deadlift', 'Walking Lunges', 'Barbell Curl', 'Lat Pulldown']
+SESSION_NAMES = ['Upper Body Strength', 'Lower Body Power', 'Full Body Conditioning', 'Push Hypertrophy',
+                 'Pull Hypertrophy']
+GOALS = [
+    {'goal_type': 'strength', 'workout_frequency': 4, 'equipment_available': ['barbell', 'dumbbells', 'pull_up_bar']},
+    {'goal_type': 'weight_loss', 'workout_frequency': 3, 'equipment_available': ['dumbbells', 'bodyweight']},
+    {'goal_type': 'muscle_gain', 'workout_frequency': 5, 'equipment_available': ['barbell', 'cable', 'machine']},
+]
+
+
+def history_lines(years, exercise_names, seed=0, end=None):
+    """Yield NDJSON history lines (as bytes) covering ``years`` up to ``end`` (default today)"""
+    rng = random.Random(seed)
+    end = end or date.today()
+    day = end - timedelta(days=round(365.25 * years))
+    weight = rng.uniform(160, 230)
+    working_weights = {name: rng.choice(range(45, 225, 5)) for name in exercise_names}
+    while day <= end:
+        weight += rng.gauss(-0.02, 0.4)
+        if rng.random() < 0.8:
+            yield json.dumps({'type': 'progress', 'date': day.isoformat(), 'weight': round(weight, 1)}).encode() + b'\n'
+
+        if day.weekday() in (0, 1, 3, 4):
+            exercises = []
+            for name in rng.sample(exercise_names, min(len(exercise_names), rng.randint(4, 6))):
+                working_weights[name] += rng.choice([0, 0, 0, 5])
+                exercises.append({
+                    'exercise': name,
+                    'sets': 3,
+                    'reps': [rng.randint(5, 12) for _ in range(3)],
+                    'weight': [working_weights[name]] * 3,
+                })
+            yield json.dumps({
+                'type': 'workout_session',
+                'date': day.isoformat(),
+                'name': rng.choice(SESSION_NAMES),
+                'duration_minutes': rng.randint(35, 90),
+                'completed': rng.random() < 0.95,
+                'exercises': exercises,
+            }).encode() + b'\n'
+        day += timedelta(days=1)
+
+
+def seed_user(app, number, years, exercise_names, seed):
+    """Create one user with a goal, plan and history; returns (user id, history rows imported)"""
+    from benchmarks.fake_openai import workout_plan_text
+
+    rng = random.Random(seed)
+    db = app.db
+    user = app.User(name=f'load-test-{number}', height=rng.randint(60, 76), age=rng.randint(18, 65),
+                    gender=rng.choice(['male', 'female']),
+                    fitness_level=rng.choice(['beginner', 'intermediate', 'advanced']))
+    db.session.add(user)
+    db.session.flush()
+
+    spec = rng.choice(GOALS)
+    goal = app.Goal(
+        user_id=user.id,
+        goal_type=spec['goal_type'],
+        target_weight=rng.randint(150, 210),
+        workout_frequency=spec['workout_frequency'],
+        workout_duration=60,
+        equipment_items=[app.GoalEquipment(position=i, equipment=app.equipment_key(equipment))
+                         for i, equipment in enumerate(spec['equipment_available'])],
+    )
+    db.session.add(goal)
+    db.session.commit()
+
+    result = app.import_history(user.id, history_lines(years, exercise_names, seed), 'ndjson')
+    app.save_workout_plan(user.id, goal, {}, workout_plan_text(goal.workout_frequency))
+    return user.id, sum(result['imported'].values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    import app
+
+    if args.database_url.startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(os.path.abspath(args.database_url[len('sqlite:///'):])), exist_ok=True)
+    application = app.create_app({'SQLALCHEMY_DATABASE_URI': args.database_url})
+    with application.app_context():
+        app.init_db()
+        first_number = app.User.query.filter(app.User.name.like('load-test-%')).count()
+
+        started = time.perf_counter()
+        rows = 0
+        for number in range(first_number, first_number + args.users):
+            _, imported = seed_user(app, number, args.years, EXERCISE_NAMES, args.seed + number)
+            rows += imported
+        seconds = time.perf_counter() - started
+    print(f'seeded {args.users} users x {args.years:g} years ({rows:,} history rows) into {args.database_url} '
+          f'in {seconds:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Concurrent write load test for the storage settings.
+
+Runs N writer processes against a fresh SQLite database, each logging workout
+sessions and progress entries through the API (with a dashboard read between
+writes) for a fixed time. The run is repeated with the pre-tuning SQLite
+defaults (rollback journal, synchronous=FULL, default cache) and with the
+configured pragmas, reporting throughput, latency and lock errors for both::
+
+    python -m benchmarks.write_load --writers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+# SQLite as configured before WAL / pragma tuning (the busy timeout is pysqlite's default)
+BASELINE_ENV = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_MMAP_SIZE': '0',
+    'SQLITE_CACHE_SIZE_KB': '2000',
+    'SQLITE_BUSY_TIMEOUT_MS': '5000',
+}
+
+
+def load_app(database_url, env):
+    """app.py and an application configured for this run; call only in a fresh (spawned) process"""
+    os.environ.update(env)
+    import app
+    application = app.create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'PROPAGATE_EXCEPTIONS': True})
+    application.logger.disabled = True
+    return app, application
+
+
+def prepare(database_url, env, users):
+    app, application = load_app(database_url, env)
+    with application.app_context():
+        app.init_db()
+        for number in range(users):
+            app.db.session.add(app.User(name=f'write-load-{number}', height=70, age=30, gender='male',
+                                        fitness_level='intermediate'))
+        app.db.session.commit()
+        return [user.id for user in app.User.query.order_by(app.User.id)]
+
+
+def writer(database_url, env, user_id, seconds, seed):
+    _, application = load_app(database_url, env)
+    client = application.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+
+    rng = random.Random(seed)
+    result = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0, 'latencies': []}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        day = (date(2020, 1, 1) + timedelta(days=rng.randrange(1500))).isoformat()
+        if rng.random() < 0.5:
+            url, payload = '/api/workout-sessions', {
+                'date': day, 'name': 'Load test', 'duration_minutes': rng.randint(30, 90), 'completed': True,
+                'exercises': [{'exercise': 'Squats', 'sets': 3, 'reps': [5, 5, 5], 'weight': [rng.choice([185, 225])] * 3}]
+            }
+        else:
+            url, payload = '/api/progress', {'date': day, 'weight': round(rng.uniform(170, 190), 1)}
+
+        started = time.perf_counter()
+        try:
+            response = client.post(url, json=payload)
+            ok = response.status_code == 200
+            result['writes' if ok else 'errors'] += 1
+        except Exception as e:  # PROPAGATE_EXCEPTIONS surfaces OperationalError here
+            result['locked' if 'locked' in str(e) else 'errors'] += 1
+            continue
+        result['latencies'].append(time.perf_counter() - started)
+
+        try:
+            client.get('/api/dashboard-bootstrap')
+            result['reads'] += 1
+        except Exception as e:
+            result['locked' if 'locked' in str(e) else 'errors'] += 1
+    return result
+
+
+def check(database_url, env, user_ids):
+    app, application = load_app(database_url, env)
+    with application.app_context():
+        return {user_id: app.statistics_mismatches(user_id) for user_id in user_ids}
+
+
+def run(label, env, args, pool):
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f'sqlite:///{os.path.join(directory, "write_load.db")}'
+        user_ids = pool.apply(prepare, (database_url, env, args.users))
+        results = pool.starmap(writer, [
+            (database_url, env, user_ids[i % len(user_ids)], args.seconds, i) for i in range(args.writers)
+        ])
+        mismatches = pool.apply(check, (database_url, env, user_ids))
+
+    latencies = [t for r in results for t in r['latencies']]
+    writes = sum(r['writes'] for r in results)
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    inconsistent = [user_id for user_id, fields in mismatches.items() if fields]
+    print(f'{label:9} {writes / args.seconds:8.1f} writes/s  {sum(r["reads"] for r in results) / args.seconds:8.1f} reads/s  '
+          f'p50 {cuts[49] * 1000:7.1f} ms  p95 {cuts[94] * 1000:7.1f} ms  p99 {cuts[98] * 1000:7.1f} ms  '
+          f'locked {sum(r["locked"] for r in results):4}  errors {sum(r["errors"] for r in results):4}  '
+          f'rollups {"consistent" if not inconsistent else f"inconsistent for users {inconsistent}"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--users', type=int, default=4, help='Writers share these users round-robin')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    # Each task imports app.py afresh with its own environment, so never reuse worker processes
+    context = multiprocessing.get_context('spawn')
+    print(f'{args.writers} writers, {args.users} users, {args.seconds:g}s per run')
+    for label, env in (('baseline', BASELINE_ENV), ('tuned', {})):
+        with context.Pool(args.writers, maxtasksperchild=1) as pool:
+            run(label, env, args, pool)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Token-budgeted prompts for the training chatbot.
+
+A chat turn is sent as a system prompt (with only the profile facts the question
+touches and the conversation's rolling summary), the newest earlier turns
+verbatim and the new message. Turns that no longer fit the token budget are
+handed back to the caller to be folded into the summary, a few at a time.
+
+Token counts here are estimates (about four characters per token plus a small
+per-message overhead), good enough for budgeting; the API's usage figures are
+the ones recorded.
+"""
+import re
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators the chat format adds to every message
+REPLY_PRIMING_TOKENS = 3
+
+# Profile facts beyond experience level and goal, and the words in a question that call for them
+PROFILE_TOPICS = {
+    'body': ('weigh', 'bmi', 'calorie', 'protein', 'diet', 'eat', 'nutrition', 'macro', 'fat', 'lose', 'losing',
+             'gain', 'lean', 'age', 'old', 'height', 'tall'),
+    'schedule': ('schedule', 'often', 'frequen', 'day', 'week', 'split', 'minute', 'hour', 'long', 'time'),
+    'equipment': ('equipment', 'home', 'gym', 'dumbbell', 'barbell', 'kettlebell', 'band', 'machine', 'cable',
+                  'bench', 'bar', 'substitut', 'swap', 'alternative', 'instead', 'replace'),
+    'activity': ('progress', 'recent', 'lately', 'last', 'consisten', 'plateau', 'stuck', 'rest', 'recover',
+                 'sore', 'tired', 'fatigue', 'deload', 'overtrain', 'missed', 'skip', 'streak'),
+    'plan': ('plan', 'program', 'routine', 'today', 'tomorrow', 'workout', 'session', 'exercise'),
+}
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a client and their training consultant. "
+    "Merge the new turns into the summary. Keep the client's facts, constraints, injuries, preferences, "
+    "questions and the advice given; drop greetings and repetition. Write at most {max_words} words of "
+    "plain text, in the third person, with no preamble."
+)
+
+
+def estimate_tokens(text):
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def messages_tokens(messages):
+    """Estimated prompt tokens for a list of chat messages"""
+    return sum(MESSAGE_OVERHEAD_TOKENS + estimate_tokens(m['content']) for m in messages) + REPLY_PRIMING_TOKENS
+
+
+def relevant_topics(*texts):
+    """Names of the PROFILE_TOPICS the texts mention"""
+    words = set(re.findall(r'[a-z]+', ' '.join(t for t in texts if t).lower()))
+    return {topic for topic, keywords in PROFILE_TOPICS.items()
+            if any(word.startswith(keyword) for word in words for keyword in keywords)}
+
+
+def split_history(turns, budget, keep_recent):
+    """(older, recent) for turns (dicts with role and content, oldest first) and a token budget.
+
+    recent is the newest run of turns that fits the budget. Once anything overflows, recent
+    shrinks to the last keep_recent turns, so older turns are summarized every few turns
+    rather than one at a time on every turn.
+    """
+    used = 0
+    fits = len(turns)
+    while fits > 0:
+        cost = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(turns[fits - 1]['content'])
+        if used + cost > budget:
+            break
+        used += cost
+        fits -= 1
+    if fits == 0:
+        return [], list(turns)
+    split = max(fits, len(turns) - keep_recent)
+    return list(turns[:split]), list(turns[split:])
+
+
+def chat_messages(system_prompt, summary, recent, message):
+    """Messages for a chat turn: system prompt and summary, recent turns verbatim, then the new message"""
+    if summary:
+        system_prompt += f'\n\nEarlier in this conversation (summary):\n{summary}'
+    return [
+        {'role': 'system', 'content': system_prompt},
+        *({'role': turn['role'], 'content': turn['content']} for turn in recent),
+        {'role': 'user', 'content': message},
+    ]
+
+
+def summary_messages(summary, turns, max_words):
+    """Messages asking the model to fold turns into the running summary"""
+    transcript = '\n'.join(f"{'Client' if t['role'] == 'user' else 'Consultant'}: {t['content']}" for t in turns)
+    return [
+        {'role': 'system', 'content': SUMMARY_PROMPT.format(max_words=max_words)},
+        {'role': 'user', 'content': f"Current summary:\n{summary or '(none yet)'}\n\nNew turns:\n{transcript}"},
+    ]
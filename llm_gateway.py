@@ -0,0 +1,297 @@
+"""Resilient access to the OpenAI chat completions API.
+
+An ``LLMGateway`` owns one OpenAI client (so its pooled keep-alive connections
+are reused by every call) and puts each call through, in order, a circuit
+breaker that fails fast while the upstream is degraded, a token-bucket rate
+limiter, a cap on calls in flight and a per-call deadline that covers queueing,
+retries and the call itself. Timeouts, connection errors, 429s and 5xx answers
+are retried with full-jitter exponential backoff while the deadline allows.
+
+Calls the gateway refuses or gives up on raise an ``LLMUnavailable`` subclass
+carrying a ``retry_after`` hint in seconds. Limits are per gateway, which means
+per process.
+"""
+import itertools
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LLMUnavailable(Exception):
+    """The LLM could not be used for this call; retry_after is a hint in seconds"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(LLMUnavailable):
+    """Rejected without calling the upstream, which failed repeatedly"""
+
+
+class OverloadedError(LLMUnavailable):
+    """No rate-limit token or in-flight slot became free within the queue timeout"""
+
+
+class DeadlineExceededError(LLMUnavailable):
+    """The call (including retries) did not finish within its deadline"""
+
+
+class UpstreamError(LLMUnavailable):
+    """The upstream kept failing with transient errors until the retries ran out"""
+
+
+def is_transient(error):
+    """Timeouts, connection errors, throttling and server errors: worth retrying, and a sign of a degraded upstream"""
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code in (408, 429) or error.status_code >= 500)
+
+
+def retry_after_header(error):
+    """Seconds from the Retry-After header of an upstream error response, if any"""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, holding at most ``burst``"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Take a token, waiting up to ``timeout`` seconds for one; False if none became available"""
+        give_up_at = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Closed: calls pass. After ``failure_threshold`` consecutive failures it opens and
+    rejects calls for ``reset_timeout`` seconds, then half-opens to let a single probe
+    through: success closes it again, failure re-opens it. Every ``before_call`` must be
+    followed by ``record_success``, ``record_failure`` or ``release``.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go to the upstream now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError('LLM upstream is failing; not calling it for now', retry_after=remaining)
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError('LLM upstream is being probed after failures', retry_after=1.0)
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Count an upstream failure; True if this opened the circuit"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def release(self):
+        """End a call that says nothing about the upstream's health (e.g. it never reached it)"""
+        with self._lock:
+            self._probing = False
+
+
+class LLMGateway:
+    """Shared, rate-limited, deadline-bound access to chat completions; see the module docstring"""
+
+    def __init__(self, api_key, base_url=None, default_deadline=60.0, max_in_flight=8, queue_timeout=5.0,
+                 rate_per_second=10.0, burst=20, max_retries=2, retry_base_delay=0.5, retry_max_delay=8.0,
+                 breaker_failures=5, breaker_reset=30.0):
+        from openai import OpenAI
+
+        # Retries and timeouts are handled here, per call, rather than by the client
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self.default_deadline = default_deadline
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._events = {}
+        self._events_lock = threading.Lock()
+
+    def chat_completion(self, completion_params, deadline=None):
+        """``chat.completions.create(**completion_params)`` within ``deadline`` seconds, with retries"""
+        expires = time.monotonic() + (deadline or self.default_deadline)
+        for attempt in itertools.count():
+            try:
+                with self._admitted(expires) as timeout:
+                    return self.client.chat.completions.create(timeout=timeout, **completion_params)
+            except Exception as error:
+                self._retry_or_raise(error, attempt, expires)
+
+    def stream_chat_completion(self, completion_params, deadline=None):
+        """Yield the chunks of a streamed completion. Failures are retried only until the
+        first chunk arrives, since a partial answer has already been passed on"""
+        expires = time.monotonic() + (deadline or self.default_deadline)
+        for attempt in itertools.count():
+            received = False
+            try:
+                with self._admitted(expires) as timeout:
+                    with self.client.chat.completions.create(stream=True, timeout=timeout, **completion_params) as stream:
+                        for chunk in self._until_deadline(stream, expires):
+                            received = True
+                            yield chunk
+                return
+            except Exception as error:
+                self._retry_or_raise(error, attempt, expires, retry=not received)
+
+    def _until_deadline(self, stream, expires):
+        """Yield the stream's chunks, read on a helper thread so that waiting for the next one
+        stops at the deadline; the client's read timeout restarts with every chunk, so a stream
+        that stalls between chunks could otherwise block well past it"""
+        chunks = queue.Queue()
+        finished = object()
+
+        def read():
+            try:
+                for chunk in stream:
+                    chunks.put((chunk, None))
+                chunks.put((finished, None))
+            except Exception as error:  # including the stream being closed after the deadline
+                chunks.put((None, error))
+
+        threading.Thread(target=read, name='llm-stream-reader', daemon=True).start()
+        while True:
+            try:
+                chunk, error = chunks.get(timeout=self._remaining(expires))
+            except queue.Empty:
+                self._count('deadline_exceeded')
+                raise DeadlineExceededError('LLM stream did not finish within its deadline') from None
+            if error is not None:
+                raise error
+            if chunk is finished:
+                return
+            yield chunk
+
+    def event_counts(self):
+        """Counts of retries, rejections, deadline misses and circuit openings since start"""
+        with self._events_lock:
+            return dict(self._events)
+
+    def _count(self, event):
+        with self._events_lock:
+            self._events[event] = self._events.get(event, 0) + 1
+
+    def _remaining(self, expires):
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            self._count('deadline_exceeded')
+            raise DeadlineExceededError('LLM call did not finish within its deadline')
+        return remaining
+
+    @contextmanager
+    def _admitted(self, expires):
+        """Pass the circuit breaker, rate limiter and in-flight cap, then hold a slot for the
+        block; yields the seconds left before the deadline. The block's outcome feeds the breaker"""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._count('rejected_circuit_open')
+            raise
+        holding_slot = False
+        try:
+            wait = min(self.queue_timeout, self._remaining(expires))
+            queued_at = time.monotonic()
+            if not self.bucket.acquire(wait):
+                self._remaining(expires)  # a wait cut short by the deadline is a missed deadline
+                self._count('rejected_rate_limited')
+                raise OverloadedError('LLM request rate limit reached', retry_after=1.0 / self.bucket.rate)
+            if not self._slots.acquire(timeout=max(0.0, wait - (time.monotonic() - queued_at))):
+                self._remaining(expires)
+                self._count('rejected_overloaded')
+                raise OverloadedError('Too many LLM calls in progress', retry_after=1.0)
+            holding_slot = True
+            timeout = self._remaining(expires)
+        except BaseException:
+            if holding_slot:
+                self._slots.release()
+            self.breaker.release()
+            raise
+
+        outcome = self.breaker.release  # e.g. the consumer stopped reading a stream
+        try:
+            yield timeout
+            outcome = self.breaker.record_success
+        except Exception as error:
+            if is_transient(error) or isinstance(error, DeadlineExceededError):
+                outcome = self.breaker.record_failure
+            elif not isinstance(error, LLMUnavailable):
+                outcome = self.breaker.record_success  # the upstream answered, e.g. with a 400
+            raise
+        finally:
+            self._slots.release()
+            if outcome() is True:
+                self._count('circuit_opened')
+
+    def _retry_or_raise(self, error, attempt, expires, retry=True):
+        """Sleep before the next attempt after ``error``, or raise if there will not be one"""
+        if isinstance(error, LLMUnavailable) or not is_transient(error):
+            raise error
+        self._count('upstream_errors')
+
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))  # full jitter
+        delay = max(delay, retry_after_header(error) or 0)
+        if not retry or attempt >= self.max_retries:
+            raise UpstreamError(f'LLM upstream failed after {attempt + 1} attempt(s): {error}',
+                                retry_after=delay) from error
+        if time.monotonic() + delay >= expires:
+            self._count('deadline_exceeded')
+            raise DeadlineExceededError(f'LLM call did not finish within its deadline: {error}') from error
+
+        self._count('retries')
+        time.sleep(delay)
@@ -0,0 +1,312 @@
+"""Rule-based workout plans, generated locally in milliseconds.
+
+Builds a plan for a user's goal from the exercise catalog, in the same text
+format the LLM is asked for ("Day N: Name" headers followed by "• Exercise N:
+Name - Sets x Reps @ Intensity | Rest: Time" lines), so it is stored, parsed
+and scheduled like any generated plan. Inputs are plain values loaded by
+app.py; a small library of staple exercises fills the slots the catalog cannot.
+"""
+import zlib
+from collections import namedtuple
+
+CatalogExercise = namedtuple('CatalogExercise', 'name category muscle_groups equipment difficulty')
+
+DIFFICULTY_LEVELS = ('beginner', 'intermediate', 'advanced')
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def staple(name, category, muscle_groups, equipment='bodyweight', difficulty='beginner'):
+    return CatalogExercise(name, category, tuple(muscle_groups.split()), equipment, difficulty)
+
+
+# Common movements for every slot type and equipment setup, used alongside the catalog
+STAPLE_EXERCISES = (
+    staple('Push-ups', 'chest', 'chest triceps shoulders'),
+    staple('Incline Push-ups', 'chest', 'chest triceps'),
+    staple('Dumbbell Bench Press', 'chest', 'chest triceps', 'dumbbells'),
+    staple('Incline Dumbbell Press', 'chest', 'chest shoulders', 'dumbbells'),
+    staple('Barbell Bench Press', 'chest', 'chest triceps shoulders', 'barbell', 'intermediate'),
+    staple('Cable Fly', 'chest', 'chest', 'cable'),
+    staple('Machine Chest Press', 'chest', 'chest triceps', 'machine'),
+    staple('Inverted Row', 'back', 'lats rhomboids biceps'),
+    staple('Superman Hold', 'back', 'lower_back glutes'),
+    staple('Doorway Row', 'back', 'lats rhomboids biceps'),
+    staple('One-Arm Dumbbell Row', 'back', 'lats rhomboids biceps', 'dumbbells'),
+    staple('Bent-Over Row', 'back', 'lats rhomboids', 'barbell', 'intermediate'),
+    staple('Pull-ups', 'back', 'lats biceps rhomboids', 'pull_up_bar', 'intermediate'),
+    staple('Lat Pulldown', 'back', 'lats biceps', 'cable'),
+    staple('Seated Cable Row', 'back', 'rhomboids lats', 'cable'),
+    staple('Squats', 'legs', 'quadriceps glutes'),
+    staple('Reverse Lunges', 'legs', 'quadriceps glutes'),
+    staple('Glute Bridge', 'legs', 'glutes hamstrings'),
+    staple('Single-Leg Romanian Deadlift', 'legs', 'hamstrings glutes', difficulty='intermediate'),
+    staple('Calf Raises', 'legs', 'calves'),
+    staple('Goblet Squat', 'legs', 'quadriceps glutes', 'dumbbells'),
+    staple('Dumbbell Romanian Deadlift', 'legs', 'hamstrings glutes', 'dumbbells'),
+    staple('Bulgarian Split Squat', 'legs', 'quadriceps glutes', 'dumbbells', 'intermediate'),
+    staple('Barbell Back Squat', 'legs', 'quadriceps glutes', 'barbell', 'intermediate'),
+    staple('Romanian Deadlift', 'legs', 'hamstrings glutes', 'barbell', 'intermediate'),
+    staple('Hip Thrust', 'legs', 'glutes hamstrings', 'barbell', 'intermediate'),
+    staple('Leg Press', 'legs', 'quadriceps glutes', 'machine'),
+    staple('Leg Curl', 'legs', 'hamstrings', 'machine'),
+    staple('Pike Push-ups', 'shoulders', 'shoulders triceps', difficulty='intermediate'),
+    staple('Prone Y-T-W Raises', 'shoulders', 'shoulders rhomboids'),
+    staple('Dumbbell Shoulder Press', 'shoulders', 'shoulders triceps', 'dumbbells'),
+    staple('Lateral Raise', 'shoulders', 'shoulders', 'dumbbells'),
+    staple('Rear Delt Fly', 'shoulders', 'shoulders', 'dumbbells'),
+    staple('Overhead Press', 'shoulders', 'shoulders triceps', 'barbell', 'intermediate'),
+    staple('Face Pull', 'shoulders', 'shoulders', 'cable'),
+    staple('Bench Dips', 'arms', 'triceps'),
+    staple('Diamond Push-ups', 'arms', 'triceps chest', difficulty='intermediate'),
+    staple('Chin-ups', 'arms', 'biceps lats', 'pull_up_bar', 'intermediate'),
+    staple('Dumbbell Curl', 'arms', 'biceps', 'dumbbells'),
+    staple('Hammer Curl', 'arms', 'biceps forearms', 'dumbbells'),
+    staple('Overhead Triceps Extension', 'arms', 'triceps', 'dumbbells'),
+    staple('Barbell Curl', 'arms', 'biceps', 'barbell'),
+    staple('Cable Triceps Pushdown', 'arms', 'triceps', 'cable'),
+    staple('Cable Curl', 'arms', 'biceps', 'cable'),
+    staple('Plank', 'core', 'core shoulders'),
+    staple('Dead Bug', 'core', 'core'),
+    staple('Side Plank', 'core', 'core obliques'),
+    staple('Bicycle Crunch', 'core', 'core obliques'),
+    staple('Hanging Knee Raise', 'core', 'core', 'pull_up_bar', 'intermediate'),
+    staple('Mountain Climbers', 'cardio', 'core shoulders'),
+    staple('Jumping Jacks', 'cardio', 'full_body'),
+    staple('Burpees', 'cardio', 'full_body', difficulty='intermediate'),
+    staple('Jump Rope', 'cardio', 'calves', 'jump_rope'),
+    staple('Rowing Machine', 'cardio', 'full_body', 'machine'),
+    staple('Stationary Bike', 'cardio', 'quadriceps', 'machine'),
+    staple('Brisk Walk or Jog', 'cardio', 'full_body'),
+)
+
+# Day name (with the goal's label filled in) and slots, which are (category, muscle group or None).
+# A day fills as many slots as its duration allows, in order, skipping those nothing fits
+DAY_TEMPLATES = {
+    'full_body_a': ('Full Body {label}', [('legs', 'quadriceps'), ('chest', None), ('back', None), ('shoulders', None),
+                                  ('legs', 'hamstrings'), ('core', None), ('arms', 'biceps'), ('cardio', None)]),
+    'full_body_b': ('Full Body {label}', [('legs', 'hamstrings'), ('back', None), ('chest', None), ('legs', 'quadriceps'),
+                                  ('shoulders', None), ('core', None), ('arms', 'triceps'), ('cardio', None)]),
+    'full_body_c': ('Full Body {label}', [('legs', 'quadriceps'), ('shoulders', None), ('back', None), ('chest', None),
+                                  ('legs', 'glutes'), ('core', None), ('arms', 'biceps'), ('cardio', None)]),
+    'upper': ('Upper Body {label}', [('chest', None), ('back', None), ('shoulders', None), ('back', None), ('chest', None),
+                             ('arms', 'biceps'), ('arms', 'triceps'), ('core', None)]),
+    'lower': ('Lower Body {label}', [('legs', 'quadriceps'), ('legs', 'hamstrings'), ('legs', 'glutes'),
+                             ('legs', 'quadriceps'), ('legs', 'calves'), ('core', None), ('core', None),
+                             ('cardio', None)]),
+    'push': ('Push {label} (Chest, Shoulders, Triceps)', [('chest', None), ('shoulders', None), ('chest', None),
+                                                  ('shoulders', None), ('arms', 'triceps'), ('arms', 'triceps'),
+                                                  ('core', None), ('cardio', None)]),
+    'pull': ('Pull {label} (Back, Biceps)', [('back', None), ('back', None), ('back', None), ('shoulders', 'rhomboids'),
+                                     ('arms', 'biceps'), ('arms', 'biceps'), ('core', None), ('cardio', None)]),
+    'legs': ('Legs and Core {label}', [('legs', 'quadriceps'), ('legs', 'hamstrings'), ('legs', 'glutes'),
+                               ('legs', 'quadriceps'), ('legs', 'calves'), ('core', None), ('core', None),
+                               ('cardio', None)]),
+    'conditioning': ('Conditioning and Core', [('cardio', None), ('legs', None), ('chest', None), ('back', None),
+                                                 ('core', None), ('cardio', None), ('core', None), ('shoulders', None)]),
+}
+
+# Day templates per training frequency, and how the split is described in the overview
+SPLITS = {
+    1: ('full body', ['full_body_a']),
+    2: ('full body', ['full_body_a', 'full_body_b']),
+    3: ('full body', ['full_body_a', 'full_body_b', 'full_body_c']),
+    4: ('upper/lower', ['upper', 'lower', 'upper', 'lower']),
+    5: ('upper/lower plus push/pull/legs', ['upper', 'lower', 'push', 'pull', 'legs']),
+    6: ('push/pull/legs', ['push', 'pull', 'legs', 'push', 'pull', 'legs']),
+    7: ('push/pull/legs with a conditioning day', ['push', 'pull', 'legs', 'push', 'pull', 'legs', 'conditioning']),
+}
+
+# Goal types as entered (bulk, cut, tone, strength, endurance, ...) mapped to a programming style
+GOAL_STYLES = {
+    'strength': 'strength', 'powerlifting': 'strength',
+    'bulk': 'hypertrophy', 'muscle_gain': 'hypertrophy', 'hypertrophy': 'hypertrophy',
+    'cut': 'fat_loss', 'weight_loss': 'fat_loss', 'fat_loss': 'fat_loss', 'tone': 'fat_loss',
+    'endurance': 'endurance',
+}
+
+# Per style: day name suffix, (sets, reps, intensity, rest) for the main lifts and the
+# accessories, the cardio prescription, and the progression protocol
+STYLES = {
+    'strength': {
+        'label': 'Strength', 'goal': 'maximal strength',
+        'main': ('5', '5', '80% 1RM', '180s'), 'accessory': ('3', '8', 'RPE 8', '90s'),
+        'cardio': ('1', '10 min', 'Easy pace', '60s'),
+        'progression': 'Add 5 lbs to lower body lifts and 2.5 lbs to upper body lifts each session while all '
+                       'sets are completed; after two missed sessions, reduce the load by 10% and build back up.',
+    },
+    'hypertrophy': {
+        'label': 'Hypertrophy', 'goal': 'muscle gain',
+        'main': ('4', '8-10', '70% 1RM', '120s'), 'accessory': ('3', '10-12', 'RPE 8', '75s'),
+        'cardio': ('1', '10 min', 'Moderate pace', '60s'),
+        'progression': 'Double progression: once every set reaches the top of the rep range, add 5% load and '
+                       'return to the bottom of the range. Deload with half the sets every fifth week.',
+    },
+    'fat_loss': {
+        'label': 'Metabolic', 'goal': 'fat loss while keeping muscle',
+        'main': ('3', '10-12', '65% 1RM', '60s'), 'accessory': ('3', '12-15', 'RPE 7', '45s'),
+        'cardio': ('6', '30s', 'Hard effort', '60s'),
+        'progression': 'Add one rep per set each week up to the top of the range, then add load. Shorten rests '
+                       'by 5-10 seconds every two weeks while technique holds.',
+    },
+    'endurance': {
+        'label': 'Endurance', 'goal': 'muscular endurance',
+        'main': ('3', '15', '55% 1RM', '45s'), 'accessory': ('2', '15-20', 'RPE 6', '30s'),
+        'cardio': ('1', '20 min', 'Moderate pace', '60s'),
+        'progression': 'Add a set to the main lifts every two weeks up to five sets, then add 5% load and '
+                       'return to three sets. Extend cardio by 2 minutes each week.',
+    },
+    'general': {
+        'label': 'Training', 'goal': 'general fitness',
+        'main': ('3', '8-10', 'RPE 7', '90s'), 'accessory': ('3', '10-12', 'RPE 7', '60s'),
+        'cardio': ('1', '15 min', 'Moderate pace', '60s'),
+        'progression': 'Add a rep to each set every week up to the top of the range, then add the smallest '
+                       'load increment available and start again from the bottom of the range.',
+    },
+}
+
+MAIN_LIFTS_PER_DAY = 2
+HOLD_KEYWORDS = ('plank', 'hold', 'wall sit')  # prescribed in seconds rather than reps
+INTERVAL_KEYWORDS = ('burpee', 'mountain climber', 'jumping jack', 'high knee')  # cardio done in short bouts
+
+
+def difficulty_rank(level):
+    return DIFFICULTY_LEVELS.index(level) if level in DIFFICULTY_LEVELS else None
+
+
+def exercises_per_day(duration_minutes):
+    """Roughly one exercise per 10 minutes, between 5 and 8"""
+    return max(5, min(8, int(duration_minutes or 60) // 10))
+
+
+def eligible_exercises(catalog, equipment):
+    """Catalog plus staple exercises usable with the equipment keys given (bodyweight always is).
+    Catalog entries replace staples of the same name"""
+    available = set(equipment) | {'bodyweight'}
+    merged = {e.name.lower(): e for e in STAPLE_EXERCISES}
+    merged.update((e.name.lower(), e) for e in catalog if e.category)
+    return [e for e in merged.values() if (e.equipment or 'bodyweight') in available]
+
+
+def is_hold(exercise):
+    return any(keyword in exercise.name.lower() for keyword in HOLD_KEYWORDS)
+
+
+def pick_exercise(candidates, slot, main_lift, day_number, fitness_level, preferred, used_today, used_in_plan):
+    """Best candidate for a slot, or None. Preferred exercises come first; main lifts then favour
+    loaded, multi-muscle movements. After that: exercises not yet in the plan, then those closest to
+    the user's level (harder ones are penalized more than easier ones); remaining ties vary by day.
+    A slot for a muscle group takes a matching exercise from another category before giving up"""
+    category, muscle_group = slot
+    pool = [e for e in candidates if e.name not in used_today]
+    if muscle_group:
+        pool = ([e for e in pool if e.category == category and muscle_group in e.muscle_groups]
+                or [e for e in pool if e.category not in ('cardio', 'core') and muscle_group in e.muscle_groups])
+    else:
+        pool = [e for e in pool if e.category == category]
+    if not pool:
+        return None
+
+    level = difficulty_rank(fitness_level)
+
+    def rank(exercise):
+        gap = 0
+        exercise_level = difficulty_rank(exercise.difficulty)
+        if level is not None and exercise_level is not None:
+            gap = (exercise_level - level) * 3 if exercise_level > level else level - exercise_level
+        lift_fit = 0
+        if main_lift:
+            lift_fit = ((exercise.equipment or 'bodyweight') == 'bodyweight') + (len(exercise.muscle_groups) < 2 or is_hold(exercise))
+        tiebreak = zlib.crc32(f'{day_number}:{exercise.name}'.encode())
+        return exercise.name.lower() not in preferred, lift_fit, used_in_plan.get(exercise.name, 0), gap, tiebreak
+
+    return min(pool, key=rank)
+
+
+def prescription(exercise, role, style, fitness_level):
+    """(sets, reps, intensity, rest) for an exercise in a slot"""
+    if exercise.category == 'cardio':
+        if style['cardio'][1].endswith('min') and any(keyword in exercise.name.lower() for keyword in INTERVAL_KEYWORDS):
+            return '5', '40s', style['cardio'][2], '20s'
+        return style['cardio']
+    if is_hold(exercise):
+        return '3', '30s' if fitness_level == 'beginner' else '45s', 'Bodyweight', '45s'
+    if exercise.category == 'core':
+        return '3', '12-15', 'Bodyweight', '45s'
+
+    sets, reps, intensity, rest = style[role]
+    if (exercise.equipment or 'bodyweight') == 'bodyweight':
+        intensity = 'Bodyweight'
+    elif fitness_level == 'beginner' and '1RM' in intensity:
+        intensity = 'RPE 7'  # no reliable 1RM to take a percentage of yet
+    if fitness_level == 'beginner':
+        sets = str(min(int(sets), 3))
+    return sets, reps, intensity, rest
+
+
+def build_workout_plan(profile, catalog, preferred=(), schedule=None):
+    """Plan text for a profile (goal_type, fitness_level, frequency, duration, equipment keys) built
+    from catalog, a list of CatalogExercise; schedule maps weekday (0 = Monday) to day labels"""
+    frequency = max(1, min(7, int(profile.get('frequency') or 3)))
+    fitness_level = (profile.get('fitness_level') or 'beginner').lower()
+    goal_type = str(profile.get('goal_type') or 'general').lower().replace(' ', '_')
+    style = STYLES[GOAL_STYLES.get(goal_type, 'general')]
+    split_name, day_templates = SPLITS[frequency]
+    slots_per_day = exercises_per_day(profile.get('duration'))
+    equipment = [e for e in profile.get('equipment') or [] if e]
+    candidates = eligible_exercises(catalog, equipment)
+    preferred = {name.lower() for name in preferred}
+
+    # Days sharing a name (e.g. two upper body days) are told apart as A, B, ...
+    names = [DAY_TEMPLATES[template][0] for template in day_templates]
+    used_in_plan = {}
+    days = []
+    for day_number, template in enumerate(day_templates, start=1):
+        name, slots = DAY_TEMPLATES[template]
+        label = style['label']
+        if names.count(name) > 1:
+            label += ' ' + 'ABC'[names[:day_number - 1].count(name)]
+        lines = [f'Day {day_number}: {name.format(label=label)}']
+
+        used_today = set()
+        for slot_index, slot in enumerate(slots):
+            if len(used_today) == slots_per_day:
+                break
+            main_lift = slot_index < MAIN_LIFTS_PER_DAY
+            exercise = pick_exercise(candidates, slot, main_lift, day_number, fitness_level, preferred,
+                                     used_today, used_in_plan)
+            if exercise is None:
+                continue
+            used_today.add(exercise.name)
+            used_in_plan[exercise.name] = used_in_plan.get(exercise.name, 0) + 1
+            sets, reps, intensity, rest = prescription(exercise, 'main' if main_lift else 'accessory', style,
+                                                       fitness_level)
+            lines.append(f'• Exercise {len(used_today)}: {exercise.name} - {sets} x {reps} @ {intensity} | Rest: {rest}')
+        days.append(lines)
+
+    labels = {f'Day {n}' for n in range(1, frequency + 1)}
+    scheduled = [f'{WEEKDAY_NAMES[weekday]}: {label}' for weekday, label in sorted((schedule or {}).items())
+                 if label in labels]
+    equipment_text = ', '.join(e.replace('_', ' ') for e in equipment) or 'bodyweight only'
+
+    text = [
+        'PROGRAM OVERVIEW',
+        f'A {frequency}-day {split_name} program for {style["goal"]} at the {fitness_level} level, using the '
+        f'available equipment ({equipment_text}). The first two exercises of each day are the main lifts; '
+        f'the rest are accessory and conditioning work.',
+        '',
+        'WEEKLY TRAINING SCHEDULE',
+        ', '.join(scheduled) if scheduled else ', '.join(sorted(labels, key=lambda label: int(label.split()[1]))),
+        '',
+        'DETAILED WORKOUT SESSIONS',
+    ]
+    for lines in days:
+        text += lines + ['']
+    text += [
+        'PROGRESSION PROTOCOL',
+        style['progression'],
+        '',
+        'PERFORMANCE NOTES',
+        'Warm up for 5-10 minutes before each session and ramp up to working weights over two or three lighter '
+        'sets. Stop a set when technique breaks down; log every session so progression is based on what you did.',
+    ]
+    return '\n'.join(text)
@@ -23,7 +23,7 @@ function initializeApp() {
 
 // Load current user data
 function loadCurrentUser() {
-    fetch('/api/user')
+    conditionalFetch('/api/user')
         .then(response => response.json())
         .then(data => {
             if (data.name) {
@@ -252,7 +252,7 @@ function openEditProfile() {
     }
     
     // Load current user data and populate form
-    fetch('/api/user')
+    conditionalFetch('/api/user')
         .then(response => response.json())
         .then(userData => {
             // Populate form fields
@@ -263,11 +263,11 @@ function openEditProfile() {
             document.getElementById('fitnessLevel').value = userData.fitness_level || '';
             
             // Get latest weight from progress
-            fetch('/api/progress')
+            conditionalFetch('/api/progress?limit=1&fields=weight')
                 .then(response => response.json())
                 .then(progressData => {
                     if (progressData.length > 0) {
-                        const latestWeight = progressData[progressData.length - 1].weight;
+                        const latestWeight = progressData[0].weight;
                         document.getElementById('userWeight').value = latestWeight || '';
                     }
                 })
@@ -385,7 +385,13 @@ const API = {
         }
     },
     
-    get: (url) => API.request(url),
+    get: async (url) => {
+        const response = await conditionalFetch(url);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    },
     
     post: (url, data) => API.request(url, {
         method: 'POST',
@@ -402,6 +408,138 @@ const API = {
     })
 };
 
+// Conditional GET: responses with an ETag are kept (in memory and sessionStorage, so they survive
+// page navigation) and revalidated with If-None-Match; an unchanged resource comes back as a 304
+// without a body and is served from the stored copy. Concurrent requests for a URL share one round trip.
+const CONDITIONAL_STORAGE_PREFIX = 'conditional-get:';
+const conditionalEntries = new Map();   // url -> { etag, body, contentType, nextCursor }
+const conditionalInflight = new Map();  // url -> Promise of { status, body, contentType, nextCursor }
+
+function readConditionalEntry(url) {
+    if (!conditionalEntries.has(url)) {
+        try {
+            const stored = sessionStorage.getItem(CONDITIONAL_STORAGE_PREFIX + url);
+            if (stored) {
+                conditionalEntries.set(url, JSON.parse(stored));
+            }
+        } catch (error) {
+            // Storage unavailable or corrupt: revalidate from scratch
+        }
+    }
+    return conditionalEntries.get(url) || null;
+}
+
+function writeConditionalEntry(url, entry) {
+    conditionalEntries.set(url, entry);
+    try {
+        sessionStorage.setItem(CONDITIONAL_STORAGE_PREFIX + url, JSON.stringify(entry));
+    } catch (error) {
+        // Over quota: keep the in-memory copy only
+    }
+}
+
+// Drop-in replacement for fetch(url) on GET endpoints; resolves to a fresh Response for each caller
+function conditionalFetch(url) {
+    if (!conditionalInflight.has(url)) {
+        const entry = readConditionalEntry(url);
+        // Setting If-None-Match ourselves makes the browser pass a 304 through instead of handling it
+        const request = fetch(url, { headers: entry ? { 'If-None-Match': entry.etag } : {} })
+            .then(async response => {
+                if (response.status === 304 && entry) {
+                    return { status: 200, body: entry.body, contentType: entry.contentType, nextCursor: entry.nextCursor };
+                }
+                const result = {
+                    status: response.status,
+                    body: await response.text(),
+                    contentType: response.headers.get('Content-Type'),
+                    nextCursor: response.headers.get('X-Next-Cursor')
+                };
+                const etag = response.headers.get('ETag');
+                if (response.ok && etag) {
+                    writeConditionalEntry(url, { etag, ...result });
+                }
+                return result;
+            })
+            .finally(() => conditionalInflight.delete(url));
+        conditionalInflight.set(url, request);
+    }
+    
+    return conditionalInflight.get(url).then(result => {
+        const headers = {};
+        if (result.contentType) {
+            headers['Content-Type'] = result.contentType;
+        }
+        if (result.nextCursor) {
+            headers['X-Next-Cursor'] = result.nextCursor;
+        }
+        return new Response(result.body, { status: result.status, headers });
+    });
+}
+
+// Every item of a paginated list endpoint, following X-Next-Cursor one page at a time
+async function conditionalFetchAll(url) {
+    const items = [];
+    let pageUrl = url;
+    while (pageUrl) {
+        const response = await conditionalFetch(pageUrl);
+        if (!response.ok) {
+            throw new Error(`${url} returned ${response.status}`);
+        }
+        items.push(...await response.json());
+        const cursor = response.headers.get('X-Next-Cursor');
+        pageUrl = cursor ? `${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}` : null;
+    }
+    return items;
+}
+
+// POST JSON and read the server-sent event stream, calling onEvent(name, data) per event
+async function postEventStream(url, data, onEvent) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        },
+        body: JSON.stringify(data)
+    });
+    
+    if (!response.ok || !response.body) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventName = 'message';
+            const dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            });
+            
+            if (dataLines.length > 0) {
+                onEvent(eventName, JSON.parse(dataLines.join('\n')));
+            }
+        }
+    }
+}
+
 // Make openEditProfile globally available for navigation
 window.openEditProfile = openEditProfile;
 
@@ -463,6 +601,8 @@ window.WorkoutBot = {
     formatNumber,
     LocalStorage,
     API,
+    conditionalFetch,
+    postEventStream,
     addLoadingState,
     removeLoadingState,
     debounce
@@ -0,0 +1,24 @@
+from datetime import date
+
+import analytics
+
+
+def test_since_mid_week_keeps_the_week_it_falls_in():
+    # 2025-01-08 is a Wednesday; its week starts Monday 2025-01-06
+    result = analytics.build_analytics(
+        [date(2025, 1, 1), date(2025, 1, 8), date(2025, 1, 14)], [180.0, 179.0, 178.0],
+        [date(2025, 1, 2), date(2025, 1, 9), date(2025, 1, 15)], [40, 45, 50],
+        since=date(2025, 1, 8)
+    )
+
+    assert result['weight']['dates'][0] == '2025-01-08'
+    assert result['weekly_change']['weeks'] == ['2025-01-06', '2025-01-13']
+    assert result['training_volume']['weeks'] == ['2025-01-06', '2025-01-13']
+    assert result['training_volume']['minutes'] == [45, 50]
+
+
+def test_single_entry_on_since_day():
+    result = analytics.build_analytics([date(2025, 1, 8)], [180.0], [date(2025, 1, 8)], [30], since=date(2025, 1, 8))
+
+    assert result['weekly_change']['weeks'] == ['2025-01-06']
+    assert result['training_volume']['weeks'] == ['2025-01-06']